@@ -0,0 +1,252 @@
+# Copyright 2017 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"). You
+# may not use this file except in compliance with the License. A copy of
+# the License is located at
+#
+# http://aws.amazon.com/apache2.0/
+#
+# or in the "license" file accompanying this file. This file is
+# distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF
+# ANY KIND, either express or implied. See the License for the specific
+# language governing permissions and limitations under the License.
+
+"""
+Synthetic API fixtures for the benchmark scenarios.
+
+They have the same format as fixtures recorded with `eb --record-api`, so a
+recording of a real account can be used in place of any of them.
+"""
+
+from datetime import datetime, timedelta
+
+from dateutil import tz
+
+from ebcli.lib.apirecording import make_call
+
+APP_NAME = 'bench-app'
+ENV_NAME = 'bench-env'
+ENV_ID = 'e-bench00000'
+REGION = 'us-west-2'
+PLATFORM_ARN = 'arn:aws:elasticbeanstalk:us-west-2::platform/' \
+               'Python 3.4 running on 64bit Amazon Linux/2.5.0'
+BUCKET = 'elasticbeanstalk-us-west-2-123456789012'
+INSTANCE_COUNT = 20
+VERSION_COUNT = 500
+LOG_PAGES = 20
+EVENT_POLLS = 10
+EVENT_FOLLOW_POLLS = 3
+
+
+def _now():
+    return datetime.now(tz.tzutc())
+
+
+def _environment(**overrides):
+    environment = {
+        'ApplicationName': APP_NAME,
+        'EnvironmentName': ENV_NAME,
+        'EnvironmentId': ENV_ID,
+        'VersionLabel': 'app-v1',
+        'PlatformArn': PLATFORM_ARN,
+        'SolutionStackName': '64bit Amazon Linux 2017.03 v2.5.0 running Python 3.4',
+        'Status': 'Ready',
+        'Health': 'Green',
+        'HealthStatus': 'Ok',
+        'Tier': {'Name': 'WebServer', 'Type': 'Standard', 'Version': '1.0'},
+        'CNAME': ENV_NAME + '.us-west-2.elasticbeanstalk.com',
+        'DateCreated': _now() - timedelta(days=30),
+        'DateUpdated': _now() - timedelta(hours=1),
+        'EnvironmentLinks': [],
+        'AbortableOperationInProgress': False,
+    }
+    environment.update(overrides)
+    return environment
+
+
+def _instance_ids():
+    return ['i-{0:017x}'.format(i) for i in range(INSTANCE_COUNT)]
+
+
+def _environment_calls():
+    return [
+        make_call('elasticbeanstalk', 'describe_environments',
+                  {'Environments': [_environment()]}),
+    ]
+
+
+def _configuration_calls(namespace, option_name, value):
+    return [
+        make_call('elasticbeanstalk', 'describe_configuration_settings', {
+            'ConfigurationSettings': [_environment(OptionSettings=[{
+                'Namespace': namespace,
+                'OptionName': option_name,
+                'Value': value,
+            }])]}),
+    ]
+
+
+def _platform_calls():
+    return [
+        make_call('elasticbeanstalk', 'describe_platform_version', {
+            'PlatformDescription': {
+                'PlatformArn': PLATFORM_ARN,
+                'PlatformStatus': 'Ready',
+                'PlatformName': 'Python 3.4 running on 64bit Amazon Linux',
+                'PlatformVersion': '2.5.0',
+            }}),
+        make_call('elasticbeanstalk', 'list_platform_versions', {
+            'PlatformSummaryList': [{
+                'PlatformArn': PLATFORM_ARN,
+                'PlatformStatus': 'Ready',
+            }]}),
+    ]
+
+
+def status():
+    instances = _instance_ids()
+    return _environment_calls() + _platform_calls() + [
+        make_call('elasticbeanstalk', 'describe_environment_resources', {
+            'EnvironmentResources': {
+                'EnvironmentName': ENV_NAME,
+                'Instances': [{'Id': i} for i in instances],
+                'LoadBalancers': [{'Name': 'awseb-bench-lb'}],
+                'Resources': [],
+                'AutoScalingGroups': [],
+                'LaunchConfigurations': [],
+                'Triggers': [],
+                'Queues': [],
+            }}),
+        make_call('elb', 'describe_load_balancers', {
+            'LoadBalancerDescriptions': [{'LoadBalancerName': 'awseb-bench-lb'}]}),
+        make_call('elb', 'describe_instance_health', {
+            'InstanceStates': [{'InstanceId': i, 'State': 'InService',
+                                'Description': 'N/A'} for i in instances]}),
+    ]
+
+
+def health():
+    instances = _instance_ids()
+    calls = _configuration_calls(
+        'aws:elasticbeanstalk:healthreporting:system', 'SystemType', 'enhanced')
+    for poll in range(EVENT_POLLS):
+        refreshed = _now() - timedelta(seconds=10)
+        calls.append(make_call('elasticbeanstalk', 'describe_environment_health', {
+            'EnvironmentName': ENV_NAME,
+            'HealthStatus': 'Ok',
+            'Status': 'Ready',
+            'Color': 'Green',
+            'Causes': [],
+            'RefreshedAt': refreshed,
+            'ApplicationMetrics': {
+                'Duration': 10, 'RequestCount': 100 + poll,
+                'StatusCodes': {'Status2xx': 100, 'Status3xx': 0,
+                                'Status4xx': 0, 'Status5xx': 0},
+                'Latency': {'P999': 0.1, 'P99': 0.05, 'P95': 0.02,
+                            'P90': 0.01, 'P85': 0.01, 'P75': 0.005,
+                            'P50': 0.002, 'P10': 0.001},
+            },
+            'InstancesHealth': {'Ok': INSTANCE_COUNT, 'Warning': 0,
+                                'Degraded': 0, 'Severe': 0, 'Info': 0,
+                                'Pending': 0, 'Unknown': 0, 'NoData': 0},
+        }))
+        calls.append(make_call('elasticbeanstalk', 'describe_instances_health', {
+            'RefreshedAt': refreshed,
+            'InstanceHealthList': [{
+                'InstanceId': i,
+                'HealthStatus': 'Ok',
+                'Color': 'Green',
+                'Causes': [],
+                'LaunchedAt': _now() - timedelta(days=1),
+                'AvailabilityZone': 'us-west-2a',
+                'InstanceType': 't2.micro',
+                'Deployment': {'VersionLabel': 'app-v1', 'DeploymentId': 1,
+                               'Status': 'Deployed',
+                               'DeploymentTime': _now() - timedelta(days=1)},
+                'System': {'CPUUtilization': {'User': 1.0, 'Nice': 0.0,
+                                              'System': 0.5, 'Idle': 98.0,
+                                              'IOWait': 0.5, 'IRQ': 0.0,
+                                              'SoftIRQ': 0.0},
+                           'LoadAverage': [0.1, 0.1, 0.1]},
+                'ApplicationMetrics': {'Duration': 10, 'RequestCount': 5},
+            } for i in instances]}))
+    return calls
+
+
+def events():
+    # events --follow polls every few seconds, so fewer polls are replayed
+    calls = []
+    for poll in range(EVENT_FOLLOW_POLLS):
+        calls.append(make_call('elasticbeanstalk', 'describe_events', {
+            'Events': [{
+                'EventDate': _now() - timedelta(seconds=poll),
+                'Message': 'Event {0} of the benchmark'.format(poll),
+                'ApplicationName': APP_NAME,
+                'EnvironmentName': ENV_NAME,
+                'Severity': 'INFO',
+            }]}))
+    return calls
+
+
+def logs():
+    calls = _configuration_calls(
+        'aws:elasticbeanstalk:cloudwatch:logs', 'StreamLogs', 'true') + [
+        make_call('logs', 'describe_log_streams', {
+            'logStreams': [{'logStreamName': 'i-{0:017x}'.format(0)}]}),
+    ]
+    for page in range(LOG_PAGES):
+        calls.append(make_call('logs', 'get_log_events', {
+            'events': [{'timestamp': 1500000000000 + i,
+                        'message': 'log line {0} of page {1}'.format(i, page)}
+                       for i in range(1000)],
+            'nextForwardToken': 'token-{0}'.format(page + 1),
+        }))
+    return calls
+
+
+def deploy():
+    calls = _environment_calls() + [
+        make_call('elasticbeanstalk', 'describe_application_versions',
+                  {'ApplicationVersions': []}),
+        make_call('elasticbeanstalk', 'create_storage_location',
+                  {'S3Bucket': BUCKET}),
+        make_call('s3', 'list_objects', {'Contents': []}),
+        make_call('s3', 'put_object', {'ETag': '"bench"'}),
+        make_call('elasticbeanstalk', 'create_application_version', {
+            'ApplicationVersion': {'ApplicationName': APP_NAME,
+                                   'VersionLabel': 'app-bench'}}),
+        make_call('elasticbeanstalk', 'update_environment',
+                  _environment(Status='Updating')),
+    ]
+    messages = ['Environment update is starting.',
+                'Deploying new version to instance(s).',
+                'New application version was deployed to running EC2 instances.',
+                'Environment update completed successfully.']
+    for i, message in enumerate(messages):
+        calls.append(make_call('elasticbeanstalk', 'describe_events', {
+            'Events': [{
+                'EventDate': _now() + timedelta(seconds=i),
+                'Message': message,
+                'ApplicationName': APP_NAME,
+                'EnvironmentName': ENV_NAME,
+                'RequestId': 'replayed',
+                'Severity': 'INFO',
+            }]}))
+    return calls
+
+
+def cleanup():
+    old = _now() - timedelta(days=120)
+    return _environment_calls() + [
+        make_call('elasticbeanstalk', 'describe_application_versions', {
+            'ApplicationVersions': [{
+                'ApplicationName': APP_NAME,
+                'VersionLabel': 'app-{0}'.format(i),
+                'DateCreated': old - timedelta(hours=i),
+                'DateUpdated': old - timedelta(hours=i),
+                'SourceBundle': {'S3Bucket': BUCKET,
+                                 'S3Key': '{0}/app-{1}.zip'.format(APP_NAME, i)},
+            } for i in range(VERSION_COUNT)]}),
+        make_call('elasticbeanstalk', 'delete_application_version', {}),
+        make_call('s3', 'delete_objects', {}),
+    ]
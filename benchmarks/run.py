@@ -0,0 +1,247 @@
+# Copyright 2017 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"). You
+# may not use this file except in compliance with the License. A copy of
+# the License is located at
+#
+# http://aws.amazon.com/apache2.0/
+#
+# or in the "license" file accompanying this file. This file is
+# distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF
+# ANY KIND, either express or implied. See the License for the specific
+# language governing permissions and limitations under the License.
+
+"""
+Offline benchmarks of eb commands.
+
+Every run of a scenario is a separate process that runs a real eb command
+inside a throwaway project and home folder, with all API calls answered by
+the replay backend of ebcli.lib.apirecording. No credentials or network
+access are needed.
+
+    python -m benchmarks.run [--latency SECONDS] [--throttle-rate RATE]
+                             [--repeat N] [--fixtures FILE] [scenario ...]
+
+Commands that follow or refresh forever are timed until every fixture call
+has been served once, which measures how fast they go through the polls.
+
+--fixtures replaces the synthetic fixtures with a recording made with
+`eb --record-api FILE`, and needs exactly one scenario.
+"""
+
+from __future__ import print_function
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from . import fixtures
+
+PROJECT_FILE_COUNT = 2000
+TIMEOUT = 300
+
+CONFIG = '''branch-defaults:
+  default:
+    environment: {env}
+global:
+  application_name: {app}
+  default_region: {region}
+  default_platform: Python 3.4
+  profile: null
+  sc: null
+  workspace_type: Application
+'''
+
+# name: (eb arguments, fixture builder, runs until stopped)
+SCENARIOS = [
+    ('status', ['status', '--verbose'], fixtures.status, False),
+    ('health', ['health', '--refresh'], fixtures.health, True),
+    ('events', ['events', '--follow'], fixtures.events, True),
+    ('logs', ['logs', '--stream', '--log-group', 'bench-group'],
+     fixtures.logs, True),
+    ('deploy', ['deploy', '--label', 'app-bench'], fixtures.deploy, False),
+    ('cleanup', ['labs', 'cleanup-versions', '--force', '--num-to-leave', '10'],
+     fixtures.cleanup, False),
+]
+
+
+def main():
+    args = _parse_args()
+    if args.child:
+        _run_child(args)
+        return
+
+    names = args.scenarios or [s[0] for s in SCENARIOS]
+    unknown = [n for n in names if n not in _get_scenarios()]
+    if unknown:
+        sys.exit('Unknown scenarios: ' + ', '.join(unknown))
+
+    results = [(name, _run_scenario(name, args)) for name in names]
+    _print_results(results)
+
+
+def _get_scenarios():
+    return dict((s[0], s[1:]) for s in SCENARIOS)
+
+
+def _parse_args():
+    parser = argparse.ArgumentParser(description='Offline eb benchmarks')
+    parser.add_argument('scenarios', nargs='*',
+                        help='scenarios to run, all by default: ' +
+                        ', '.join(s[0] for s in SCENARIOS))
+    parser.add_argument('--latency', type=float, default=0.05,
+                        help='simulated seconds per API call, DEFAULT=0.05')
+    parser.add_argument('--throttle-rate', type=float, default=0.0,
+                        help='fraction of calls that are throttled, DEFAULT=0')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='runs of every scenario, DEFAULT=3')
+    parser.add_argument('--fixtures', metavar='FILE',
+                        help='recorded fixtures to use instead of the synthetic ones')
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    parser.add_argument('--result', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.fixtures and not args.child and len(args.scenarios) != 1:
+        parser.error('--fixtures needs exactly one scenario')
+    return args
+
+
+def _run_scenario(name, args):
+    results = []
+    for _ in range(args.repeat):
+        root = tempfile.mkdtemp(prefix='eb-bench-')
+        try:
+            project = _create_project(root)
+            result_file = os.path.join(root, 'result.json')
+            command = [sys.executable, '-m', 'benchmarks.run',
+                       '--child', name, '--result', result_file,
+                       '--latency', str(args.latency),
+                       '--throttle-rate', str(args.throttle_rate)]
+            if args.fixtures:
+                command += ['--fixtures', os.path.abspath(args.fixtures)]
+
+            env = dict(os.environ, HOME=root)
+            env['PYTHONPATH'] = os.pathsep.join(
+                [_get_repository_root()] +
+                [p for p in [os.environ.get('PYTHONPATH')] if p])
+            with open(os.devnull, 'w') as devnull:
+                child = subprocess.Popen(command, cwd=project, env=env,
+                                         stdout=devnull,
+                                         stderr=subprocess.PIPE)
+                _, stderr = child.communicate()
+            try:
+                with open(result_file) as f:
+                    result = json.load(f)
+            except (IOError, ValueError):
+                result = None
+
+            if child.returncode != 0 or not result or not result['calls']:
+                sys.stderr.write(stderr.decode('utf-8', 'replace'))
+                if child.returncode != 0:
+                    reason = 'exited with code {0}'.format(child.returncode)
+                elif not result:
+                    reason = 'did not finish'
+                else:
+                    reason = 'made no API calls'
+                sys.exit('Scenario {0} {1}, run it with eb --replay-api '
+                         'to see why'.format(name, reason))
+            results.append(result)
+        finally:
+            shutil.rmtree(root, ignore_errors=True)
+    return results
+
+
+def _get_repository_root():
+    return os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _create_project(root):
+    project = os.path.join(root, 'project')
+    eb_folder = os.path.join(project, '.elasticbeanstalk')
+    os.makedirs(eb_folder)
+    with open(os.path.join(eb_folder, 'config.yml'), 'w') as f:
+        f.write(CONFIG.format(env=fixtures.ENV_NAME, app=fixtures.APP_NAME,
+                              region=fixtures.REGION))
+    for i in range(PROJECT_FILE_COUNT):
+        folder = os.path.join(project, 'src', 'package{0}'.format(i // 100))
+        if not os.path.isdir(folder):
+            os.makedirs(folder)
+        with open(os.path.join(folder, 'module{0}.py'.format(i)), 'w') as f:
+            f.write('VALUE = {0}\n'.format(i) * 50)
+    return project
+
+
+def _run_child(args):
+    from ebcli.core import ebcore, ebrun
+    from ebcli.lib import apirecording
+
+    argv, build_fixtures, runs_forever = _get_scenarios()[args.child]
+    if args.fixtures:
+        replayer = apirecording.ApiReplayer.load(
+            args.fixtures, latency=args.latency,
+            throttle_rate=args.throttle_rate)
+    else:
+        replayer = apirecording.ApiReplayer(
+            build_fixtures(), latency=args.latency,
+            throttle_rate=args.throttle_rate, seed=0)
+    apirecording.set_backend(replayer)
+
+    start = time.time()
+
+    def report(code=0):
+        with open(args.result, 'w') as f:
+            json.dump({'time': time.time() - start,
+                       'calls': replayer.call_count,
+                       'throttled': replayer.throttle_count}, f)
+        sys.stderr.flush()
+        os._exit(code)
+
+    if runs_forever:
+        def watch():
+            while not replayer.is_drained() and time.time() - start < TIMEOUT:
+                time.sleep(0.01)
+            if not replayer.is_drained():
+                sys.stderr.write('Timed out after {0} seconds with fixtures '
+                                 'left to replay\n'.format(TIMEOUT))
+                report(1)
+            report()
+        watcher = threading.Thread(target=watch)
+        watcher.daemon = True
+        watcher.start()
+
+    code = 0
+    try:
+        ebrun.run_app(ebcore.EB(argv=argv))
+    except SystemExit as e:
+        code = e.code
+    if not isinstance(code, int):
+        # sys.exit with a message
+        if code is not None:
+            sys.stderr.write('{0}\n'.format(code))
+        code = 0 if code is None else 1
+    report(code)
+
+
+def _print_results(results):
+    header = ('scenario', 'best (s)', 'median (s)', 'api calls', 'throttled')
+    rows = []
+    for name, runs in results:
+        times = sorted(r['time'] for r in runs)
+        rows.append((name, '{0:.3f}'.format(times[0]),
+                     '{0:.3f}'.format(times[len(times) // 2]),
+                     str(runs[-1]['calls']), str(runs[-1]['throttled'])))
+
+    widths = [max(len(r[i]) for r in rows + [header])
+              for i in range(len(header))]
+    for row in [header] + rows:
+        print('  '.join(value.ljust(width)
+                        for value, width in zip(row, widths)))
+
+
+if __name__ == '__main__':
+    main()
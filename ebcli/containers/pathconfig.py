@@ -45,8 +45,8 @@ class PathConfig(object):
 
     @classmethod
     def dockerfile_exists(cls):
-        return fileoperations.project_file_exists(cls.DOCKERFILE_FILENAME)
+        return fileoperations.get_project_inventory().exists(cls.DOCKERFILE_FILENAME)
 
     @classmethod
     def dockerrun_exists(cls):
-        return fileoperations.project_file_exists(cls.DOCKERRUN_FILENAME)
+        return fileoperations.get_project_inventory().exists(cls.DOCKERRUN_FILENAME)
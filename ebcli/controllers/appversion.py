@@ -15,7 +15,7 @@ from cement.utils.misc import minimal_logger
 
 from ebcli.core import io
 from ebcli.core.abstractcontroller import AbstractBaseController
-from ebcli.lib import elasticbeanstalk as elasticbeanstalk
+from ebcli.lib import elasticbeanstalk as elasticbeanstalk, versioncatalog
 from ebcli.operations import appversionops, commonops
 from ebcli.resources.strings import strings, flag_text
 
@@ -50,5 +50,5 @@ class AppVersionController(AbstractBaseController):
         - delete a certain version
         Run when the user supplies no argument to the --delete flag.
         """
-        app_versions = elasticbeanstalk.get_application_versions(self.app_name)['ApplicationVersions']
+        app_versions = versioncatalog.get_catalog(self.app_name).get_versions()
         appversionops.display_versions(self.app_name, self.env_name, app_versions)
@@ -14,7 +14,7 @@
 import time
 
 from ..core.abstractcontroller import AbstractBaseController
-from ..resources.strings import strings
+from ..resources.strings import strings, flag_text
 from ..core import io
 from ..operations import healthops
 
@@ -27,16 +27,38 @@ class HealthController(AbstractBaseController):
         arguments = AbstractBaseController.Meta.arguments + [
             (['--refresh'], dict(action='store_true', help='refresh')),
             (['--mono'], dict(action='store_true', help='no color')),
-            (['--view'], dict(default='split', choices=['split', 'status', 'request', 'cpu']))
+            (['--view'], dict(default='split', choices=['split', 'status', 'request', 'cpu'])),
+            (['--all'], dict(action='store_true', help=flag_text['health.all'])),
+            (['--envs'], dict(help=flag_text['health.envs'])),
+            (['--record'], dict(metavar='FILE', help=flag_text['health.record'])),
+            (['--replay'], dict(metavar='FILE', help=flag_text['health.replay'])),
+            (['--speed'], dict(type=float, default=1.0, help=flag_text['health.speed'])),
         ]
 
     def do_command(self):
-        app_name = self.get_app_name()
-        env_name = self.get_env_name()
         verbose = self.app.pargs.verbose
         refresh = self.app.pargs.refresh
         mono = self.app.pargs.mono
         view = self.app.pargs.view
 
+        if self.app.pargs.replay:
+            # Replay needs neither an initialized directory nor credentials
+            healthops.replay_health(self.app.pargs.replay, mono, view,
+                                    speed=self.app.pargs.speed)
+            return
+
+        app_name = self.get_app_name()
+
+        if self.app.pargs.all or self.app.pargs.envs:
+            env_names = None
+            if self.app.pargs.envs:
+                env_names = [e.strip() for e in self.app.pargs.envs.split(',')
+                             if e.strip()]
+            healthops.display_interactive_fleet_health(app_name, env_names,
+                                                       refresh, mono)
+            return
+
+        env_name = self.get_env_name()
         healthops.display_interactive_health(app_name, env_name, refresh,
-                                             mono, view)
+                                             mono, view,
+                                             record_file=self.app.pargs.record)
@@ -13,7 +13,7 @@
 
 from ..core.abstractcontroller import AbstractBaseController
 from ..resources.strings import strings, flag_text
-from ..operations import listops
+from ..operations import listops, fanoutops
 
 
 class ListController(AbstractBaseController):
@@ -23,7 +23,9 @@ class ListController(AbstractBaseController):
         usage = AbstractBaseController.Meta.usage.replace('{cmd}', label)
         arguments = [
             (['-a', '--all'], dict(action='store_true',
-                                   help=flag_text['list.all']))
+                                   help=flag_text['list.all'])),
+            (['--regions'], dict(help=flag_text['fanout.regions'])),
+            (['--profiles'], dict(help=flag_text['fanout.profiles'])),
         ]
 
     def do_command(self):
@@ -35,6 +37,14 @@ class ListController(AbstractBaseController):
         else:
             app_name = None
         verbose = self.app.pargs.verbose
+        regions = self.app.pargs.regions
+        profiles = self.app.pargs.profiles
+
+        if fanoutops.is_fanout(profiles, regions):
+            targets = fanoutops.get_targets(profiles, regions)
+            fanoutops.run_for_each_target(targets, listops.list_env_names,
+                                          app_name, verbose, all_apps)
+            return
 
         listops.list_env_names(app_name, verbose, all_apps)
 
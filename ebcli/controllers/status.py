@@ -13,8 +13,8 @@
 
 
 from ..core.abstractcontroller import AbstractBaseController
-from ..resources.strings import strings
-from ..operations import statusops, commonops
+from ..resources.strings import strings, flag_text
+from ..operations import statusops, commonops, fanoutops
 
 
 class StatusController(AbstractBaseController):
@@ -22,11 +22,23 @@ class StatusController(AbstractBaseController):
         label = 'status'
         description = strings['status.info']
         usage = AbstractBaseController.Meta.usage.replace('{cmd}', label)
+        arguments = AbstractBaseController.Meta.arguments + [
+            (['--regions'], dict(help=flag_text['fanout.regions'])),
+            (['--profiles'], dict(help=flag_text['fanout.profiles'])),
+        ]
 
     def do_command(self):
         app_name = self.get_app_name()
         env_name = self.get_env_name()
 
         verbose = self.app.pargs.verbose
+        regions = self.app.pargs.regions
+        profiles = self.app.pargs.profiles
+
+        if fanoutops.is_fanout(profiles, regions):
+            targets = fanoutops.get_targets(profiles, regions)
+            fanoutops.run_for_each_target(targets, statusops.status,
+                                          app_name, env_name, verbose)
+            return
 
         statusops.status(app_name, env_name, verbose)
\ No newline at end of file
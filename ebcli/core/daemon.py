@@ -0,0 +1,397 @@
+# Copyright 2017 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"). You
+# may not use this file except in compliance with the License. A copy of
+# the License is located at
+#
+# http://aws.amazon.com/apache2.0/
+#
+# or in the "license" file accompanying this file. This file is
+# distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF
+# ANY KIND, either express or implied. See the License for the specific
+# language governing permissions and limitations under the License.
+
+"""
+Opt-in background process that runs eb commands from a warm interpreter.
+
+With EB_DAEMON=1 in the environment, `eb` connects to a daemon listening on
+~/.elasticbeanstalk/daemon.sock, starting it first if needed, and hands it
+the command line, working directory, environment and its own stdin, stdout
+and stderr file descriptors. The daemon has already imported the CLI and
+read the botocore service models. It forks a child per command that runs
+with the client's terminal, and then reports the exit code back through
+the socket. Ctrl+C and other signals sent to the client are forwarded to
+that child. The daemon exits after EB_DAEMON_IDLE_TIMEOUT seconds (15
+minutes by default) without a command.
+
+Only the non-interactive commands in DAEMON_COMMANDS are sent to the
+daemon. Everything else, and every platform without Unix sockets and
+descriptor passing, runs in-process as before.
+
+This module is the `eb` entry point, so it imports nothing heavy until
+it knows the command will run in-process.
+"""
+
+import array
+import errno
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+
+from ebcli import __version__
+
+DAEMON_ENV_VAR = 'EB_DAEMON'
+IDLE_TIMEOUT_ENV_VAR = 'EB_DAEMON_IDLE_TIMEOUT'
+DEFAULT_IDLE_TIMEOUT = 15 * 60
+START_TIMEOUT = 10
+SOCKET_FILE_NAME = 'daemon.sock'
+LOCK_FILE_NAME = 'daemon.lock'
+DAEMON_COMMANDS = ['events', 'health', 'list', 'logs', 'printenv', 'status']
+PRELOADED_SERVICES = ['elasticbeanstalk', 's3', 'ec2', 'elb', 'elbv2',
+                      'cloudformation', 'logs']
+FORWARDED_SIGNALS = ['SIGINT', 'SIGTERM', 'SIGHUP', 'SIGQUIT', 'SIGWINCH']
+# Global options that take a value, to find the command in argv
+VALUE_OPTIONS = ['--profile', '-r', '--region', '--endpoint-url', '--trace',
+                 '--trace-format', '--record-api', '--replay-api',
+                 '--profile-output']
+
+
+def main():
+    if _should_use_daemon(sys.argv[1:]):
+        code = run_in_daemon(sys.argv[1:])
+        if code is not None:
+            sys.exit(code)
+
+    from . import ebcore
+    ebcore.main()
+
+
+def is_supported():
+    return hasattr(socket, 'AF_UNIX') and \
+        hasattr(socket.socket, 'sendmsg') and \
+        hasattr(os, 'fork')
+
+
+def get_socket_path():
+    return os.path.join(_get_folder(), SOCKET_FILE_NAME)
+
+
+def run_in_daemon(argv):
+    """
+    Runs an eb command in the daemon.
+    :return: exit code of the command, or None if the daemon could not run it
+        and the command should run in-process instead
+    """
+    sock = _connect()
+    if sock is None:
+        _start_daemon()
+        sock = _connect(timeout=START_TIMEOUT)
+        if sock is None:
+            return None
+
+    try:
+        _send_request(sock, {
+            'version': __version__,
+            'executable': sys.executable,
+            'argv': argv,
+            'cwd': os.getcwd(),
+            'env': dict(os.environ),
+        }, fds=[0, 1, 2])
+        reader = sock.makefile('rb')
+        reply = _read_message(reader)
+        if reply is None or 'pid' not in reply:
+            return None
+
+        _forward_signals(reply['pid'])
+        reply = _read_message(reader)
+        # No reply means the command died without reporting back
+        return 1 if reply is None else reply['exit']
+    finally:
+        sock.close()
+
+
+def stop_daemon():
+    sock = _connect()
+    if sock is None:
+        return False
+    try:
+        _send_request(sock, {'command': 'stop'})
+        _read_message(sock.makefile('rb'))
+    finally:
+        sock.close()
+    return True
+
+
+def serve(idle_timeout=DEFAULT_IDLE_TIMEOUT):
+    lock_file = _acquire_daemon_lock()
+    if lock_file is None:
+        # Another daemon is already running or starting
+        return
+
+    _warm_up()
+
+    path = get_socket_path()
+    if os.path.exists(path):
+        os.remove(path)
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(path)
+    os.chmod(path, 0o600)
+    listener.listen(16)
+    listener.settimeout(1)
+
+    children = set()
+    last_activity = time.time()
+    try:
+        while True:
+            _reap_children(children)
+            if children:
+                last_activity = time.time()
+            elif time.time() - last_activity > idle_timeout:
+                return
+
+            try:
+                conn, _ = listener.accept()
+            except socket.timeout:
+                continue
+            last_activity = time.time()
+
+            request, fds = _receive_request(conn)
+            if request is None:
+                conn.close()
+            elif request.get('command') == 'stop':
+                _write_message(conn, {'stopped': True})
+                conn.close()
+                return
+            elif request.get('version') != __version__ or \
+                    request.get('executable') != sys.executable:
+                # The CLI was upgraded, let the next command start a new daemon
+                _write_message(conn, {'error': 'version mismatch'})
+                conn.close()
+                return
+            else:
+                children.add(_fork_command(conn, fds, request,
+                                           [listener, lock_file]))
+    finally:
+        listener.close()
+        if os.path.exists(path):
+            os.remove(path)
+        lock_file.close()
+
+
+def _should_use_daemon(argv):
+    if os.environ.get(DAEMON_ENV_VAR, '').lower() not in ('1', 'true', 'yes'):
+        return False
+    if not is_supported():
+        return False
+    return _get_command(argv) in DAEMON_COMMANDS
+
+
+def _get_command(argv):
+    skip = False
+    for arg in argv:
+        if skip:
+            skip = False
+        elif arg in VALUE_OPTIONS:
+            skip = True
+        elif not arg.startswith('-'):
+            return arg
+    return None
+
+
+def _get_folder():
+    folder = os.path.join(os.path.expanduser('~'), '.elasticbeanstalk')
+    if not os.path.isdir(folder):
+        os.makedirs(folder)
+    return folder
+
+
+def _connect(timeout=0):
+    deadline = time.time() + timeout
+    while True:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.connect(get_socket_path())
+            return sock
+        except socket.error:
+            sock.close()
+            if time.time() >= deadline:
+                return None
+            time.sleep(0.05)
+
+
+def _start_daemon():
+    with open(os.devnull, 'r+') as devnull:
+        subprocess.Popen([sys.executable, '-m', 'ebcli.core.daemon', 'serve'],
+                         stdin=devnull, stdout=devnull, stderr=devnull,
+                         close_fds=True, cwd=_get_folder(),
+                         preexec_fn=os.setsid)
+
+
+def _forward_signals(pid):
+    def forward(signum, frame):
+        try:
+            os.kill(pid, signum)
+        except OSError:
+            pass
+
+    for name in FORWARDED_SIGNALS:
+        if hasattr(signal, name):
+            signal.signal(getattr(signal, name), forward)
+
+
+def _send_request(sock, request, fds=None):
+    # The descriptors travel with a single marker byte, the request follows
+    ancillary = []
+    if fds:
+        ancillary.append((socket.SOL_SOCKET, socket.SCM_RIGHTS,
+                          array.array('i', fds)))
+    sock.sendmsg([b'\0'], ancillary)
+    _write_message(sock, request)
+
+
+def _receive_request(conn):
+    int_size = array.array('i').itemsize
+    try:
+        marker, ancillary, _, _ = conn.recvmsg(1, socket.CMSG_LEN(3 * int_size))
+    except socket.error:
+        return None, []
+
+    fds = array.array('i')
+    for level, kind, data in ancillary:
+        if level == socket.SOL_SOCKET and kind == socket.SCM_RIGHTS:
+            fds.frombytes(data[:len(data) - (len(data) % int_size)])
+
+    if not marker:
+        return None, list(fds)
+    return _read_message(conn.makefile('rb')), list(fds)
+
+
+def _write_message(sock, message):
+    sock.sendall(json.dumps(message).encode('utf-8') + b'\n')
+
+
+def _read_message(reader):
+    try:
+        line = reader.readline()
+    except socket.error:
+        return None
+    if not line:
+        return None
+    return json.loads(line.decode('utf-8'))
+
+
+def _acquire_daemon_lock():
+    import fcntl
+    lock_file = open(os.path.join(_get_folder(), LOCK_FILE_NAME), 'w')
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except IOError as e:
+        lock_file.close()
+        if e.errno in (errno.EAGAIN, errno.EACCES):
+            return None
+        raise
+    return lock_file
+
+
+def _warm_up():
+    # What every command would otherwise pay for at startup
+    from . import ebcore
+    from ..lib import aws
+    aws.preload_service_models(PRELOADED_SERVICES)
+
+
+def _reap_children(children):
+    for pid in list(children):
+        try:
+            finished, _ = os.waitpid(pid, os.WNOHANG)
+        except OSError:
+            finished = pid
+        if finished:
+            children.discard(pid)
+
+
+def _fork_command(conn, fds, request, daemon_files):
+    pid = os.fork()
+    if pid:
+        conn.close()
+        for fd in fds:
+            os.close(fd)
+        return pid
+
+    for f in daemon_files:
+        f.close()
+    code = 1
+    try:
+        _write_message(conn, {'pid': os.getpid()})
+        code = _run_command(fds, request)
+    finally:
+        try:
+            _write_message(conn, {'exit': code})
+        finally:
+            os._exit(code)
+
+
+def _run_command(fds, request):
+    for target, fd in enumerate(fds[:3]):
+        os.dup2(fd, target)
+        os.close(fd)
+    sys.stdin = os.fdopen(0, 'r')
+    sys.stdout = os.fdopen(1, 'w', 1)
+    sys.stderr = os.fdopen(2, 'w', 1)
+
+    signal.signal(signal.SIGINT, signal.default_int_handler)
+    for name in FORWARDED_SIGNALS[1:]:
+        if hasattr(signal, name):
+            signal.signal(getattr(signal, name), signal.SIG_DFL)
+
+    os.environ.clear()
+    os.environ.update(request['env'])
+    os.chdir(request['cwd'])
+    sys.argv = ['eb'] + request['argv']
+    if '--debug' in sys.argv:
+        _enable_debug_logging()
+
+    from . import ebcore
+    try:
+        ebcore.main()
+        code = 0
+    except SystemExit as e:
+        code = e.code
+    except BaseException:
+        import traceback
+        traceback.print_exc()
+        code = 1
+    finally:
+        sys.stdout.flush()
+        sys.stderr.flush()
+
+    if code is None:
+        return 0
+    if not isinstance(code, int):
+        sys.stderr.write(str(code) + '\n')
+        return 1
+    return code
+
+
+def _enable_debug_logging():
+    # Module loggers decided their level when the daemon imported them
+    import logging
+    for name, logger in logging.Logger.manager.loggerDict.items():
+        if name.startswith('ebcli') and isinstance(logger, logging.Logger):
+            logger.setLevel(logging.DEBUG)
+            for handler in logger.handlers:
+                handler.setLevel(logging.DEBUG)
+
+
+if __name__ == '__main__':
+    if sys.argv[1:] == ['serve']:
+        serve(int(os.environ.get(IDLE_TIMEOUT_ENV_VAR, DEFAULT_IDLE_TIMEOUT)))
+    elif sys.argv[1:] == ['stop']:
+        stop_daemon()
+    else:
+        sys.stderr.write('usage: python -m ebcli.core.daemon [serve|stop]\n')
+        sys.exit(2)
@@ -79,6 +79,7 @@ class EB(foundation.CementApp):
 
         # Add hooks
         hook.register('post_argument_parsing', hooks.pre_run_hook)
+        hook.register('pre_close', hooks.post_run_hook)
 
         environment_controllers = [
             InitController,
@@ -151,6 +152,17 @@ class EB(foundation.CementApp):
                      action='store_true', help=flag_text['base.noverify'])
         self.add_arg('--debugboto',  # show debug info for botocore
                      action='store_true', help=SUPPRESS)
+        self.add_arg('--record-api', metavar='FILE',  # save API calls as fixtures
+                     help=SUPPRESS)
+        self.add_arg('--replay-api', metavar='FILE',  # answer API calls from fixtures
+                     help=SUPPRESS)
+        self.add_arg('--trace', metavar='FILE', help=flag_text['base.trace'])
+        self.add_arg('--trace-format', choices=['chrome', 'json'],
+                     default='chrome', help=flag_text['base.traceformat'])
+        self.add_arg('--profile-run', action='store_true',
+                     help=flag_text['base.profilerun'])
+        self.add_arg('--profile-output', metavar='FILE',
+                     help=flag_text['base.profileoutput'])
 
 
 def main():
@@ -7,6 +7,7 @@ from argparse import SUPPRESS, ArgumentTypeError
 
 from botocore.compat import six
 
+from ebcli.lib import aws
 from ebcli.lib.aws import TooManyPlatformsError
 
 iteritems = six.iteritems
@@ -46,8 +47,12 @@ def run_app(app):
 
     # Handle General Exceptions
     except CaughtSignal:
+        aws.cancel_api_work()
         io.echo()
         app.close(code=5)
+    except KeyboardInterrupt:
+        aws.cancel_api_work()
+        raise
     except NoEnvironmentForBranchError:
         pass
     except InvalidStateError:
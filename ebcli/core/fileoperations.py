@@ -17,12 +17,13 @@ import json
 import os
 import shutil
 import stat
+import struct
 import sys
 import zipfile
 import yaml
-import warnings
 
 from cement.utils.misc import minimal_logger
+from concurrent.futures import ThreadPoolExecutor
 from ebcli.objects.buildconfiguration import BuildConfiguration
 from six import StringIO
 from yaml import load, safe_dump
@@ -38,6 +39,8 @@ from ebcli.resources.strings import prompts, strings
 from ebcli.objects.exceptions import NotInitializedError, InvalidSyntaxError, \
     NotFoundError, ValidationError
 from ebcli.core.ebglobals import Constants
+from ebcli.core import inventory
+from ebcli.lib import profiling
 
 LOG = minimal_logger(__name__)
 
@@ -48,6 +51,13 @@ def get_aws_home():
     return os.path.expanduser(p)
 
 
+def get_user_eb_folder():
+    p = os.path.join(os.path.expanduser('~'), beanstalk_directory)
+    if not os.path.exists(p):
+        os.makedirs(p)
+    return p
+
+
 def get_ssh_folder():
     sep = os.path.sep
     p = '~' + sep + '.ssh' + sep
@@ -72,11 +82,20 @@ region_key = 'region'
 default_section = 'default'
 ebcli_section = 'profile eb-cli'
 app_version_folder = beanstalk_directory + 'app_versions'
+bundle_cache_folder = beanstalk_directory + 'bundle_cache'
 logs_folder = beanstalk_directory + 'logs' + os.path.sep
 env_yaml = 'env.yaml'
 
 _marker = object()
 
+# Size of the fixed part of a zip local file header, and of the chunks
+# copied when merging and extracting archives
+ZIP_LOCAL_HEADER_SIZE = 30
+ZIP_COPY_CHUNK_SIZE = 1024 * 1024
+ZIP_SYSTEM_UNIX = 3
+# Members of an archive extracted at once
+UNZIP_WORKERS = 4
+
 
 def _get_option(config, section, key, default):
     try:
@@ -367,6 +386,19 @@ def get_zip_location(file_name):
         os.chdir(cwd)
 
 
+def get_bundle_cache_location():
+    cwd = os.getcwd()
+    try:
+        _traverse_to_project_root()
+        if not os.path.isdir(bundle_cache_folder):
+            os.makedirs(bundle_cache_folder)
+
+        return os.path.abspath(bundle_cache_folder)
+
+    finally:
+        os.chdir(cwd)
+
+
 def get_logs_location(folder_name):
     cwd = os.getcwd()
     try:
@@ -416,70 +448,133 @@ def delete_app_versions():
 
 
 def zip_append_archive(target_file, source_file):
+    """
+    Appends every member of the zip at `source_file` to the zip at
+    `target_file`. The compressed data is copied as is, in chunks, so members
+    are never decompressed, compressed again or held in memory.
+    """
     zip_source = zipfile.ZipFile(source_file, 'r')
-    zip_target = zipfile.ZipFile(target_file, 'a')
-    with warnings.catch_warnings():
-        # Ignore UserWarning raised by zip module for zipping modules.
-        warnings.simplefilter('ignore', category=UserWarning)
-        for filename in zip_source.namelist():
-            zf = zip_source.read(filename)
-            zip_target.writestr(filename, zf)
-    zip_target.close()
-    zip_source.close()
-
-
-def zip_up_folder(directory, location, ignore_list=None):
+    try:
+        zip_target = zipfile.ZipFile(target_file, 'a')
+        try:
+            for info in zip_source.infolist():
+                _copy_zip_member(zip_source, zip_target, info)
+        finally:
+            zip_target.close()
+    finally:
+        zip_source.close()
+
+
+def _copy_zip_member(zip_source, zip_target, info):
+    # zipfile has no API for raw copies, so this reads the source's local
+    # header and writes the target's entry the way ZipFile.write does
+    source = zip_source.fp
+    source.seek(info.header_offset)
+    header = source.read(ZIP_LOCAL_HEADER_SIZE)
+    if len(header) != ZIP_LOCAL_HEADER_SIZE or header[:4] != b'PK\x03\x04':
+        raise zipfile.BadZipfile('Bad local file header for ' + info.filename)
+    name_length, extra_length = struct.unpack('<HH', header[26:30])
+    source.seek(info.header_offset + ZIP_LOCAL_HEADER_SIZE +
+                name_length + extra_length)
+
+    member = zipfile.ZipInfo(info.filename, info.date_time)
+    for attribute in ['compress_type', 'comment', 'create_system',
+                      'create_version', 'extract_version', 'flag_bits',
+                      'volume', 'internal_attr', 'external_attr', 'CRC',
+                      'compress_size', 'file_size']:
+        setattr(member, attribute, getattr(info, attribute))
+    # The sizes go in the local header, no data descriptor follows the data
+    member.flag_bits &= ~0x08
+
+    target = zip_target.fp
+    if hasattr(zip_target, 'start_dir'):
+        target.seek(zip_target.start_dir)
+    member.header_offset = target.tell()
+    target.write(member.FileHeader())
+
+    remaining = info.compress_size
+    while remaining > 0:
+        chunk = source.read(min(ZIP_COPY_CHUNK_SIZE, remaining))
+        if not chunk:
+            raise zipfile.BadZipfile('Truncated data for ' + info.filename)
+        target.write(chunk)
+        remaining -= len(chunk)
+
+    zip_target.filelist.append(member)
+    zip_target.NameToInfo[member.filename] = member
+    if hasattr(zip_target, 'start_dir'):
+        zip_target.start_dir = target.tell()
+    zip_target._didModify = True
+
+
+def zip_up_folder(directory, location, ignore_list=None, project_inventory=None):
     cwd = os.getcwd()
     try:
         os.chdir(directory)
         io.log_info('Zipping up folder at location: ' + str(os.getcwd()))
+        if project_inventory is None:
+            project_inventory = inventory.ProjectInventory(os.getcwd())
         zipf = zipfile.ZipFile(location, 'w', zipfile.ZIP_DEFLATED)
-        _zipdir('./', zipf, ignore_list=ignore_list)
+        _zipdir('./', zipf, ignore_list=ignore_list,
+                project_inventory=project_inventory)
         zipf.close()
         LOG.debug('File size: ' + str(os.path.getsize(location)))
     finally:
         os.chdir(cwd)
 
 
+@profiling.phase('zip')
 def zip_up_project(location, ignore_list=None):
     cwd = os.getcwd()
 
     try:
         _traverse_to_project_root()
 
-        zip_up_folder('./', location, ignore_list=ignore_list)
+        zip_up_folder('./', location, ignore_list=ignore_list,
+                      project_inventory=get_project_inventory())
 
     finally:
         os.chdir(cwd)
 
 
-def _zipdir(path, zipf, ignore_list=None):
-    if ignore_list is None:
-        ignore_list = ['.gitignore']
-    ignore_list = ['./' + i for i in ignore_list]
-    zipped_roots = []
-    for root, dirs, files in os.walk(path):
-        if '.elasticbeanstalk' in root:
-            io.log_info('  -skipping: {}'.format(root))
-            continue
+def _zipdir(path, zipf, ignore_list=None, project_inventory=None):
+    """
+    Adds the files under `path` to `zipf`, in a single walk of the tree.
+    :param ignore_list: an IgnoreSpec, or a list of paths relative to `path`
+    :param project_inventory: ProjectInventory of `path`, whose listings are
+        reused
+    """
+    ignore = _get_ignore_spec(ignore_list)
+    if project_inventory is None:
+        project_inventory = inventory.ProjectInventory(os.path.abspath(path))
+    zipped_roots = set()
+    for relative_root, dirs, files in project_inventory.walk():
+        # The same paths os.walk(path) would give, which end up in the zip
+        root = path if relative_root == '.' else \
+            os.path.join(path, *relative_root.split('/'))
+        links = set(e.name for e in project_inventory.listdir(relative_root)
+                    if e.is_link)
+        kept_dirs = []
         for d in dirs:
             cur_dir = os.path.join(root, d)
-            if os.path.islink(cur_dir):
-                zipInfo = zipfile.ZipInfo()
-                zipInfo.filename = os.path.join(root, d)
-
-                # 2716663808L is the "magic code" for symlinks
-
-                # Python 3 merged "int" and "long" into int, so we must check the version
-                # to determine what type to use
-                if sys.version_info > (3,):
-                    zipInfo.external_attr = 2716663808
+            relative_dir = _get_relative_path(relative_root, d)
+            if '.elasticbeanstalk' in cur_dir or ignore.is_ignored_dir(relative_dir):
+                # Nothing below an ignored directory can be included, don't walk it
+                io.log_info('  -skipping: {}/'.format(cur_dir))
+            elif d in links:
+                if ignore.is_ignored(relative_dir):
+                    io.log_info('  -skipping: {}'.format(cur_dir))
                 else:
-                    zipInfo.external_attr = long(2716663808)
-                zipf.writestr(zipInfo, os.readlink(cur_dir))
+                    _write_symlink(zipf, cur_dir)
+            else:
+                kept_dirs.append(d)
+        # The walk only descends into the directories left in place
+        dirs[:] = kept_dirs
+
         for f in files:
             cur_file = os.path.join(root, f)
-            if cur_file.endswith('~') or cur_file in ignore_list:
+            if cur_file.endswith('~') or \
+                    ignore.is_ignored(_get_relative_path(relative_root, f)):
                 # Ignore editor backup files (like file.txt~)
                 # Ignore anything in the .ebignore file
                 io.log_info('  -skipping: {}'.format(cur_file))
@@ -488,37 +583,140 @@ def _zipdir(path, zipf, ignore_list=None):
                     # Windows requires us to index the folders.
                     io.log_info(' +adding: {}/'.format(root))
                     zipf.write(root)
-                    zipped_roots.append(root)
+                    zipped_roots.add(root)
                 io.log_info('  +adding: {}'.format(cur_file))
-                if os.path.islink(cur_file):
-                    zipInfo = zipfile.ZipInfo()
-                    zipInfo.filename = os.path.join(root, f)
-                    
-                    # 2716663808L is the "magic code" for symlinks
-
-                    # Python 3 merged "int" and "long" into int, so we must check the
-                    # version to determine what type to use
-                    if sys.version_info > (3,):
-                        zipInfo.external_attr = 2716663808
-                    else:
-                        zipInfo.external_attr = long(2716663808)
-                    zipf.writestr(zipInfo, os.readlink(cur_file))
+                if f in links:
+                    _write_symlink(zipf, cur_file)
                 else:
                     zipf.write(cur_file)
 
 
-def unzip_folder(file_location, directory):
+def _write_symlink(zipf, link):
+    zipInfo = zipfile.ZipInfo()
+    zipInfo.filename = link
+
+    # 2716663808L is the "magic code" for symlinks
+
+    # Python 3 merged "int" and "long" into int, so we must check the version
+    # to determine what type to use
+    if sys.version_info > (3,):
+        zipInfo.external_attr = 2716663808
+    else:
+        zipInfo.external_attr = long(2716663808)
+    zipf.writestr(zipInfo, os.readlink(link))
+
+
+def _get_relative_path(relative_root, name):
+    return name if relative_root == '.' else relative_root + '/' + name
+
+
+def _get_ignore_spec(ignore_list):
+    if isinstance(ignore_list, IgnoreSpec):
+        return ignore_list
+    if ignore_list is None:
+        ignore_list = ['.gitignore']
+    return IgnoreSpec(paths=[p.replace(os.path.sep, '/') for p in ignore_list])
+
+
+def unzip_folder(file_location, directory, workers=UNZIP_WORKERS):
+    """
+    Extracts the zip at `file_location` into `directory`. Members are copied
+    in chunks rather than read whole, and up to `workers` of them are
+    extracted at once. Unix permissions and symbolic links stored in the
+    archive are restored. Symbolic links are created last, so no member is
+    ever written through one.
+    :raises ValidationError: if a member would be extracted outside of
+        `directory`
+    """
     if not os.path.isdir(directory):
         os.makedirs(directory)
+    root = os.path.realpath(directory)
 
     zip = zipfile.ZipFile(file_location, 'r')
-    for cur_file in zip.namelist():
-        if not cur_file.endswith('/'):
-            root, name = os.path.split(cur_file)
-            path = os.path.normpath(os.path.join(directory, root))
-            if not os.path.isdir(path):
-                os.makedirs(path)
-            open(os.path.join(path, name), 'wb').write(zip.read(cur_file))
+    try:
+        files = []
+        links = []
+        folders = set()
+        for info in zip.infolist():
+            target = _get_extraction_path(root, info.filename)
+            if info.filename.endswith('/'):
+                folders.add(target)
+                continue
+            folders.add(os.path.dirname(target))
+            if _is_zipped_symlink(info):
+                links.append((info, target))
+            else:
+                files.append((info, target))
+
+        for folder in sorted(folders):
+            if not os.path.isdir(folder):
+                os.makedirs(folder)
+
+        if workers > 1 and len(files) > 1:
+            executor = ThreadPoolExecutor(max_workers=min(workers, len(files)))
+            try:
+                for future in [executor.submit(_extract_zip_member, zip, info, target)
+                               for info, target in files]:
+                    future.result()
+            finally:
+                executor.shutdown(wait=True)
+        else:
+            for info, target in files:
+                _extract_zip_member(zip, info, target)
+
+        for info, target in links:
+            _extract_zip_symlink(zip, info, target)
+    finally:
+        zip.close()
+
+
+def _get_extraction_path(root, member_name):
+    name = member_name.replace('\\', '/')
+    drive, name = os.path.splitdrive(name)
+    target = os.path.realpath(os.path.join(root, *[p for p in name.split('/') if p]))
+    if drive or name.startswith('/') or \
+            (target != root and not target.startswith(os.path.join(root, ''))):
+        raise ValidationError('The archive member "{0}" would be extracted outside of {1}'
+                              .format(member_name, root))
+    return target
+
+
+def _get_zipped_mode(info):
+    # Unix modes are kept in the high bytes of external_attr
+    if info.create_system != ZIP_SYSTEM_UNIX:
+        return 0
+    return info.external_attr >> 16
+
+
+def _is_zipped_symlink(info):
+    return stat.S_ISLNK(_get_zipped_mode(info))
+
+
+def _extract_zip_member(zip, info, target):
+    source = zip.open(info)
+    try:
+        with open(target, 'wb') as destination:
+            shutil.copyfileobj(source, destination, ZIP_COPY_CHUNK_SIZE)
+    finally:
+        source.close()
+
+    permissions = stat.S_IMODE(_get_zipped_mode(info))
+    if permissions:
+        os.chmod(target, permissions)
+
+
+def _extract_zip_symlink(zip, info, target):
+    link = zip.read(info)
+    if not hasattr(os, 'symlink'):
+        # Keep the link as a file holding its target, as before
+        with open(target, 'wb') as f:
+            f.write(link)
+        return
+
+    from ebcli.lib.utils import decode_bytes
+    if os.path.lexists(target):
+        os.remove(target)
+    os.symlink(decode_bytes(link), target)
 
 
 def save_to_file(data, location, filename):
@@ -841,62 +1039,67 @@ def directory_empty(location):
     return not os.listdir(location)
 
 
-def get_ebignore_list():
+class IgnoreSpec(object):
+    """
+    Compiled ignore patterns, matched against paths relative to the project
+    root with '/' separators. A path is ignored when the last pattern that
+    matches it is not negated, as in gitignore files.
+
+    Without negated patterns nothing below an ignored directory can be
+    included again, so whole directories can be skipped.
+    """
+    def __init__(self, patterns=(), paths=()):
+        self.patterns = [(p.regex, p.include) for p in patterns
+                         if p.include is not None]
+        self.paths = set(paths)
+        self.prunes_directories = bool(self.patterns) and \
+            all(include for _, include in self.patterns)
+
+    def is_ignored(self, path):
+        if path in self.paths:
+            return True
+        ignored = False
+        for regex, include in self.patterns:
+            if regex.match(path):
+                ignored = include
+        return ignored
+
+    def is_ignored_dir(self, path):
+        return self.prunes_directories and self.is_ignored(path + '/')
+
+
+def get_ebignore():
+    """
+    Compiles the project's .ebignore file.
+    :return: an IgnoreSpec, or None if the project has no .ebignore
+    """
     EB_IGNORE_FILE_NAME = '.ebignore'
     location = get_project_file_full_location(EB_IGNORE_FILE_NAME)
 
     if not os.path.isfile(location):
         return None
 
-    '''
-    This library will parse the ignore file, compare it to the current files
-    and give us a list of files to ignore
-    '''
-    # Patch iter_tree to not throw recursion error on non recursive links
-    from pathspec import pathspec, util
-    def iter_tree(root):
-        """
-        Walks the specified root path for all files.
-        *root* (``str``) is the root directory to search for files.
-        Raises ``RecursionError`` if recursion is detected.
-        Returns an ``Iterable`` yielding each file path (``str``) relative to
-        *root*.
-        .. _`recursion`: http://docs.python.org/2/library/os.html#os.walk
-        """
-        # Keep track of files encountered. Map real path to relative path.
-        memo = {}
-
-        root = os.path.abspath(root)
-        for parent, _dirs, files in os.walk(root, followlinks=True):
-            # Get parent path relative to root path.
-            parent = os.path.relpath(parent, root)
-
-            # Check for recursion.
-            real = os.path.realpath(parent)
-            if real in memo:
-                abspath = os.path.abspath(parent)
-                if real != abspath and real in abspath:
-                    # if real is a parent of current parent
-                    raise util.RecursionError(real_path=real, first_path=memo[real], second_path=parent)
-                else:
-                    # not recursion, just a sideways link
-                    continue
-
-            memo[real] = parent
-
-            # Yield files.
-            for path in files:
-                if parent != '.':
-                    path = os.path.join(parent, path)
-                yield path
-    util.iter_tree = iter_tree
-
+    from pathspec import pathspec
     with open(location, 'r') as f:
         spec = pathspec.PathSpec.from_lines('gitignore', f)
 
-    ignore_list = [f for f in spec.match_tree(get_project_root())]
-    ignore_list.append(EB_IGNORE_FILE_NAME)
-    return ignore_list
+    return IgnoreSpec(spec.patterns, paths=[EB_IGNORE_FILE_NAME])
+
+
+def get_project_inventory():
+    """
+    The inventory of the project's files shared by this command, see
+    ebcli.core.inventory. Uses the saved listings of the previous command
+    when the 'inventory-cache' global setting is on.
+    """
+    root = get_project_root()
+    project_inventory = inventory.get_inventory(root)
+    if not project_inventory.configured:
+        project_inventory.configured = True
+        if get_config_setting('global', 'inventory-cache', default=False):
+            project_inventory.use_cache(
+                os.path.join(root, beanstalk_directory, inventory.CACHE_FILE_NAME))
+    return project_inventory
 
 
 def make_eb_dir(location):
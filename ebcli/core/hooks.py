@@ -17,15 +17,20 @@ from cement.ext.ext_logging import LoggingLogHandler
 from cement.utils.misc import minimal_logger
 
 from ebcli import __version__
-from ..core import fileoperations
-from ..lib import aws
+from ..core import fileoperations, inventory, io
+from ..lib import apirecording, aws, elasticbeanstalk, profiling, tracing
 from ..operations import commonops
 
 
 LOG = minimal_logger(__name__)
 
+# ebrun closes the app a second time when a command fails
+_post_run_done = False
+
 
 def pre_run_hook(app):
+    set_profile_run(app.pargs.profile_run, app.pargs.profile_output)
+
     if app.pargs.verbose:
         LoggingLogHandler.set_level(app.log, 'INFO')
 
@@ -37,7 +42,11 @@ def pre_run_hook(app):
 
     set_endpoint(app.pargs.endpoint_url)
     set_ssl(app.pargs.no_verify_ssl)
+    set_credential_cache()
+    set_rate_limits()
     set_debugboto(app.pargs.debugboto)
+    set_trace(app.pargs.trace, app.pargs.trace_format)
+    set_api_fixtures(app.pargs.record_api, app.pargs.replay_api)
 
 
 def set_profile(profile):
@@ -57,6 +66,21 @@ def set_ssl(noverify):
         aws.no_verify_ssl()
 
 
+def set_credential_cache():
+    enabled = fileoperations.get_config_setting(
+        'global', 'credential-cache', default=True)
+    aws.set_credential_cache(enabled)
+
+
+def set_rate_limits():
+    rate_limits = fileoperations.get_config_setting(
+        'global', 'rate-limits', default=None)
+    if rate_limits:
+        rate_limits = dict(rate_limits)
+        shared = rate_limits.pop('shared', False)
+        aws.set_rate_limits(rate_limits, shared)
+
+
 def set_region(region_name):
     if not region_name:
         region_name = commonops.get_default_region()
@@ -72,3 +96,49 @@ def set_endpoint(endpoint_url):
 def set_debugboto(debugboto):
     if debugboto:
         aws.set_debug()
+
+
+def set_trace(filename, trace_format):
+    if filename:
+        aws.set_trace(filename, trace_format)
+
+
+def set_profile_run(profile_run, profile_output):
+    if profile_run or profile_output:
+        profiling.start(profile_output)
+
+
+def set_api_fixtures(record_file, replay_file):
+    if replay_file:
+        aws.set_api_replay(replay_file)
+    elif record_file:
+        aws.set_api_recording(record_file)
+
+
+def post_run_hook(app):
+    global _post_run_done
+    if _post_run_done:
+        return
+    _post_run_done = True
+
+    stats = elasticbeanstalk.get_cache_stats()
+    LOG.debug('-- Describe cache: {0} hits, {1} misses'
+              .format(stats['hits'], stats['misses']))
+
+    recording_file = apirecording.write()
+    if recording_file:
+        io.log_info('API calls recorded to ' + recording_file)
+
+    trace_file = tracing.write()
+    if trace_file:
+        io.log_info('API call trace written to ' + trace_file)
+
+    inventory.save_caches()
+
+    profiler = profiling.finish()
+    if profiler:
+        io.echo()
+        for line in profiler.get_summary():
+            io.echo(line)
+        if profiler.profile_output:
+            io.echo('cProfile stats written to ' + profiler.profile_output)
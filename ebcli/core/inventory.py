@@ -0,0 +1,253 @@
+# Copyright 2017 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"). You
+# may not use this file except in compliance with the License. A copy of
+# the License is located at
+#
+# http://aws.amazon.com/apache2.0/
+#
+# or in the "license" file accompanying this file. This file is
+# distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF
+# ANY KIND, either express or implied. See the License for the specific
+# language governing permissions and limitations under the License.
+
+"""
+Shared listing of the files of a project.
+
+Project type detection, .ebignore matching, zipping and eb local all look at
+the same files during a command. A ProjectInventory lists every directory at
+most once, with os.scandir where available, and keeps the names, types,
+sizes and modification times it saw. Directories are only listed when they
+are first asked for, so detecting the project type reads the top level only,
+and ignored directories are never read while zipping.
+
+get_inventory returns the same inventory for a folder for the whole command.
+With the 'inventory-cache' global setting, listings of the project are also
+saved in .elasticbeanstalk and reused by the next command for directories
+whose modification time has not changed.
+"""
+
+import fnmatch
+import json
+import os
+import posixpath
+import stat
+import threading
+
+from cement.utils.misc import minimal_logger
+
+try:
+    from os import scandir
+except ImportError:
+    scandir = None
+
+LOG = minimal_logger(__name__)
+
+CACHE_FILE_NAME = '.inventory'
+CACHE_VERSION = 1
+
+_inventories = {}
+_lock = threading.Lock()
+
+
+def get_inventory(root):
+    """ The inventory of `root`, shared by everything in this command """
+    root = os.path.abspath(root)
+    with _lock:
+        inventory = _inventories.get(root)
+        if inventory is None:
+            inventory = ProjectInventory(root)
+            _inventories[root] = inventory
+        return inventory
+
+
+def invalidate(root=None):
+    """ Forgets the listings of `root`, or of every folder, after changes """
+    with _lock:
+        if root is None:
+            _inventories.clear()
+        else:
+            _inventories.pop(os.path.abspath(root), None)
+
+
+def save_caches():
+    """ Saves the inventories that were loaded from a cache file """
+    with _lock:
+        inventories = list(_inventories.values())
+    for inventory in inventories:
+        if inventory.cache_file:
+            inventory.save()
+
+
+class FileEntry(object):
+    __slots__ = ['name', 'is_dir', 'is_link', 'size', 'mtime']
+
+    def __init__(self, name, is_dir, is_link, size, mtime):
+        self.name = name
+        self.is_dir = is_dir
+        self.is_link = is_link
+        self.size = size
+        self.mtime = mtime
+
+    def to_list(self):
+        return [self.name, self.is_dir, self.is_link, self.size, self.mtime]
+
+
+class ProjectInventory(object):
+    def __init__(self, root):
+        self.root = root
+        self.listings = {}
+        self.mtimes = {}
+        self.cached_listings = {}
+        self.cache_file = None
+        self.configured = False
+        self.lock = threading.Lock()
+
+    def use_cache(self, cache_file):
+        """ Reuses listings saved by a previous command in `cache_file` """
+        self.cache_file = cache_file
+        try:
+            with open(cache_file) as f:
+                data = json.load(f)
+            if data.get('version') != CACHE_VERSION or data.get('root') != self.root:
+                return
+            self.cached_listings = data['listings']
+        except (IOError, OSError, ValueError, KeyError) as e:
+            LOG.debug('Not using inventory cache {0}: {1}'.format(cache_file, e))
+
+    def save(self):
+        with self.lock:
+            listings = dict((path, {'mtime': self.mtimes[path],
+                                    'entries': [e.to_list() for e in entries]})
+                            for path, entries in self.listings.items())
+        # Listings of directories not read by this command are still valid
+        for path, listing in self.cached_listings.items():
+            listings.setdefault(path, listing)
+        try:
+            with open(self.cache_file, 'w') as f:
+                json.dump({'version': CACHE_VERSION, 'root': self.root,
+                           'listings': listings}, f)
+        except (IOError, OSError) as e:
+            LOG.debug('Unable to save inventory cache: {0}'.format(e))
+
+    def listdir(self, path='.'):
+        """
+        Entries of a directory of the project.
+        :param path: path relative to the root, with '/' separators
+        :return: list of FileEntry, empty if the directory does not exist
+        """
+        path = _normalize(path)
+        with self.lock:
+            entries = self.listings.get(path)
+        if entries is not None:
+            return entries
+
+        entries, mtime = self._read_directory(path)
+        with self.lock:
+            self.listings.setdefault(path, entries)
+            self.mtimes.setdefault(path, mtime)
+            return self.listings[path]
+
+    def get_entry(self, path):
+        path = _normalize(path)
+        parent, name = posixpath.split(path)
+        for entry in self.listdir(parent or '.'):
+            if entry.name == name:
+                return entry
+        return None
+
+    def exists(self, path):
+        return self.get_entry(path) is not None
+
+    def is_empty(self):
+        """ Whether the root holds nothing but dot-files """
+        return not any(not e.name.startswith('.') for e in self.listdir())
+
+    def glob(self, pattern):
+        """
+        Paths matching a glob pattern relative to the root, like glob.glob
+        run from the root. Wildcards in folder names are supported but only
+        list the folders they can match.
+        """
+        parts = _normalize(pattern).split('/')
+        paths = ['.']
+        for i, part in enumerate(parts):
+            last = i == len(parts) - 1
+            matches = []
+            for folder in paths:
+                for entry in self.listdir(folder):
+                    if not last and not entry.is_dir:
+                        continue
+                    if entry.name.startswith('.') and not part.startswith('.'):
+                        # glob.glob does not match hidden files with wildcards
+                        continue
+                    if fnmatch.fnmatch(entry.name, part):
+                        matches.append(_join(folder, entry.name))
+            paths = matches
+        return paths
+
+    def walk(self, top='.'):
+        """
+        Like os.walk, without following links, on paths relative to the root.
+        Directories removed from `dirs` are not listed.
+        """
+        top = _normalize(top)
+        entries = self.listdir(top)
+        dirs = [e.name for e in entries if e.is_dir]
+        files = [e.name for e in entries if not e.is_dir]
+        yield top, dirs, files
+
+        links = set(e.name for e in entries if e.is_link)
+        for d in dirs:
+            if d not in links:
+                for result in self.walk(_join(top, d)):
+                    yield result
+
+    def _read_directory(self, path):
+        full_path = os.path.join(self.root, *path.split('/')) \
+            if path != '.' else self.root
+        try:
+            mtime = os.stat(full_path).st_mtime
+        except OSError:
+            return [], None
+
+        cached = self.cached_listings.get(path)
+        if cached is not None and cached['mtime'] == mtime:
+            return [FileEntry(*e) for e in cached['entries']], mtime
+
+        try:
+            if scandir is not None:
+                entries = [_from_dir_entry(e) for e in scandir(full_path)]
+            else:
+                entries = [_from_stat(name, os.path.join(full_path, name))
+                           for name in os.listdir(full_path)]
+        except OSError as e:
+            LOG.debug('Unable to list {0}: {1}'.format(full_path, e))
+            return [], None
+
+        entries.sort(key=lambda e: e.name)
+        return entries, mtime
+
+
+def _from_dir_entry(entry):
+    st = entry.stat(follow_symlinks=False)
+    is_link = entry.is_symlink()
+    is_dir = entry.is_dir()
+    return FileEntry(entry.name, is_dir, is_link, st.st_size, st.st_mtime)
+
+
+def _from_stat(name, full_path):
+    st = os.lstat(full_path)
+    is_link = stat.S_ISLNK(st.st_mode)
+    is_dir = os.path.isdir(full_path) if is_link else stat.S_ISDIR(st.st_mode)
+    return FileEntry(name, is_dir, is_link, st.st_size, st.st_mtime)
+
+
+def _normalize(path):
+    path = path.replace(os.path.sep, '/')
+    path = posixpath.normpath(path)
+    return path
+
+
+def _join(folder, name):
+    return name if folder == '.' else folder + '/' + name
@@ -17,6 +17,8 @@ import getpass
 import sys
 import logging
 import signal
+import threading
+from contextlib import contextmanager
 
 import colorama
 import pydoc
@@ -123,6 +125,64 @@ def _convert_to_string(data):
         LOG.debug('data class = ' + data.__class__.__name__)
 
 
+class _ThreadLocalStream(object):
+    """
+    Wraps a stream so that threads which asked for their output to be
+    captured write into their own buffer instead.
+    """
+    def __init__(self, stream):
+        self.stream = stream
+        self.local = threading.local()
+
+    def write(self, data):
+        buffer = getattr(self.local, 'buffer', None)
+        if buffer is None:
+            self.stream.write(data)
+        else:
+            buffer.write(data)
+
+    def flush(self):
+        if getattr(self.local, 'buffer', None) is None:
+            self.stream.flush()
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+
+_capture_lock = threading.Lock()
+_capture_state = {'depth': 0, 'original': None, 'stream': None}
+
+
+@contextmanager
+def capture_output():
+    """
+    Captures everything echoed by the current thread. Other threads keep
+    writing to stdout. Yields the buffer holding the captured text.
+    """
+    with _capture_lock:
+        if _capture_state['depth'] == 0:
+            _capture_state['original'] = sys.stdout
+            _capture_state['stream'] = _ThreadLocalStream(sys.stdout)
+            sys.stdout = _capture_state['stream']
+        _capture_state['depth'] += 1
+        stream = _capture_state['stream']
+    buffer = six.StringIO()
+    previous = getattr(stream.local, 'buffer', None)
+    stream.local.buffer = buffer
+    try:
+        yield buffer
+    finally:
+        stream.local.buffer = previous
+        with _capture_lock:
+            _capture_state['depth'] -= 1
+            if _capture_state['depth'] == 0:
+                # The outermost capture puts the real stdout back
+                if sys.stdout is stream:
+                    sys.stdout = _capture_state['original']
+                _capture_state['original'] = None
+                _capture_state['stream'] = None
+
+
 def log_alert(message):
     echo('Alert:', message)
 
@@ -24,7 +24,7 @@ from ebcli.display.data_poller import format_time_since, DataPoller
 from ebcli.display.screen import Screen
 from ebcli.core import io
 from ebcli.display import term
-from ebcli.lib import elasticbeanstalk as elasticbeanstalk
+from ebcli.lib import elasticbeanstalk as elasticbeanstalk, versioncatalog
 from ebcli.lib.utils import get_local_time
 from ebcli.resources.strings import prompts
 from ebcli.operations.lifecycleops import interactive_update_lifcycle_policy
@@ -232,7 +232,6 @@ class VersionScreen(Screen):
 class VersionDataPoller(DataPoller):
     def __init__(self, app_name, env_name, all_app_versions):
         super(VersionDataPoller, self).__init__(app_name, env_name)
-        self.next_token = None
         self.history = []
         self.curr_page = 0
 
@@ -266,15 +265,9 @@ class VersionDataPoller(DataPoller):
         if self.list_len_left <= 0:
             return self.get_table_data()
 
-        if self.next_token:
-            response = elasticbeanstalk.get_application_versions(self.app_name, None, self.PAGE_LENGTH, self.next_token)
-        else:
-            response = elasticbeanstalk.get_application_versions(self.app_name, None, self.PAGE_LENGTH)
-
-        new_page_versions = response['ApplicationVersions']
-        self.next_token = None
-        if u'NextToken' in response:
-            self.next_token = response['NextToken']
+        # Pages come from the versions listed by the version catalog
+        offset = len(self.all_app_versions) - self.list_len_left
+        new_page_versions = self.all_app_versions[offset:offset + self.PAGE_LENGTH]
 
         self.prep_version_data(new_page_versions)
         self.history.append(self.app_versions)
@@ -327,9 +320,4 @@ class VersionDataPoller(DataPoller):
                 }
 
     def get_curr_deploy_num(self):
-        curr_deploy_num = 0
-        for x in range(len(self.all_app_versions)):
-            if self.all_app_versions[x][u'VersionLabel'] == self.env.version_label:
-                curr_deploy_num = len(self.all_app_versions) - x
-                break
-        return curr_deploy_num
+        return versioncatalog.get_catalog(self.app_name).get_deploy_number(self.env.version_label)
@@ -15,7 +15,6 @@ import locale
 locale.setlocale(locale.LC_ALL, 'C')
 
 import time
-import threading
 from collections import defaultdict
 from datetime import timedelta
 from datetime import datetime
@@ -26,7 +25,7 @@ from copy import copy
 from cement.utils.misc import minimal_logger
 from botocore.compat import six
 
-from ..lib import elasticbeanstalk, utils, elb, elbv2, ec2
+from ..lib import aws, elasticbeanstalk, utils, elb, elbv2, ec2
 from ..lib.aws import InvalidParameterValueError
 from ..resources.strings import responses, strings
 from ..resources.statics import elb_names
@@ -47,6 +46,7 @@ class DataPoller(object):
         self.running = False
         self.no_instances_time = None
         self.instance_info = defaultdict(dict)
+        self.recorder = None
 
     def get_fresh_data(self):
         new_data = self.data
@@ -60,11 +60,7 @@ class DataPoller(object):
 
     def start_background_polling(self):
         self.running = True
-        self.t = threading.Thread(
-            target=self._poll_for_health_data
-        )
-        self.t.daemon = True
-        self.t.start()
+        self.t = aws.start_background_thread(self._poll_for_health_data)
 
     def _poll_for_health_data(self):
         LOG.debug('Starting data poller child thread')
@@ -75,6 +71,10 @@ class DataPoller(object):
                 try:
                     data = self._get_health_data()
 
+                    # Record it before the screen starts sorting it
+                    if self.recorder is not None:
+                        self.recorder.record(data)
+
                     # Put it in queue
                     self.data_queue.put(data)
                 except Exception as e:
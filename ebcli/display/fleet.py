@@ -0,0 +1,378 @@
+# Copyright 2017 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"). You
+# may not use this file except in compliance with the License. A copy of
+# the License is located at
+#
+# http://aws.amazon.com/apache2.0/
+#
+# or in the "license" file accompanying this file. This file is
+# distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF
+# ANY KIND, either express or implied. See the License for the specific
+# language governing permissions and limitations under the License.
+
+import heapq
+import re
+import threading
+import time
+from collections import OrderedDict
+from copy import copy
+
+from cement.utils.misc import minimal_logger
+from botocore.compat import six
+
+from ..core import io
+from ..lib import aws
+from ..lib.aws import InvalidParameterValueError
+from ..objects.exceptions import NotFoundError
+from ..resources.strings import responses
+from . import term
+from .data_poller import DataPoller
+from .help import HelpTable
+from .screen import Screen
+
+Queue = six.moves.queue.Queue
+LOG = minimal_logger(__name__)
+
+TABLE_DATA_KEY = 'environments'
+
+HEALTH_ORDER = [
+    'Severe',
+    'Degraded',
+    'Unknown',
+    'Warning',
+    'NoData',
+    'No Data',
+    'Info',
+    'Pending',
+    'Ok',
+]
+
+# Basic health only reports a color
+BASIC_HEALTH_STATUSES = {
+    'Green': 'Ok',
+    'Yellow': 'Warning',
+    'Red': 'Degraded',
+    'Grey': 'Unknown',
+}
+
+
+def _get_health_sort_order(health):
+    try:
+        return HEALTH_ORDER.index(health)
+    except ValueError:
+        return HEALTH_ORDER.index('Unknown')
+
+
+class FleetHealthDataPoller(object):
+    """
+    Polls the health of several environments through a single scheduler.
+
+    Every environment is due again when its own `RefreshedAt` cadence says
+    new data should be available. Due environments are handed to a small
+    pool of worker threads, and dispatches are spaced out so that the
+    fleet as a whole never polls faster than `max_polls_per_second`.
+
+    `poller_classes` maps environment names to the DataPoller class that
+    gets their health, DataPoller by default. `unsupported` maps the
+    environments that cannot be polled to the reason shown in their row.
+    """
+
+    def __init__(self, app_name, env_names, max_workers=4,
+                 max_polls_per_second=4, poller_classes=None,
+                 unsupported=None):
+        self.app_name = app_name
+        self.env_names = list(env_names)
+        self.unsupported = dict(unsupported or {})
+        poller_classes = poller_classes or {}
+        self.pollers = dict((env_name, poller_classes.get(env_name, DataPoller)(
+                                app_name, env_name))
+                            for env_name in self.env_names
+                            if env_name not in self.unsupported)
+        self.max_workers = max(1, min(max_workers, len(self.pollers)))
+        self.min_interval = 1.0 / max_polls_per_second
+        self.data_queue = Queue()
+        self.work_queue = Queue()
+        self.data = None
+        self.environment_data = {}
+        self.errors = dict(self.unsupported)
+        self.active = set(self.env_names)
+        self.due = []
+        self.lock = threading.Lock()
+        self.condition = threading.Condition()
+        self.running = False
+
+    def get_fresh_data(self):
+        new_data = self.data
+        while not self.data_queue.empty() or new_data is None:
+            # Block on the first call.
+            block = new_data is None
+            new_data = self.data_queue.get(block=block)
+
+        self.data = new_data
+        return new_data
+
+    def get_environment_poller(self, env_name):
+        return FleetEnvironmentView(self, env_name)
+
+    def start_background_polling(self):
+        self.running = True
+        now = time.time()
+        for env_name in self.pollers:
+            heapq.heappush(self.due, (now, env_name))
+
+        aws.start_background_thread(self._schedule)
+        for _ in range(self.max_workers):
+            aws.start_background_thread(self._work)
+        with self.lock:
+            # Nothing else publishes when no environment can be polled
+            self._publish()
+
+    def stop_background_polling(self):
+        with self.condition:
+            self.running = False
+            self.condition.notify_all()
+
+    def _schedule(self):
+        LOG.debug('Starting fleet health scheduler thread')
+        last_dispatch = 0
+        while True:
+            with self.condition:
+                if not self.running:
+                    return
+                if not self.due:
+                    self.condition.wait(1)
+                    continue
+
+                due_at, env_name = self.due[0]
+                now = time.time()
+                wait = max(due_at - now,
+                           last_dispatch + self.min_interval - now)
+                if wait > 0:
+                    # Woken early if an environment is rescheduled
+                    self.condition.wait(wait)
+                    continue
+                heapq.heappop(self.due)
+
+            last_dispatch = time.time()
+            self.work_queue.put(env_name)
+
+    def _reschedule(self, env_name, delay):
+        with self.condition:
+            heapq.heappush(self.due, (time.time() + delay, env_name))
+            self.condition.notify()
+
+    def _work(self):
+        while self.running:
+            env_name = self.work_queue.get()
+            poller = self.pollers[env_name]
+            try:
+                data = poller._get_health_data()
+            except (InvalidParameterValueError, NotFoundError) as e:
+                if not _is_environment_deleted(e):
+                    self._on_error(env_name, e)
+                    continue
+                # Environment no longer exists, stop polling it
+                LOG.debug(e)
+                with self.lock:
+                    self.active.discard(env_name)
+                    self.environment_data.pop(env_name, None)
+                    self.errors.pop(env_name, None)
+                    self._publish()
+                continue
+            except Exception as e:
+                self._on_error(env_name, e)
+                continue
+
+            with self.lock:
+                self.errors.pop(env_name, None)
+                self.environment_data[env_name] = data
+                self._publish()
+
+            refresh_time = data.get('environment', {}).get('RefreshedAt')
+            self._reschedule(env_name, poller._get_sleep_time(refresh_time))
+
+    def _on_error(self, env_name, error):
+        LOG.debug('Unable to retrieve health of {0}: {1}'
+                  .format(env_name, error))
+        with self.lock:
+            self.errors[env_name] = str(error)
+            self._publish()
+        self._reschedule(env_name, 11)
+
+    def _publish(self):
+        if not self.active:
+            self.data_queue.put({})
+            return
+
+        reported = set(self.environment_data) | set(self.errors)
+        if not self.active.issubset(reported):
+            # Don't draw until every environment has reported once
+            return
+
+        rows = []
+        for env_name in self.env_names:
+            if env_name not in self.active:
+                continue
+            rows.append(self._get_environment_row(env_name))
+
+        self.data_queue.put({
+            'environment': _summarize_fleet(self.app_name, rows),
+            TABLE_DATA_KEY: rows,
+        })
+
+    def _get_environment_row(self, env_name):
+        data = self.environment_data.get(env_name)
+        if data:
+            row = copy(data['environment'])
+            if 'HealthStatus' not in row:
+                # Basic health, only instances in service are known to be ok
+                row['HealthStatus'] = BASIC_HEALTH_STATUSES.get(
+                    row.get('Color'), 'Unknown')
+                row['Ok'] = row.get('InService', 0)
+        else:
+            row = {'HealthStatus': 'Unknown', 'Color': 'Grey', 'Total': 0}
+
+        if env_name in self.errors:
+            row['Cause'] = self.errors[env_name]
+        elif data is not None and not data:
+            row['Cause'] = 'No instances for more than 15 minutes.'
+
+        # StatusTable identifies rows by InstanceId
+        row['InstanceId'] = env_name
+        row['EnvironmentName'] = env_name
+        row['status_sort'] = _get_health_sort_order(row.get('HealthStatus'))
+        return row
+
+
+def _is_environment_deleted(error):
+    if isinstance(error, NotFoundError):
+        # Raised by get_environment for basic health environments
+        return True
+    return re.match(responses['env.notfound'], error.message) is not None
+
+
+class FleetEnvironmentView(object):
+    """ Feeds a single environment Screen from a FleetHealthDataPoller """
+
+    def __init__(self, fleet_poller, env_name):
+        self.fleet_poller = fleet_poller
+        self.env_name = env_name
+
+    def get_fresh_data(self):
+        while self.env_name in self.fleet_poller.active:
+            data = self.fleet_poller.environment_data.get(self.env_name)
+            if data is not None:
+                return data
+            time.sleep(0.5)
+        return {}
+
+
+def _summarize_fleet(app_name, rows):
+    summary = {
+        'EnvironmentName': '{0} ({1} environments)'.format(app_name,
+                                                           len(rows)),
+        'HealthStatus': 'Ok',
+        'Color': 'Green',
+        'RefreshedAt': None,
+    }
+    worst = len(HEALTH_ORDER)
+    for row in rows:
+        for key in ['Total', 'Ok', 'Warning', 'Degraded', 'Severe', 'Info',
+                    'Pending', 'Unknown', 'NoData']:
+            summary[key] = summary.get(key, 0) + row.get(key, 0)
+        summary['requests'] = summary.get('requests', 0) + \
+            row.get('requests', 0)
+
+        if row['status_sort'] < worst:
+            worst = row['status_sort']
+            summary['HealthStatus'] = row.get('HealthStatus', 'Unknown')
+            summary['Color'] = row.get('Color', 'Grey')
+
+        refreshed_at = row.get('RefreshedAt')
+        if refreshed_at is not None and (summary['RefreshedAt'] is None or
+                                         refreshed_at > summary['RefreshedAt']):
+            summary['RefreshedAt'] = refreshed_at
+
+    return summary
+
+
+class FleetHealthScreen(Screen):
+    def __init__(self, detail_view=None):
+        super(FleetHealthScreen, self).__init__(data_key=TABLE_DATA_KEY)
+        self.detail_view = detail_view
+        self.poller = None
+
+    def start_screen(self, poller, env_data, refresh, mono=False,
+                     default_table='split'):
+        self.poller = poller
+        super(FleetHealthScreen, self).start_screen(
+            poller, env_data, refresh, mono=mono, default_table=default_table)
+
+    def draw_banner_info_lines(self, lines, data):
+        if lines > 3:
+            environment_counts = OrderedDict([
+                ('environments', len(self.data.get(TABLE_DATA_KEY, []))),
+                ('instances', data.get('Total', 0)),
+                ('ok', data.get('Ok', 0)),
+                ('warning', data.get('Warning', 0)),
+                ('degraded', data.get('Degraded', 0)),
+                ('severe', data.get('Severe', 0)),
+                ('unknown', data.get('Unknown', 0) + data.get('NoData', 0)),
+            ])
+            column_size = max(len(k) for k in environment_counts) + 1
+            term.echo_line(
+                ''.join((s.center(column_size)
+                         for s in environment_counts)))
+            term.echo_line(
+                ''.join((io.bold((str(v).center(column_size)))
+                         for k, v in six.iteritems(environment_counts))))
+            lines -= 2
+
+        return lines
+
+    def handle_key(self, val):
+        char = str(val).upper()
+        if char == 'D' or val.name == 'KEY_ENTER':
+            self.drill_down_view()
+        elif char in {'X', 'B', '2', '3', '4', '5'}:
+            # Instance level actions are only available after drilling down
+            return
+        else:
+            return super(FleetHealthScreen, self).handle_key(val)
+
+    def drill_down_view(self):
+        if self.detail_view is None:
+            return
+        self.prompt_and_action('environment name to inspect:',
+                               self.show_environment)
+
+    def show_environment(self, env_name):
+        if env_name not in self.poller.active:
+            io.log_error('Environment "{0}" is not part of this '
+                         'dashboard.'.format(env_name))
+            time.sleep(2)
+        elif env_name in self.poller.unsupported:
+            io.log_error(self.poller.unsupported[env_name])
+            time.sleep(2)
+        else:
+            self.detail_view(env_name)
+            io.echo(term.get_terminal().clear())
+            term.hide_cursor()
+        # Always come back to the fleet view
+        return False
+
+
+class FleetHelpTable(HelpTable):
+    def set_up_standard_rows(self):
+        self.add_help_text(['up', 'down', 'home', 'end'], 'Scroll vertically')
+        self.add_help_text(['left', 'right'], 'Scroll horizontally')
+        self.add_help_text(['F'], 'Freeze/unfreeze data')
+        self.add_help_text(['D', 'enter'], 'Show instance health of an environment')
+        self.add_help_text(['<', '>'], 'Move sort column left/right')
+        self.add_help_text(['-', '+'], 'Sort order descending/ascending')
+        self.add_help_text(['P'], 'Save health snapshot data file')
+        self.add_help_text(['Z'], 'Toggle color/mono mode')
+
+    def set_up_views(self):
+        pass
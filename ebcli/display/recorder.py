@@ -0,0 +1,338 @@
+# Copyright 2017 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"). You
+# may not use this file except in compliance with the License. A copy of
+# the License is located at
+#
+# http://aws.amazon.com/apache2.0/
+#
+# or in the "license" file accompanying this file. This file is
+# distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF
+# ANY KIND, either express or implied. See the License for the specific
+# language governing permissions and limitations under the License.
+
+"""
+Recording and offline replay of `eb health` snapshots.
+
+A recording is a gzip file of JSON lines. Every line is written as its own
+gzip member so the file can be appended to and survives being interrupted.
+The first line is a header describing the environment; every other line is
+a snapshot stamped with the time it was taken. Snapshots are stored as
+deltas against the previous snapshot, with a full keyframe every
+KEYFRAME_INTERVAL snapshots so replay can seek without reading from the
+start.
+"""
+
+import bisect
+import gzip
+import json
+import threading
+import time
+from datetime import datetime
+
+from cement.utils.misc import minimal_logger
+from botocore.compat import six
+from dateutil import parser
+
+from ..core import io
+from ..objects.exceptions import NotFoundError, ValidationError
+from . import term
+from .screen import Screen
+from .traditional import TraditionalHealthScreen
+
+LOG = minimal_logger(__name__)
+
+KEYFRAME_INTERVAL = 20
+HEADER_ENV_KEYS = ['EnvironmentName', 'ApplicationName', 'Tier',
+                   'PlatformArn', 'SolutionStackName']
+
+
+class HealthRecorder(object):
+    def __init__(self, filename, env, health_type):
+        self.filename = filename
+        self.previous = None
+        self.count = 0
+        self.lock = threading.Lock()
+        header = dict((k, env[k]) for k in HEADER_ENV_KEYS if k in env)
+        header['HealthType'] = health_type
+        self._write({'header': _encode(header)})
+
+    def record(self, data):
+        if not data:
+            return
+        data = _encode(data)
+        data['environment'].pop('ResponseMetadata', None)
+        with self.lock:
+            record = {'t': time.time()}
+            if self.previous is None or self.count % KEYFRAME_INTERVAL == 0:
+                record['full'] = data
+            else:
+                record['delta'] = _diff_snapshot(self.previous, data)
+            self._write(record)
+            self.previous = data
+            self.count += 1
+
+    def _write(self, record):
+        line = json.dumps(record, sort_keys=True) + '\n'
+        with gzip.open(self.filename, 'ab') as f:
+            f.write(line.encode('utf-8'))
+
+
+class HealthRecording(object):
+    """ An indexed, in-memory view of a recording file """
+
+    def __init__(self, header, records):
+        self.header = header
+        self.records = records
+        self.times = [r['t'] for r in records]
+        self._cached_index = None
+        self._cached_snapshot = None
+
+    @classmethod
+    def load(cls, filename):
+        header = None
+        records = []
+        try:
+            with gzip.open(filename, 'rb') as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    record = json.loads(line.decode('utf-8'))
+                    if 'header' in record:
+                        # Appended sessions repeat the header
+                        if header is None:
+                            header = _decode(record['header'])
+                        continue
+                    records.append(record)
+        except IOError as e:
+            raise NotFoundError('Unable to read health recording {0}: {1}'
+                                .format(filename, e))
+        except ValueError as e:
+            raise ValidationError('{0} is not a valid health recording: {1}'
+                                  .format(filename, e))
+
+        if header is None or not records:
+            raise ValidationError('{0} does not contain any health snapshots.'
+                                  .format(filename))
+        return cls(header, records)
+
+    def __len__(self):
+        return len(self.records)
+
+    def index_at(self, timestamp):
+        return max(0, bisect.bisect_right(self.times, timestamp) - 1)
+
+    def snapshot_at(self, index):
+        if self._cached_index is not None and \
+                self._cached_index <= index and \
+                not self._has_keyframe_between(self._cached_index, index):
+            # Sequential read, just apply the new deltas
+            start = self._cached_index + 1
+            snapshot = self._cached_snapshot
+        else:
+            start = index
+            while 'full' not in self.records[start]:
+                start -= 1
+            snapshot = None
+
+        for i in range(start, index + 1):
+            record = self.records[i]
+            if 'full' in record:
+                snapshot = record['full']
+            else:
+                snapshot = _apply_delta(snapshot, record['delta'])
+
+        self._cached_index = index
+        self._cached_snapshot = snapshot
+        return _decode(snapshot)
+
+    def snapshots(self):
+        """ Yields every snapshot in order without any timing """
+        for i in range(len(self.records)):
+            yield self.snapshot_at(i)
+
+    def _has_keyframe_between(self, start, end):
+        return any('full' in self.records[i] for i in range(start + 1, end + 1))
+
+
+class ReplayDataPoller(object):
+    """
+    Serves snapshots from a HealthRecording in place of a DataPoller.
+
+    Replay time advances with the wall clock, scaled by `speed`, and can be
+    paused or moved with `seek`. No API calls are made.
+    """
+
+    def __init__(self, recording, speed=1.0):
+        self.recording = recording
+        self.speed = speed
+        self.paused = False
+        self.position = recording.times[0]
+        self.last_tick = time.time()
+        self.data = None
+
+    def start_background_polling(self):
+        pass
+
+    def get_fresh_data(self):
+        self._tick()
+        index = self.recording.index_at(self.position)
+        self.data = self.recording.snapshot_at(index)
+        return self.data
+
+    def toggle_pause(self):
+        self._tick()
+        self.paused = not self.paused
+
+    def change_speed(self, factor):
+        self._tick()
+        self.speed = min(max(self.speed * factor, 0.25), 256)
+
+    def seek(self, seconds):
+        self._tick()
+        self.position = min(max(self.position + seconds,
+                                self.recording.times[0]),
+                            self.recording.times[-1])
+
+    def _tick(self):
+        now = time.time()
+        if not self.paused:
+            self.position += (now - self.last_tick) * self.speed
+            if self.position >= self.recording.times[-1]:
+                # Hold on the last snapshot
+                self.position = self.recording.times[-1]
+                self.paused = True
+        self.last_tick = now
+
+    def get_position_as_string(self):
+        return datetime.fromtimestamp(self.position).strftime('%Y-%m-%d %H:%M:%S')
+
+
+class ReplayScreenMixin(object):
+    """ Replay controls for any health Screen fed by a ReplayDataPoller """
+
+    SEEK_SECONDS = 60
+
+    def get_data(self, poller):
+        self.poller = poller
+        super(ReplayScreenMixin, self).get_data(poller)
+
+    def handle_key(self, val):
+        char = str(val)
+        if char == ' ':
+            self.poller.toggle_pause()
+        elif char == ']':
+            self.poller.seek(self.SEEK_SECONDS)
+        elif char == '[':
+            self.poller.seek(-self.SEEK_SECONDS)
+        elif char == '.':
+            self.poller.change_speed(2)
+        elif char == ',':
+            self.poller.change_speed(0.5)
+        elif char.upper() in {'X', 'B'}:
+            # Instance actions are not available while replaying
+            return
+        else:
+            return super(ReplayScreenMixin, self).handle_key(val)
+
+    def show_help_line(self):
+        if self.help_table.visible:
+            super(ReplayScreenMixin, self).show_help_line()
+            return
+        text = u' Replay {position} x{speed:g}{paused} (Commands: {h}elp,{q}uit, ' \
+               u'{space} pause, {back} {fwd} seek, {slower} {faster} speed)'\
+            .format(position=self.poller.get_position_as_string(),
+                    speed=self.poller.speed,
+                    paused=' [paused]' if self.poller.paused else '',
+                    h=io.bold('H'), q=io.bold('Q'), space=io.bold('space'),
+                    back=io.bold('['), fwd=io.bold(']'),
+                    slower=io.bold(','), faster=io.bold('.'))
+        term.echo_line(text)
+        term.echo_line(term.clear_eos())
+
+
+class ReplayScreen(ReplayScreenMixin, Screen):
+    pass
+
+
+class TraditionalReplayScreen(ReplayScreenMixin, TraditionalHealthScreen):
+    pass
+
+
+def _diff_dict(previous, current):
+    delta = dict((k, v) for k, v in six.iteritems(current)
+                 if k not in previous or previous[k] != v)
+    removed = [k for k in previous if k not in current]
+    if removed:
+        delta['$removed'] = removed
+    return delta
+
+
+def _patch_dict(previous, delta):
+    result = dict(previous)
+    for k in delta.get('$removed', []):
+        result.pop(k, None)
+    for k, v in six.iteritems(delta):
+        if k != '$removed':
+            result[k] = v
+    return result
+
+
+def _get_row_id(row):
+    return row.get('InstanceId', row.get('id'))
+
+
+def _diff_snapshot(previous, current):
+    previous_rows = dict((_get_row_id(r), r) for r in previous['instances'])
+    rows = {}
+    for row in current['instances']:
+        row_id = _get_row_id(row)
+        if row_id in previous_rows:
+            row_delta = _diff_dict(previous_rows[row_id], row)
+            if row_delta:
+                rows[row_id] = row_delta
+        else:
+            rows[row_id] = {'$new': row}
+    return {
+        'environment': _diff_dict(previous['environment'],
+                                  current['environment']),
+        'order': [_get_row_id(r) for r in current['instances']],
+        'instances': rows,
+    }
+
+
+def _apply_delta(previous, delta):
+    previous_rows = dict((_get_row_id(r), r) for r in previous['instances'])
+    instances = []
+    for row_id in delta['order']:
+        row_delta = delta['instances'].get(row_id, {})
+        if '$new' in row_delta:
+            instances.append(row_delta['$new'])
+        else:
+            instances.append(_patch_dict(previous_rows[row_id], row_delta))
+    return {
+        'environment': _patch_dict(previous['environment'],
+                                   delta['environment']),
+        'instances': instances,
+    }
+
+
+def _encode(obj):
+    if isinstance(obj, dict):
+        return dict((k, _encode(v)) for k, v in six.iteritems(obj))
+    if isinstance(obj, (list, tuple)):
+        return [_encode(v) for v in obj]
+    if isinstance(obj, datetime):
+        return {'$datetime': obj.isoformat()}
+    return obj
+
+
+def _decode(obj):
+    if isinstance(obj, dict):
+        if len(obj) == 1 and '$datetime' in obj:
+            return parser.parse(obj['$datetime'])
+        return dict((k, _decode(v)) for k, v in six.iteritems(obj))
+    if isinstance(obj, list):
+        return [_decode(v) for v in obj]
+    return obj
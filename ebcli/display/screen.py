@@ -11,6 +11,7 @@
 # ANY KIND, either express or implied. See the License for the specific
 # language governing permissions and limitations under the License.
 
+import heapq
 import time
 import sys
 
@@ -36,8 +37,12 @@ LOG = minimal_logger(__name__)
 
 
 class Screen(object):
-    def __init__(self):
+    def __init__(self, data_key='instances'):
+        """
+        :param data_key: key of the rows in the poller's data, drawn in the tables
+        """
         self.term = None  # terminal object
+        self.data_key = data_key
         self.tables = []
         self.vertical_offset = 0
         self.horizontal_offset = 0
@@ -52,6 +57,9 @@ class Screen(object):
         self.refresh = False
         self.env_data = None
         self.frozen = False
+        self._sorted_rows = None
+        self._sort_state = None
+        self._sorted_count = 0
 
     def add_table(self, table):
         table.screen = self
@@ -78,7 +86,7 @@ class Screen(object):
                 self.get_data(poller)
                 if not self.data:
                     return
-                self.draw('instances')
+                self.draw(self.data_key)
                 term.reset_terminal()
                 if not refresh:
                     return
@@ -100,7 +108,7 @@ class Screen(object):
         """Formats and draws banner and tables in screen.
         :param key is 'instances' for health tables and 'app_versions' for versions table.
         """
-        self.data = self.sort_data(self.data)
+        self.data = self.sort_data(self.data, key)
         n = term.height() - 1
         n = self.draw_banner(n, self.data)
         term.echo_line()
@@ -126,65 +134,66 @@ class Screen(object):
             val = t.inkey(timeout=.5)
             if val:
                 self.idle_time = datetime.now()
-                char = str(val).upper()
                 LOG.debug('Got val: {0}, {1}, {2}.'
                           .format(val, val.name, val.code))
-                # io.echo('Got val: {},,  {}, {}.'.format(val, val.name, val.code))
-                # time.sleep(3)
-                if char == 'Q':
-                    if self.help_table.visible:
-                        self.turn_on_table(self.last_table)
-                    else:
-                        return True  # Exit command
-                elif char == 'X':
-                    self.replace_instance_view()
-                elif char == 'B':
-                    self.reboot_instance_view()
-                elif char == '1':
-                    self.turn_on_table('split')
-                elif char == '2':
-                    self.turn_on_table('health')
-                elif char == '3':
-                    self.turn_on_table('requests')
-                elif char == '4':
-                    self.turn_on_table('cpu')
-                elif char == '5':
-                    self.turn_on_table('deployments')
-                elif char == 'H':
-                    self.show_help()
-                elif char == 'F':
-                    self.toggle_freeze()
-                elif char == 'P':
-                    self.snapshot_file_view()
-                elif char == 'Z':
-                    self.mono = not self.mono
-                elif char == '>':
-                    self.move_sort_column_right()
-                elif char == '<':
-                    self.move_sort_column_left()
-                elif char == '-':
-                    self.sort_reversed = True
-                elif char == '+':
-                    self.sort_reversed = False
-                # Scrolling
-                elif val.name == 'KEY_DOWN':  # Down arrow
-                    self.scroll_down()
-                elif val.name == 'KEY_UP':  # Up arrow
-                    self.scroll_down(reverse=True)
-                elif val.name == 'KEY_LEFT':  # Left arrow
-                    self.scroll_over(reverse=True)
-                elif val.name == 'KEY_RIGHT':  # Right arrow
-                    self.scroll_over()
-                elif val.name == 'KEY_END':  # End
-                    for table in self.tables:
-                        table.scroll_to_end()
-                elif val.name == 'KEY_HOME':  # Home
-                    for table in self.tables:
-                        table.scroll_to_beginning()
-
-                # If in help window (not main screen) these keys exit
-                elif self.help_table.visible and val.code == 361:  # ESC KEY
-                    self.turn_on_table(self.last_table)
+                return self.handle_key(val)
+
+    def handle_key(self, val):
+        char = str(val).upper()
+        if char == 'Q':
+            if self.help_table.visible:
+                self.turn_on_table(self.last_table)
+            else:
+                return True  # Exit command
+        elif char == 'X':
+            self.replace_instance_view()
+        elif char == 'B':
+            self.reboot_instance_view()
+        elif char == '1':
+            self.turn_on_table('split')
+        elif char == '2':
+            self.turn_on_table('health')
+        elif char == '3':
+            self.turn_on_table('requests')
+        elif char == '4':
+            self.turn_on_table('cpu')
+        elif char == '5':
+            self.turn_on_table('deployments')
+        elif char == 'H':
+            self.show_help()
+        elif char == 'F':
+            self.toggle_freeze()
+        elif char == 'P':
+            self.snapshot_file_view()
+        elif char == 'Z':
+            self.mono = not self.mono
+        elif char == '>':
+            self.move_sort_column_right()
+        elif char == '<':
+            self.move_sort_column_left()
+        elif char == '-':
+            self.sort_reversed = True
+        elif char == '+':
+            self.sort_reversed = False
+        # Scrolling
+        elif val.name == 'KEY_DOWN':  # Down arrow
+            self.scroll_down()
+        elif val.name == 'KEY_UP':  # Up arrow
+            self.scroll_down(reverse=True)
+        elif val.name == 'KEY_LEFT':  # Left arrow
+            self.scroll_over(reverse=True)
+        elif val.name == 'KEY_RIGHT':  # Right arrow
+            self.scroll_over()
+        elif val.name == 'KEY_END':  # End
+            for table in self.tables:
+                table.scroll_to_end()
+        elif val.name == 'KEY_HOME':  # Home
+            for table in self.tables:
+                table.scroll_to_beginning()
+
+        # If in help window (not main screen) these keys exit
+        elif self.help_table.visible and val.code == 361:  # ESC KEY
+            self.turn_on_table(self.last_table)
 
     def turn_on_table(self, key):
         # Activate correct tables
@@ -452,17 +461,61 @@ class Screen(object):
         term.echo_line(text)
         term.echo_line(term.clear_eos())
 
-    def sort_data(self, data):
+    def sort_data(self, data, key='instances'):
+        """
+        Orders the rows of `data[key]` in place by the current sort column.
+
+        Only the rows that can be on screen are put in order: a partial
+        top-k selection is done and widened as the user scrolls further
+        down. Redraws for the same rows and sort column (scrolling,
+        freezing, toggling colors) reuse the existing order.
+        """
         new_data = copy(data)
         if self.sort_index:
             table_name, column_index = self.sort_index
             sort_table = next((t for t in self.tables if t.name == table_name))
             sort_key = sort_table.columns[column_index].sort_key
 
-            new_data['instances'].sort(key=lambda x: x.get(sort_key, '-'),
-                                       reverse=self.sort_reversed)
+            rows = new_data[key]
+            sort_state = (table_name, sort_key, self.sort_reversed)
+            needed = self._get_needed_row_count()
+            if rows is not self._sorted_rows or sort_state != self._sort_state:
+                self._sorted_rows = rows
+                self._sort_state = sort_state
+                self._sorted_count = 0
+            elif needed <= self._sorted_count:
+                return new_data
+
+            self._sorted_count = _sort_top_rows(
+                rows, max(needed, self._sorted_count * 2),
+                key=lambda x: x.get(sort_key, '-'),
+                reverse=self.sort_reversed)
         return new_data
 
+    def _get_needed_row_count(self):
+        # No table can show more rows than the terminal is high
+        offset = max([t.vertical_offset for t in self.tables if t.visible] or [0])
+        return offset + term.height()
+
+
+def _sort_top_rows(rows, count, key, reverse=False):
+    """
+    Puts the first `count` rows of `rows` in sorted order, in place.
+    The remaining rows keep their relative order after them.
+    Returns the number of rows now in sorted order.
+    """
+    if count * 4 >= len(rows):
+        rows.sort(key=key, reverse=reverse)
+        return len(rows)
+
+    if reverse:
+        top = heapq.nlargest(count, rows, key=key)
+    else:
+        top = heapq.nsmallest(count, rows, key=key)
+    chosen = set(id(r) for r in top)
+    rows[:] = top + [r for r in rows if id(r) not in chosen]
+    return count
+
 
 def _get_table_index(tables, table_name):
     for i, table in enumerate(tables):
@@ -33,6 +33,8 @@ class TraditionalHealthDataPoller(DataPoller):
 
     def _get_health_data(self):
         timestamp = datetime.now(tz.tzutc())
+        # Environment status changes on its own, always fetch it fresh
+        elasticbeanstalk.invalidate_cache()
         env = elasticbeanstalk.get_environment(self.app_name, self.env_name)
         env_dict = elasticbeanstalk.get_environment_resources(self.env_name)
         env_dict = env_dict['EnvironmentResources']
@@ -11,13 +11,17 @@
 # ANY KIND, either express or implied. See the License for the specific
 # language governing permissions and limitations under the License.
 
+from __future__ import division
+from collections import defaultdict
+from concurrent.futures import as_completed
 from operator import itemgetter
 
 from ..core.abstractcontroller import AbstractBaseController
 from ..resources.strings import strings
-from ..lib import elasticbeanstalk, utils
+from ..lib import aws, elasticbeanstalk, utils, versioncatalog
 from ..core import io
 from ..objects.exceptions import ServiceError
+from ..operations import terminateops
 
 
 class CleanupVersionsController(AbstractBaseController):
@@ -35,7 +39,10 @@ class CleanupVersionsController(AbstractBaseController):
                 action='store', type=int, default=60, metavar='DAYS',
                 help='delete only versions older than x days DEFAULT=60')),
             (['--force'], dict(action='store_true',
-                               help='don\'t prompt for confirmation'))
+                               help='don\'t prompt for confirmation')),
+            (['--dry-run'], dict(action='store_true',
+                                 help='list the versions that would be '
+                                      'deleted without deleting them'))
         ]
 
     def do_command(self):
@@ -43,12 +50,16 @@ class CleanupVersionsController(AbstractBaseController):
         num_to_leave = self.app.pargs.num_to_leave
         older_than = self.app.pargs.older_than
         force = self.app.pargs.force
+        dry_run = self.app.pargs.dry_run
 
         envs = elasticbeanstalk.get_app_environments(app_name)
         versions_in_use = [e.version_label for e in envs]
 
-        app_versions = elasticbeanstalk.get_application_versions(app_name)['ApplicationVersions']
-        app_versions.sort(key=itemgetter('DateUpdated'), reverse=True)
+        # Versions deleted outside eb must not take the place of ones to keep
+        catalog = versioncatalog.get_catalog(app_name)
+        catalog.sync(full=True)
+        all_versions = catalog.get_versions()
+        app_versions = sorted(all_versions, key=itemgetter('DateUpdated'), reverse=True)
 
         # Filter out versions currently being used
         app_versions = [v for v in app_versions if v['VersionLabel'] not in versions_in_use]
@@ -67,23 +78,82 @@ class CleanupVersionsController(AbstractBaseController):
         # dont include most recent
         app_versions = app_versions[num_to_leave:]
 
-        if app_versions:
-            if not force:
-                response = io.get_boolean_response('{} application versions will be deleted. '
-                                        'Continue?'.format(len(app_versions)))
-                if not response:
-                    return
-        else:
+        if not app_versions:
             io.echo('No application versions to delete.')
             return
 
-        for version in app_versions:
-            label = version['VersionLabel']
-            try:
-                elasticbeanstalk.delete_application_version(app_name, label)
-            except ServiceError as e:
-                io.log_warning('Error deleting version {0}. Error: {1}'
-                               .format(label, e.message))
-
-
+        if dry_run:
+            print_dry_run_summary(app_versions, all_versions)
+            return
 
+        if not force:
+            response = io.get_boolean_response('{} application versions will be deleted. '
+                                    'Continue?'.format(len(app_versions)))
+            if not response:
+                return
+
+        delete_application_versions(app_name, app_versions, all_versions)
+
+
+def print_dry_run_summary(app_versions, all_versions):
+    for version in app_versions:
+        io.echo('  {0}  {1}'.format(version['DateUpdated'], version['VersionLabel']))
+    buckets = _get_source_bundles(app_versions, all_versions)
+    io.echo('{0} application versions and {1} source bundles in {2} buckets '
+            'would be deleted.'.format(len(app_versions),
+                                       sum(len(k) for k in buckets.values()),
+                                       len(buckets)))
+
+
+def delete_application_versions(app_name, app_versions, all_versions):
+    """
+    Deletes application versions concurrently on the shared API executor,
+    then deletes their source bundles in bulk.
+    :param all_versions: every version of the application. Bundles that
+        are also used by a version that is kept are not deleted.
+    """
+    io.echo('Deleting {0} application versions.'.format(len(app_versions)))
+    jobs = dict((aws.submit_api_work(elasticbeanstalk.delete_application_version,
+                                     app_name, v['VersionLabel'], False), v)
+                for v in app_versions)
+
+    deleted = []
+    errors = []
+    io.update_upload_progress(0)
+    for job in as_completed(jobs):
+        version = jobs[job]
+        try:
+            job.result()
+            deleted.append(version)
+        except ServiceError as e:
+            errors.append((version['VersionLabel'], e.message))
+        io.update_upload_progress((len(deleted) + len(errors)) / len(jobs))
+
+    versioncatalog.get_catalog(app_name).forget(
+        v['VersionLabel'] for v in deleted)
+    for label, message in errors:
+        io.log_warning('Error deleting version {0}. Error: {1}'
+                       .format(label, message))
+
+    terminateops.delete_source_bundles(
+        _get_source_bundles(deleted, all_versions))
+    io.echo('Deleted {0} application versions.'.format(len(deleted)))
+
+
+def _get_source_bundles(app_versions, all_versions):
+    """ The S3 keys of the versions' source bundles, by bucket """
+    labels = set(v['VersionLabel'] for v in app_versions)
+    kept = set(_get_source_bundle(v) for v in all_versions
+               if v['VersionLabel'] not in labels)
+
+    bundles = set(_get_source_bundle(v) for v in app_versions)
+    buckets = defaultdict(list)
+    for bucket, key in sorted(bundles - kept, key=str):
+        if bucket and key:
+            buckets[bucket].append(key)
+    return buckets
+
+
+def _get_source_bundle(version):
+    bundle = version.get('SourceBundle', {})
+    return bundle.get('S3Bucket'), bundle.get('S3Key')
@@ -18,7 +18,8 @@ from ..core.abstractcontroller import AbstractBaseController
 from ..resources.strings import strings
 from ..objects.exceptions import NotFoundError
 from ..core import io, fileoperations
-from ..lib import elasticbeanstalk, s3, heuristics, cloudformation, utils
+from ..lib import elasticbeanstalk, s3, heuristics, cloudformation, utils, \
+    versioncatalog
 
 
 class DownloadController(AbstractBaseController):
@@ -39,15 +40,19 @@ class DownloadController(AbstractBaseController):
 def download_source_bundle(app_name, env_name):
     env = elasticbeanstalk.get_environment(app_name, env_name)
     if env.version_label and env.version_label != 'Sample Application':
-        app_version = elasticbeanstalk.get_application_versions(
-        app_name, version_labels=[env.version_label])['ApplicationVersions'][0]
+        app_version = versioncatalog.get_catalog(app_name).get_version(
+            env.version_label)
+        if app_version is None:
+            raise NotFoundError('Application version "{0}" not found.'
+                                .format(env.version_label))
 
         source_bundle = app_version['SourceBundle']
         bucket_name = source_bundle['S3Bucket']
         key_name = source_bundle['S3Key']
-        io.echo('Downloading application version...')
-        data = s3.get_object(bucket_name, key_name)
         filename = get_filename(key_name)
+        location = _get_download_location(filename)
+        io.echo('Downloading application version...')
+        s3.download_object(bucket_name, key_name, location)
     else:
         # sample app
         template = cloudformation.get_template('awseb-' + env.id + '-stack')
@@ -58,12 +63,9 @@ def download_source_bundle(app_name, env_name):
         utils.get_data_from_url(url)
         io.echo('Downloading application version...')
         data = utils.get_data_from_url(url, timeout=30)
-        filename = 'sample.zip'
+        location = _get_download_location('sample.zip')
+        fileoperations.write_to_data_file(location, data)
 
-    fileoperations.make_eb_dir('downloads/')
-    location = fileoperations.get_eb_file_full_location(
-        'downloads/' + filename)
-    fileoperations.write_to_data_file(location, data)
     io.echo('Application version downloaded to:', location)
 
     cwd = os.getcwd()
@@ -77,6 +79,12 @@ def download_source_bundle(app_name, env_name):
     finally:
         os.chdir(cwd)
 
+
+def _get_download_location(filename):
+    fileoperations.make_eb_dir('downloads/')
+    return fileoperations.get_eb_file_full_location('downloads/' + filename)
+
+
 def get_filename(url):
     pattern = re.compile('^(?:.*[/])*([^/]+)$')
     matcher = re.match(pattern, url)
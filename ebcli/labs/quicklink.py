@@ -14,8 +14,9 @@
 
 from ..core.abstractcontroller import AbstractBaseController
 from ..resources.strings import strings
+from ..objects.exceptions import NotFoundError
 from ..core import io
-from ..lib import elasticbeanstalk, aws
+from ..lib import elasticbeanstalk, aws, versioncatalog
 from botocore.compat import six
 urllib = six.moves.urllib
 
@@ -62,8 +63,11 @@ def get_quick_link(app_name, env_name):
     if environment_type:
         link += '&environmentType=' + environment_type
     if env.version_label:
-        app_version = elasticbeanstalk.get_application_versions(
-            app_name, version_labels=[env.version_label])['ApplicationVersions'][0]
+        app_version = versioncatalog.get_catalog(app_name).get_version(
+            env.version_label)
+        if app_version is None:
+            raise NotFoundError('Application version "{0}" not found.'
+                                .format(env.version_label))
         source_bundle = app_version['SourceBundle']
         source_url = 'https://s3.amazonaws.com/' + source_bundle['S3Bucket'] + \
                      '/' + source_bundle['S3Key']
@@ -0,0 +1,275 @@
+# Copyright 2017 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"). You
+# may not use this file except in compliance with the License. A copy of
+# the License is located at
+#
+# http://aws.amazon.com/apache2.0/
+#
+# or in the "license" file accompanying this file. This file is
+# distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF
+# ANY KIND, either express or implied. See the License for the specific
+# language governing permissions and limitations under the License.
+
+"""
+Recording of API calls to fixture files, and offline replay of them.
+
+A fixture file is JSON of the form
+    {"calls": [{"service": ..., "operation": ..., "params": {...},
+                "latency": seconds, "response": {...} or "error": {...}}]}
+
+While recording (eb --record-api FILE), every call aws.make_api_call sends
+to botocore is saved with its latency. While replaying (eb --replay-api
+FILE), no client is created and nothing goes over the network. Every call
+is answered from the fixtures: first by a recorded call with the same
+parameters, otherwise by the next recorded call of the same operation.
+When a call has been used up, the last one is served again, which keeps
+polling loops going. Replay can simulate latency and throttling, so the
+retry and rate limiting paths of make_api_call run as they would against
+the service.
+"""
+
+import base64
+import json
+import random
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+from email.utils import formatdate
+
+import botocore.exceptions
+from botocore.compat import six
+from botocore.response import StreamingBody
+from cement.utils.misc import minimal_logger
+from dateutil import parser
+
+from ..objects.exceptions import EBCLIException
+
+LOG = minimal_logger(__name__)
+
+_backend = None
+
+
+class ApiReplayError(EBCLIException):
+    pass
+
+
+def start_recording(filename):
+    global _backend
+    _backend = ApiRecorder(filename)
+
+
+def start_replay(filename, latency=None, latency_scale=1.0, throttle_rate=0.0):
+    global _backend
+    _backend = ApiReplayer.load(filename, latency=latency,
+                                latency_scale=latency_scale,
+                                throttle_rate=throttle_rate)
+
+
+def set_backend(backend):
+    """ Installs a recorder, a replayer or, with None, the real API """
+    global _backend
+    _backend = backend
+
+
+def get_backend():
+    return _backend
+
+
+def make_call(service_name, operation_name, response=None, error=None,
+              params=None, latency=0):
+    """ Builds a fixture entry by hand, for fixtures that were not recorded """
+    call = {'service': service_name, 'operation': operation_name,
+            'params': _encode(params or {}), 'latency': latency}
+    if error is not None:
+        call['error'] = _encode(error)
+    else:
+        response = dict(response or {})
+        # botopatch adds the date header, which eb health reads
+        response.setdefault('ResponseMetadata', {'HTTPStatusCode': 200,
+                                                 'RequestId': 'replayed',
+                                                 'date': formatdate(usegmt=True)})
+        call['response'] = _encode(response)
+    return call
+
+
+def write():
+    """ Saves the recording if one was started, returns its file name """
+    if isinstance(_backend, ApiRecorder):
+        _backend.write()
+        return _backend.filename
+    return None
+
+
+class ApiRecorder(object):
+    def __init__(self, filename):
+        self.filename = filename
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def get_operation(self, service_name, operation_name, get_real_operation):
+        operation = get_real_operation(service_name, operation_name)
+
+        def record(**params):
+            start = time.time()
+            call = {'service': service_name, 'operation': operation_name,
+                    'params': _encode(params)}
+            try:
+                response = operation(**params)
+            except botocore.exceptions.ClientError as e:
+                call['error'] = _encode(e.response)
+                call['latency'] = time.time() - start
+                self._add(call)
+                raise
+
+            call['latency'] = time.time() - start
+            response = _read_streams(response)
+            call['response'] = _encode(response)
+            self._add(call)
+            return response
+        return record
+
+    def _add(self, call):
+        with self.lock:
+            self.calls.append(call)
+
+    def write(self):
+        with self.lock:
+            calls = list(self.calls)
+        LOG.debug('Writing {0} recorded API calls to {1}'
+                  .format(len(calls), self.filename))
+        with open(self.filename, 'w') as f:
+            json.dump({'calls': calls}, f, indent=1, sort_keys=True)
+
+
+class ApiReplayer(object):
+    def __init__(self, calls, latency=None, latency_scale=1.0,
+                 throttle_rate=0.0, seed=None):
+        """
+        :param calls: recorded calls, as in a fixture file
+        :param latency: seconds every call takes, instead of the recorded latency
+        :param latency_scale: factor applied to the recorded latencies
+        :param throttle_rate: fraction of calls answered with a throttling error
+        """
+        self.latency = latency
+        self.latency_scale = latency_scale
+        self.throttle_rate = throttle_rate
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.by_params = defaultdict(list)
+        self.by_operation = defaultdict(list)
+        self.used = set()
+        self.call_count = 0
+        self.throttle_count = 0
+        for i, call in enumerate(calls):
+            operation = (call['service'], call['operation'])
+            self.by_params[operation + (_get_params_key(call['params']),)].append(i)
+            self.by_operation[operation].append(i)
+        self.calls = calls
+
+    @classmethod
+    def load(cls, filename, **kwargs):
+        try:
+            with open(filename) as f:
+                calls = json.load(f)['calls']
+        except (IOError, ValueError, KeyError) as e:
+            raise ApiReplayError('Unable to read API fixtures from {0}: {1}'
+                                 .format(filename, e))
+        return cls(calls, **kwargs)
+
+    def is_drained(self):
+        """ Whether every recorded call has been served at least once """
+        with self.lock:
+            return len(self.used) == len(self.calls)
+
+    def get_operation(self, service_name, operation_name, get_real_operation):
+        def replay(**params):
+            call = self._find(service_name, operation_name, params)
+            latency = self.latency
+            if latency is None:
+                latency = call.get('latency', 0) * self.latency_scale
+            time.sleep(latency)
+
+            with self.lock:
+                self.call_count += 1
+                throttled = self.random.random() < self.throttle_rate
+                if throttled:
+                    self.throttle_count += 1
+            if throttled:
+                raise botocore.exceptions.ClientError({
+                    'Error': {'Code': 'Throttling',
+                              'Message': 'Rate exceeded (simulated)'},
+                    'ResponseMetadata': {'HTTPStatusCode': 400},
+                }, operation_name)
+            if 'error' in call:
+                raise botocore.exceptions.ClientError(_decode(call['error']),
+                                                      operation_name)
+            return _decode(call['response'])
+        return replay
+
+    def _find(self, service_name, operation_name, params):
+        operation = (service_name, operation_name)
+        with self.lock:
+            for candidates in (self.by_params[operation + (_get_params_key(_encode(params)),)],
+                               self.by_operation[operation]):
+                if not candidates:
+                    continue
+                index = next((i for i in candidates if i not in self.used),
+                             candidates[-1])
+                self.used.add(index)
+                return self.calls[index]
+
+        raise ApiReplayError('No recorded response for {0}.{1}'
+                             .format(service_name, operation_name))
+
+
+def _get_params_key(params):
+    return json.dumps(params, sort_keys=True)
+
+
+def _read_streams(response):
+    # Streaming bodies can only be read once, keep a copy for the caller
+    for key, value in list(response.items()):
+        if isinstance(value, StreamingBody):
+            data = value.read()
+            response[key] = _StreamedBytes(data)
+    return response
+
+
+class _StreamedBytes(StreamingBody):
+    def __init__(self, data):
+        super(_StreamedBytes, self).__init__(six.BytesIO(data), len(data))
+        self.data = data
+
+
+def _encode(obj):
+    if isinstance(obj, dict):
+        return dict((k, _encode(v)) for k, v in six.iteritems(obj))
+    if isinstance(obj, (list, tuple)):
+        return [_encode(v) for v in obj]
+    if isinstance(obj, datetime):
+        return {'$datetime': obj.isoformat()}
+    if isinstance(obj, _StreamedBytes):
+        return {'$stream': base64.b64encode(obj.data).decode('ascii')}
+    if six.PY3 and isinstance(obj, bytes):
+        return {'$bytes': base64.b64encode(obj).decode('ascii')}
+    if hasattr(obj, 'read'):
+        # File objects sent as request bodies are not kept
+        return {'$file': getattr(obj, 'name', None)}
+    return obj
+
+
+def _decode(obj):
+    if isinstance(obj, dict):
+        if len(obj) == 1:
+            if '$datetime' in obj:
+                return parser.parse(obj['$datetime'])
+            if '$stream' in obj:
+                return _StreamedBytes(base64.b64decode(obj['$stream']))
+            if '$bytes' in obj:
+                return base64.b64decode(obj['$bytes'])
+        return dict((k, _decode(v)) for k, v in six.iteritems(obj))
+    if isinstance(obj, list):
+        return [_decode(v) for v in obj]
+    return obj
@@ -11,19 +11,25 @@
 # ANY KIND, either express or implied. See the License for the specific
 # language governing permissions and limitations under the License.
 
+import logging
 import os
 import random
+import threading
 import time
 import warnings
+from contextlib import contextmanager
 
 import botocore
 import botocore.exceptions
 import botocore.session
+from botocore.compat import six
 from botocore.config import Config
 from botocore.loaders import Loader
 from cement.utils.misc import minimal_logger
+from concurrent.futures import Future, ThreadPoolExecutor, wait
 
 from ebcli import __version__
+from . import apirecording, credentialcache, ratelimit, tracing
 from .botopatch import apply_patches
 from .utils import static_var
 from ..core import fileoperations
@@ -46,6 +52,19 @@ _region_name = None
 _verify_ssl = True
 _endpoint_url = None
 _debug = False
+_cache_credentials = True
+_client_lock = threading.RLock()
+
+# Clients and sessions used inside a client_context, keyed by
+# (service_name, profile, region) and by profile respectively
+_context_clients = {}
+_context_sessions = {}
+_context = threading.local()
+
+API_MAX_WORKERS = 10
+_api_executor = None
+_api_executor_lock = threading.Lock()
+_executor_state = threading.local()
 
 apply_patches()
 
@@ -53,7 +72,7 @@ apply_patches()
 def _flush():
     # Should be used for resetting tests only
     global _api_clients, _profile, _id, _key, _region_name, _verify_ssl
-    _api_clients = {}
+    _invalidate_clients()
     _get_botocore_session.botocore_session = None
     _profile = None
     _id = None
@@ -68,7 +87,7 @@ def set_session_creds(id, key):
     _key = key
 
     # invalidate all old clients
-    _api_clients = {}
+    _invalidate_clients()
 
 
 def set_profile(profile):
@@ -77,10 +96,13 @@ def set_profile(profile):
 
     # Invalidate session and old clients
     _get_botocore_session.botocore_session = None
-    _api_clients = {}
+    _invalidate_clients()
 
 
 def get_profile():
+    context = get_client_context()
+    if context is not None and context[0] is not None:
+        return context[0]
     if _profile is not None:
         return _profile
     from ..operations import commonops
@@ -92,7 +114,157 @@ def set_region(region_name):
 
     # Invalidate session and old clients
     _get_botocore_session.botocore_session = None
-    _api_clients = {}
+    _invalidate_clients()
+
+
+def _invalidate_clients():
+    global _api_clients, _context_clients, _context_sessions
+    with _client_lock:
+        _api_clients = {}
+        _context_clients = {}
+        _context_sessions = {}
+
+
+@contextmanager
+def client_context(profile=None, region=None):
+    """
+    Makes API calls from the current thread use the given profile and/or
+    region instead of the global ones. Clients for several profiles and
+    regions can be alive at the same time, so different threads can work
+    against different regions concurrently.
+    """
+    previous = get_client_context()
+    _context.current = (profile, region)
+    try:
+        yield
+    finally:
+        _context.current = previous
+
+
+def get_client_context():
+    return getattr(_context, 'current', None)
+
+
+def bind_client_context(function):
+    """
+    Returns `function` wrapped so it runs in the caller's client_context,
+    for handing work to other threads.
+    """
+    context = get_client_context()
+    if context is None:
+        return function
+
+    def wrapper(*args, **kwargs):
+        with client_context(*context):
+            return function(*args, **kwargs)
+    return wrapper
+
+
+def get_api_executor():
+    """
+    Returns the executor shared by everything that fans API calls out.
+    It is bounded, so concurrent callers never open more than
+    API_MAX_WORKERS connections between them.
+    """
+    global _api_executor
+    with _api_executor_lock:
+        if _api_executor is None:
+            _api_executor = ThreadPoolExecutor(max_workers=API_MAX_WORKERS)
+        return _api_executor
+
+
+def cancel_api_work():
+    """
+    Drops the work queued on the shared API executor and lets its workers
+    go without waiting for them, so an interrupted command exits as soon
+    as the calls already in flight return.
+    """
+    global _api_executor
+    with _api_executor_lock:
+        executor, _api_executor = _api_executor, None
+    if executor is None:
+        return
+    try:
+        executor.shutdown(wait=False, cancel_futures=True)
+    except TypeError:
+        # cancel_futures is new in Python 3.9
+        while True:
+            try:
+                work_item = executor._work_queue.get_nowait()
+            except six.moves.queue.Empty:
+                break
+            if work_item is not None:
+                work_item.future.cancel()
+        executor.shutdown(wait=False)
+
+
+def submit_api_work(function, *args, **kwargs):
+    """
+    Runs `function` on the shared API executor in the caller's
+    client_context and returns a Future for its result.
+
+    Work submitted from inside an executor thread runs right away in that
+    thread instead, so nested fan-outs can never wait on a full pool.
+    """
+    function = bind_client_context(function)
+    if getattr(_executor_state, 'is_worker', False):
+        future = Future()
+        try:
+            future.set_result(function(*args, **kwargs))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+    return get_api_executor().submit(_run_as_worker, function, args, kwargs)
+
+
+def wait_for_futures(futures):
+    """
+    Waits for every future and raises the error of the first one that
+    failed. future.result() is a halting call that CTRL+C cannot
+    interrupt on Python 2, so wait with a timeout in a loop instead.
+    """
+    while not all(f.done() for f in futures):
+        wait(futures, timeout=1)
+    return [f.result() for f in futures]
+
+
+def _run_as_worker(function, args, kwargs):
+    _executor_state.is_worker = True
+    try:
+        return function(*args, **kwargs)
+    finally:
+        _executor_state.is_worker = False
+
+
+def make_api_call_async(service_name, operation_name, **operation_options):
+    """ make_api_call on the shared API executor, returns a Future """
+    return submit_api_work(make_api_call, service_name, operation_name,
+                           **operation_options)
+
+
+def make_api_calls_concurrently(calls):
+    """
+    Makes several API calls at once with the same retry, error and
+    throttling handling as make_api_call.
+    :param calls: list of (service_name, operation_name, operation_options)
+    :return: list of responses in the same order as `calls`. If any call
+        failed, the error of the first failed call is raised.
+    """
+    futures = [make_api_call_async(service_name, operation_name, **options)
+               for service_name, operation_name, options in calls]
+    return [f.result() for f in futures]
+
+
+def start_background_thread(target, *args):
+    """
+    Starts a daemon thread for work that lives as long as the command does,
+    such as streaming or polling loops, which must not hold on to a worker
+    of the shared API executor.
+    """
+    thread = threading.Thread(target=bind_client_context(target), args=args)
+    thread.daemon = True
+    thread.start()
+    return thread
 
 
 def set_endpoint_url(endpoint_url):
@@ -111,6 +283,28 @@ def set_profile_override(profile):
     _profile_env_var = None
 
 
+def set_rate_limits(max_rates=None, shared=False):
+    ratelimit.configure(max_rates, shared)
+
+
+def set_trace(filename, trace_format=tracing.FORMAT_CHROME):
+    tracing.start(filename, trace_format)
+
+
+def set_api_recording(filename):
+    apirecording.start_recording(filename)
+
+
+def set_api_replay(filename, latency=None, throttle_rate=0.0):
+    apirecording.start_replay(filename, latency=latency,
+                              throttle_rate=throttle_rate)
+
+
+def set_credential_cache(enabled):
+    global _cache_credentials
+    _cache_credentials = enabled
+
+
 def set_debug():
     global _debug
     _debug = True
@@ -120,16 +314,86 @@ def _set_user_agent_for_session(session):
     session.user_agent_name = 'eb-cli'
     session.user_agent_version = __version__
 
+@static_var('loader', None)
 def _get_data_loader():
     # Creates a botocore data loader that loads custom data files
     # FIRST, creating a precedence for custom files.
-    data_folder = os.path.join(os.path.dirname(os.path.realpath(__file__)),
-                               BOTOCORE_DATA_FOLDER_NAME)
+    # The loader caches what it has read, so it is shared by all sessions.
+    if _get_data_loader.loader is None:
+        data_folder = os.path.join(os.path.dirname(os.path.realpath(__file__)),
+                                   BOTOCORE_DATA_FOLDER_NAME)
+
+        _get_data_loader.loader = Loader(
+            extra_search_paths=[data_folder, Loader.BUILTIN_DATA_PATH],
+            include_default_search_paths=False)
+    return _get_data_loader.loader
+
+
+def preload_service_models(service_names):
+    """ Reads the botocore models of `service_names` ahead of their first use """
+    loader = _get_data_loader()
+    loader.load_data('endpoints')
+    for service_name in service_names:
+        loader.load_service_model(service_name, 'service-2')
 
-    return Loader(extra_search_paths=[data_folder, Loader.BUILTIN_DATA_PATH],
-                  include_default_search_paths=False)
 
 def _get_client(service_name):
+    # Clients are shared between threads, but botocore sessions are not
+    # safe to create clients from concurrently
+    context = get_client_context()
+    with _client_lock:
+        if context is None:
+            return _create_client(service_name)
+        return _create_context_client(service_name, *context)
+
+
+def _create_context_client(service_name, profile, region):
+    key = (service_name, profile, region)
+    if key in _context_clients:
+        return _context_clients[key]
+
+    if profile is None:
+        session = _get_botocore_session()
+    else:
+        session = _get_profile_session(profile)
+    if service_name == 'elasticbeanstalk':
+        endpoint_url = _endpoint_url
+    else:
+        endpoint_url = None
+    try:
+        LOG.debug('Creating new Botocore Client for {0} ({1}, {2})'
+                  .format(service_name, profile, region))
+        client = session.create_client(service_name,
+                                       endpoint_url=endpoint_url,
+                                       region_name=region,
+                                       aws_access_key_id=_id,
+                                       aws_secret_access_key=_key,
+                                       verify=_verify_ssl,
+                                       config=Config(signature_version='s3v4'))
+
+    except botocore.exceptions.ProfileNotFound as e:
+        raise InvalidProfileError(e)
+
+    _context_clients[key] = client
+    return client
+
+
+def _get_profile_session(profile):
+    if profile not in _context_sessions:
+        LOG.debug('Creating new Botocore Session for profile ' + profile)
+        session = botocore.session.get_session({
+            'profile': (None, None, profile, None),
+        })
+        session.set_config_variable('region', _region_name)
+        session.register_component('data_loader', _get_data_loader())
+        _set_user_agent_for_session(session)
+        if _cache_credentials:
+            credentialcache.set_up_session(session)
+        _context_sessions[profile] = session
+    return _context_sessions[profile]
+
+
+def _create_client(service_name):
     aws_access_key_id = _id
     aws_secret_key = _key
     if service_name in _api_clients:
@@ -169,6 +433,8 @@ def _get_botocore_session():
         session.set_config_variable('region', _region_name)
         session.register_component('data_loader', _get_data_loader())
         _set_user_agent_for_session(session)
+        if _cache_credentials:
+            credentialcache.set_up_session(session)
         _get_botocore_session.botocore_session = session
         if _debug:
             session.set_debug_logger()
@@ -177,6 +443,9 @@ def _get_botocore_session():
 
 
 def get_region_name():
+    context = get_client_context()
+    if context is not None and context[1] is not None:
+        return context[1]
     return _region_name
 
 
@@ -189,10 +458,32 @@ def get_credentials():
 
 
 def make_api_call(service_name, operation_name, **operation_options):
-    operation = _set_operation(service_name, operation_name)
+    if not tracing.is_enabled():
+        return _make_api_call(service_name, operation_name, operation_options)
+
+    call = tracing.start_call(service_name, operation_name, operation_options)
+    response_data = None
+    try:
+        response_data = _make_api_call(service_name, operation_name,
+                                       operation_options, call=call)
+        return response_data
+    except Exception as e:
+        call.add_error(e.__class__.__name__)
+        raise
+    finally:
+        call.finish(response_data)
+
+
+def _make_api_call(service_name, operation_name, operation_options, call=None):
+    backend = apirecording.get_backend()
+    if backend is None:
+        operation = _set_operation(service_name, operation_name)
+    else:
+        operation = backend.get_operation(service_name, operation_name,
+                                          _set_operation)
     aggregated_error_message = []
 
-    region = _region_name
+    region = get_region_name()
     if not region:
         region = 'default'
 
@@ -203,20 +494,29 @@ def make_api_call(service_name, operation_name, **operation_options):
             LOG.debug('Retrying -- attempt #' + str(attempt))
         delay = _get_delay(attempt)
         time.sleep(delay)
+        throttle_wait = ratelimit.acquire(service_name, region)
+        if call is not None:
+            call.add_attempt(delay, throttle_wait)
         try:
-            LOG.debug('Making api call: (' +
-                      service_name + ', ' + operation_name +
-                      ') to region: ' + region + ' with args:' + str(operation_options))
+            if _is_debug_logging():
+                LOG.debug('Making api call: (' +
+                          service_name + ', ' + operation_name +
+                          ') to region: ' + region + ' with args:' + str(operation_options))
             response_data = operation(**operation_options)
-            status = response_data['ResponseMetadata']['HTTPStatusCode']
-            LOG.debug('API call finished, status = ' + str(status))
-            if response_data:
-                LOG.debug('Response: ' + str(response_data))
+            if _is_debug_logging():
+                status = response_data['ResponseMetadata']['HTTPStatusCode']
+                LOG.debug('API call finished, status = ' + str(status))
+                if response_data:
+                    LOG.debug('Response: ' + str(response_data))
 
+            ratelimit.on_success(service_name, region)
             return response_data
 
         except botocore.exceptions.ClientError as e:
-            _handle_response_code(e.response, attempt, aggregated_error_message)
+            if call is not None:
+                call.add_error(e.response.get('Error', {}).get('Code'))
+            _handle_response_code(e.response, attempt, aggregated_error_message,
+                                  service_name=service_name, region=region)
 
         except botocore.exceptions.NoCredentialsError:
             LOG.debug('No credentials found')
@@ -244,10 +544,17 @@ def make_api_call(service_name, operation_name, **operation_options):
             raise ServiceError(error)
 
 
-def _handle_response_code(response_data, attempt, aggregated_error_message):
+def _is_debug_logging():
+    """ Large request and response bodies are only formatted when they will be logged """
+    return LOG.backend.isEnabledFor(logging.DEBUG)
+
+
+def _handle_response_code(response_data, attempt, aggregated_error_message,
+                          service_name=None, region=None):
     max_attempts = 10
 
-    LOG.debug('Response: ' + str(response_data))
+    if _is_debug_logging():
+        LOG.debug('Response: ' + str(response_data))
     status = response_data['ResponseMetadata']['HTTPStatusCode']
     LOG.debug('API call finished, status = ' + str(status))
     try:
@@ -259,6 +566,8 @@ def _handle_response_code(response_data, attempt, aggregated_error_message):
         error = _get_400_error(response_data, message)
         if isinstance(error, ThrottlingError):
             LOG.debug('Received throttling error')
+            if service_name is not None:
+                ratelimit.on_throttle(service_name, region)
             if attempt > max_attempts:
                 raise MaxRetriesError('Max retries exceeded for '
                                       'throttling error')
@@ -268,7 +577,7 @@ def _handle_response_code(response_data, attempt, aggregated_error_message):
         LOG.debug('Received a 403')
         if not message:
             message = 'Are your permissions correct?'
-        if _region_name == 'cn-north-1':
+        if get_region_name() == 'cn-north-1':
             raise NotAuthorizedInRegionError('Operation Denied. ' + message +
                                              '\n' +
                                              strings['region.china.credentials'])
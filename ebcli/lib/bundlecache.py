@@ -0,0 +1,129 @@
+# Copyright 2017 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"). You
+# may not use this file except in compliance with the License. A copy of
+# the License is located at
+#
+# http://aws.amazon.com/apache2.0/
+#
+# or in the "license" file accompanying this file. This file is
+# distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF
+# ANY KIND, either express or implied. See the License for the specific
+# language governing permissions and limitations under the License.
+
+"""
+Cache of the source bundles built with git archive.
+
+A bundle only depends on the git tree it was built from, and on the
+commits of the submodules when they are included, so bundles are stored
+under .elasticbeanstalk/bundle_cache with a key made of those. Deploying
+the same tree again, under a new label, with --staged or from another
+branch, reuses the bundle instead of running git archive. Bundles are
+hard-linked into place where possible, and only the most recently used
+ones are kept, 5 by default, which the 'bundle-cache-size' global
+setting changes. A size of 0 turns the cache off.
+"""
+
+import hashlib
+import os
+import shutil
+import tempfile
+
+from cement.utils.misc import minimal_logger
+
+from ..core import fileoperations
+
+LOG = minimal_logger(__name__)
+
+DEFAULT_SIZE = 5
+BUNDLE_EXTENSION = '.zip'
+
+
+def get_cache():
+    """ The project's bundle cache, or None if it is turned off """
+    size = fileoperations.get_config_setting(
+        'global', 'bundle-cache-size', default=DEFAULT_SIZE)
+    try:
+        size = int(size)
+    except (TypeError, ValueError):
+        LOG.debug('Invalid bundle-cache-size: {0}'.format(size))
+        size = DEFAULT_SIZE
+    if size <= 0:
+        return None
+    return BundleCache(fileoperations.get_bundle_cache_location(), size)
+
+
+def make_key(*parts):
+    """ A cache key made of tree hashes, commits and other bundle inputs """
+    return hashlib.sha1('\n'.join(str(p) for p in parts)
+                        .encode('utf-8')).hexdigest()
+
+
+class BundleCache(object):
+    def __init__(self, folder, size=DEFAULT_SIZE):
+        self.folder = folder
+        self.size = size
+
+    def fetch(self, key, location):
+        """
+        Puts the bundle cached under `key` at `location`.
+        :return: True if the bundle was cached
+        """
+        cached = self._get_path(key)
+        if not os.path.isfile(cached):
+            return False
+        try:
+            # The modification time orders the bundles for eviction
+            os.utime(cached, None)
+            _link_or_copy(cached, location)
+        except (IOError, OSError) as e:
+            LOG.debug('Unable to reuse cached bundle {0}: {1}'.format(cached, e))
+            return False
+        return True
+
+    def store(self, key, location):
+        """ Adds the bundle at `location` to the cache """
+        cached = self._get_path(key)
+        fd, temp_name = tempfile.mkstemp(dir=self.folder, suffix='.tmp')
+        os.close(fd)
+        try:
+            _link_or_copy(location, temp_name)
+            if os.path.exists(cached):
+                # os.rename does not replace files on Windows
+                os.remove(cached)
+            os.rename(temp_name, cached)
+        except (IOError, OSError) as e:
+            LOG.debug('Unable to cache bundle {0}: {1}'.format(location, e))
+            fileoperations.delete_file(temp_name)
+            return
+        self.evict()
+
+    def evict(self):
+        bundles = []
+        for name in os.listdir(self.folder):
+            path = os.path.join(self.folder, name)
+            try:
+                if name.endswith(BUNDLE_EXTENSION):
+                    bundles.append((os.path.getmtime(path), path))
+            except OSError:
+                continue
+
+        bundles.sort(reverse=True)
+        for _, path in bundles[self.size:]:
+            LOG.debug('Evicting cached bundle ' + path)
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def _get_path(self, key):
+        return os.path.join(self.folder, key + BUNDLE_EXTENSION)
+
+
+def _link_or_copy(source, destination):
+    fileoperations.delete_file(destination)
+    try:
+        os.link(source, destination)
+    except (AttributeError, OSError):
+        # No hard links on this platform or across these file systems
+        shutil.copyfile(source, destination)
@@ -0,0 +1,124 @@
+# Copyright 2017 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"). You
+# may not use this file except in compliance with the License. A copy of
+# the License is located at
+#
+# http://aws.amazon.com/apache2.0/
+#
+# or in the "license" file accompanying this file. This file is
+# distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF
+# ANY KIND, either express or implied. See the License for the specific
+# language governing permissions and limitations under the License.
+
+"""
+On-disk cache of temporary credentials shared between eb invocations.
+
+botocore's assume role, web identity and SSO credential providers accept a
+dict-like cache for the STS responses they fetch. CredentialCache is such a
+cache, stored as one JSON file per profile and role under
+~/.elasticbeanstalk/cache/credentials. The folder is only readable by the
+current user.
+
+Entries that are about to expire are reported as missing, so credentials
+are refreshed before they run out rather than during a command.
+"""
+
+import datetime
+import json
+import os
+import tempfile
+
+from cement.utils.misc import minimal_logger
+from dateutil import parser, tz
+
+from ..core import fileoperations
+
+LOG = minimal_logger(__name__)
+
+CACHE_FOLDER_NAME = os.path.join('cache', 'credentials')
+REFRESH_WINDOW = datetime.timedelta(minutes=15)
+CACHED_PROVIDERS = ['assume-role', 'assume-role-with-web-identity', 'sso']
+
+
+def set_up_session(session):
+    """ Makes the credential providers of a botocore session use the cache """
+    try:
+        resolver = session.get_component('credential_provider')
+    except Exception as e:
+        LOG.debug('Unable to set up credential cache: {0}'.format(e))
+        return
+
+    cache = CredentialCache(session.profile)
+    for method in CACHED_PROVIDERS:
+        provider = resolver.get_provider(method) \
+            if hasattr(resolver, 'get_provider') else None
+        if provider is not None and hasattr(provider, 'cache'):
+            provider.cache = cache
+
+
+def get_cache_folder():
+    folder = os.path.join(fileoperations.get_user_eb_folder(),
+                          CACHE_FOLDER_NAME)
+    if not os.path.isdir(folder):
+        os.makedirs(folder, 0o700)
+    return folder
+
+
+class CredentialCache(object):
+    def __init__(self, profile):
+        self.profile = profile or 'default'
+
+    def __contains__(self, key):
+        return self._load(key) is not None
+
+    def __getitem__(self, key):
+        value = self._load(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value):
+        filename = self._get_filename(key)
+        folder = os.path.dirname(filename)
+        fd, temp_name = tempfile.mkstemp(dir=folder, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(value, f, default=_serialize)
+            if os.path.exists(filename):
+                # os.rename does not replace files on Windows
+                os.remove(filename)
+            os.rename(temp_name, filename)
+        except (IOError, OSError) as e:
+            LOG.debug('Unable to cache credentials: {0}'.format(e))
+            if os.path.exists(temp_name):
+                os.remove(temp_name)
+
+    def _load(self, key):
+        filename = self._get_filename(key)
+        try:
+            with open(filename) as f:
+                value = json.load(f)
+            expiration = parser.parse(value['Credentials']['Expiration'])
+        except (IOError, OSError, ValueError, KeyError, TypeError):
+            return None
+
+        if expiration.tzinfo is None:
+            expiration = expiration.replace(tzinfo=tz.tzutc())
+        if expiration - datetime.datetime.now(tz.tzutc()) < REFRESH_WINDOW:
+            LOG.debug('Cached credentials for {0} are about to expire'
+                      .format(self.profile))
+            return None
+        return value
+
+    def _get_filename(self, key):
+        name = '{0}--{1}.json'.format(self.profile, key)
+        for c in (':', '/', os.sep):
+            name = name.replace(c, '_')
+        return os.path.join(get_cache_folder(), name)
+
+
+def _serialize(obj):
+    if isinstance(obj, datetime.datetime):
+        return obj.isoformat()
+    raise TypeError('{0} is not JSON serializable'.format(obj))
@@ -11,7 +11,10 @@
 # ANY KIND, either express or implied. See the License for the specific
 # language governing permissions and limitations under the License.
 
+import copy
 import datetime
+import json
+import threading
 import time
 
 from cement.utils.misc import minimal_logger
@@ -32,14 +35,72 @@ from ebcli.resources.strings import strings, responses
 LOG = minimal_logger(__name__)
 
 DEFAULT_ROLE_NAME = 'aws-elasticbeanstalk-ec2-role'
+APP_VERSIONS_PAGE_SIZE = 1000  # Most versions describe_application_versions returns
+
+# Read-only calls which are memoized for the life of the command. They are
+# commonly repeated with identical arguments, e.g. by get_environment and
+# application_exist.
+CACHED_OPERATIONS = {
+    'describe_applications',
+    'describe_application_versions',
+    'describe_configuration_settings',
+    'describe_environments',
+}
+READ_ONLY_PREFIXES = ('describe_', 'list_', 'check_', 'retrieve_',
+                      'validate_')
+
+_cache = {}
+_cache_stats = {'hits': 0, 'misses': 0}
+_cache_lock = threading.Lock()
 
 
 def _make_api_call(operation_name, **operation_options):
+    if operation_name in CACHED_OPERATIONS:
+        return _make_cached_api_call(operation_name, **operation_options)
+
+    if not operation_name.startswith(READ_ONLY_PREFIXES):
+        # Anything that may change state makes cached reads stale
+        invalidate_cache()
+
     return aws.make_api_call('elasticbeanstalk',
                              operation_name,
                              **operation_options)
 
 
+def _make_cached_api_call(operation_name, **operation_options):
+    key = (aws.get_client_context(),
+           operation_name,
+           json.dumps(operation_options, sort_keys=True, default=str))
+    with _cache_lock:
+        if key in _cache:
+            _cache_stats['hits'] += 1
+            LOG.debug('Cache hit for ' + operation_name)
+            return copy.deepcopy(_cache[key])
+        _cache_stats['misses'] += 1
+
+    result = aws.make_api_call('elasticbeanstalk',
+                               operation_name,
+                               **operation_options)
+    with _cache_lock:
+        _cache[key] = copy.deepcopy(result)
+    return result
+
+
+def invalidate_cache():
+    """
+    Drops all memoized describe calls. Mutating calls do this
+    automatically; code polling for a change made by the service itself
+    must call it before every poll.
+    """
+    with _cache_lock:
+        _cache.clear()
+
+
+def get_cache_stats():
+    with _cache_lock:
+        return dict(_cache_stats)
+
+
 def delete_platform(arn):
     LOG.debug('Inside delete_platform api wrapper')
     return _make_api_call('delete_platform_version',
@@ -311,12 +372,13 @@ def delete_application(app_name):
     return result['ResponseMetadata']['RequestId']
 
 
-def delete_application_version(app_name, version_label):
+def delete_application_version(app_name, version_label,
+                               delete_source_bundle=True):
     LOG.debug('Inside delete_application_version api wrapper')
     result = _make_api_call('delete_application_version',
                             ApplicationName=app_name,
                             VersionLabel=version_label,
-                            DeleteSourceBundle=True)
+                            DeleteSourceBundle=delete_source_bundle)
     return result['ResponseMetadata']['RequestId']
 
 
@@ -444,6 +506,23 @@ def get_application_versions(app_name, version_labels=None, max_records=None, ne
     return result
 
 
+def get_all_application_versions(app_name):
+    """
+    Yields every application version of an application, one
+    describe_application_versions page at a time.
+    """
+    LOG.debug('Inside get_all_application_versions api wrapper')
+    next_token = None
+    while True:
+        result = get_application_versions(
+            app_name, max_records=APP_VERSIONS_PAGE_SIZE, next_token=next_token)
+        for version in result['ApplicationVersions']:
+            yield version
+        next_token = result.get('NextToken')
+        if not next_token:
+            return
+
+
 def get_all_applications():
     LOG.debug('Inside get_all_applications api wrapper')
     result = _make_api_call('describe_applications')
@@ -505,15 +584,33 @@ def get_app_environments(app_name, include_deleted=False, deleted_back_to=None):
 
 def get_all_environments():
     LOG.debug('Inside get_all_environments api wrapper')
-    result = _make_api_call('describe_environments',
-                            IncludeDeleted=False)
     # convert to object
     envs = []
-    for env in result['Environments']:
+    for env in get_raw_environments_for_all_apps():
         envs.append(_api_to_environment(env))
     return envs
 
 
+def get_raw_environments_for_all_apps(**kwargs):
+    """
+    Yields the environments of every application in the account, one
+    describe_environments page at a time.
+    """
+    LOG.debug('Inside get_raw_environments_for_all_apps api wrapper')
+    next_token = None
+    while True:
+        if next_token:
+            kwargs['NextToken'] = next_token
+        result = _make_api_call('describe_environments',
+                                IncludeDeleted=False,
+                                **kwargs)
+        for env in result['Environments']:
+            yield env
+        next_token = result.get('NextToken')
+        if not next_token:
+            return
+
+
 def get_environment(app_name, env_name, env_id=None, include_deleted=False, deleted_back_to=None, want_solution_stack=False):
     LOG.debug('Inside get_environment api wrapper')
 
@@ -548,7 +645,7 @@ def get_environments(env_names=[]):
     envs = result['Environments']
     if len(envs) < 1:
         raise NotFoundError('Could not find any environments '
-                            'from the list: [' + env_names + ']')
+                            'from the list: [' + ', '.join(env_names) + ']')
     return [_api_to_environment(env) for env in envs]
 
 
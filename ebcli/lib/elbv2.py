@@ -51,15 +51,20 @@ def get_instance_healths_from_target_groups(target_group_arns):
 
     return instance_healths #map of instance_id => [target group health descrpitions]
 
+def get_target_health(target_group_arn):
+    try:
+        return _make_api_call('describe_target_health',
+                              TargetGroupArn=target_group_arn)
+    except ServiceError as e:
+        if e.code == 'TargetGroupNotFound':
+            raise NotFoundError(e)
+        else:
+            raise e
+
+
 def get_target_group_healths(target_group_arns):
     results = {}
     for arn in target_group_arns:
-        try:
-            results[arn] = _make_api_call('describe_target_health', TargetGroupArn=arn)
-        except ServiceError as e:
-            if e.code == 'TargetGroupNotFound':
-                raise NotFoundError(e)
-            else:
-                raise e
+        results[arn] = get_target_health(arn)
 
     return results #map of target_group_arn => [target group health descrpitions]
@@ -11,8 +11,8 @@
 # ANY KIND, either express or implied. See the License for the specific
 # language governing permissions and limitations under the License.
 
+from ..core import inventory
 from ..core.fileoperations import program_is_installed
-import glob
 import os
 
 
@@ -82,11 +82,7 @@ def directory_is_empty():
     """
     Directory contains no files or folders (ignore dot-files)
     """
-    lst = [f for f in os.listdir('./') if not f.startswith('.')]
-    if len(lst) < 1:
-        return True
-    else:
-        return False
+    return _get_inventory().is_empty()
 
 
 def smells_of_node_js():
@@ -140,10 +136,16 @@ def is_boot2docker_installed():
     return program_is_installed('boot2docker')
 
 
+def _get_inventory():
+    # Shared with zipping when run from the project root
+    return inventory.get_inventory(os.getcwd())
+
+
 def _get_file_list(*args):
     lst = []
+    current_inventory = _get_inventory()
     for a in args:
-        lst += glob.glob(a)
+        lst += current_inventory.glob(a)
     return lst
 
 
@@ -0,0 +1,182 @@
+# Copyright 2017 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"). You
+# may not use this file except in compliance with the License. A copy of
+# the License is located at
+#
+# http://aws.amazon.com/apache2.0/
+#
+# or in the "license" file accompanying this file. This file is
+# distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF
+# ANY KIND, either express or implied. See the License for the specific
+# language governing permissions and limitations under the License.
+
+"""
+Timing of the phases of a command (eb --profile-run).
+
+Slow steps of a command are wrapped in named phases, either with
+`@profiling.phase('name')` or `with profiling.phase('name'):`. While
+profiling is off, entering a phase only checks a module global. While it
+is on, every phase records its calls and wall-clock time, and nested
+phases are shown under the phase they first ran in. With --profile-output,
+the whole command also runs under cProfile and its stats are dumped for
+`python -m pstats`.
+"""
+
+import functools
+import threading
+import time
+
+from cement.utils.misc import minimal_logger
+
+LOG = minimal_logger(__name__)
+
+_profiler = None
+
+
+def start(profile_output=None):
+    global _profiler
+    _profiler = Profiler(profile_output)
+
+
+def is_enabled():
+    return _profiler is not None
+
+
+def finish():
+    """
+    Stops profiling and writes the cProfile stats if requested.
+    :return: the profiler, or None if profiling was not started
+    """
+    if _profiler is None:
+        return None
+    _profiler.stop()
+    return _profiler
+
+
+class phase(object):
+    """ Times a block or, used as a decorator, every call of a function """
+    def __init__(self, name):
+        self.name = name
+        self.start_time = None
+
+    def __enter__(self):
+        if _profiler is not None:
+            self.start_time = _profiler.enter(self.name)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if _profiler is not None and self.start_time is not None:
+            _profiler.exit(self.name, self.start_time)
+        self.start_time = None
+
+    def __call__(self, function):
+        name = self.name
+
+        @functools.wraps(function)
+        def timed(*args, **kwargs):
+            # A new phase per call, as calls can overlap across threads
+            with phase(name):
+                return function(*args, **kwargs)
+        return timed
+
+
+class PhaseStats(object):
+    def __init__(self, name, parent, depth):
+        self.name = name
+        self.parent = parent
+        self.depth = depth
+        self.calls = 0
+        self.total = 0.0
+        self.longest = 0.0
+
+
+class Profiler(object):
+    def __init__(self, profile_output=None):
+        self.profile_output = profile_output
+        self.start_time = time.time()
+        self.end_time = None
+        self.phases = {}
+        self.order = []
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.cprofile = None
+        if profile_output:
+            import cProfile
+            self.cprofile = cProfile.Profile()
+            self.cprofile.enable()
+
+    def enter(self, name):
+        stack = self._get_stack()
+        parent = stack[-1] if stack else None
+        with self.lock:
+            if name not in self.phases:
+                depth = self.phases[parent].depth + 1 if parent else 0
+                self.phases[name] = PhaseStats(name, parent, depth)
+                self.order.append(name)
+        stack.append(name)
+        return time.time()
+
+    def exit(self, name, start_time):
+        elapsed = time.time() - start_time
+        stack = self._get_stack()
+        if stack and stack[-1] == name:
+            stack.pop()
+        with self.lock:
+            stats = self.phases[name]
+            stats.calls += 1
+            stats.total += elapsed
+            stats.longest = max(stats.longest, elapsed)
+
+    def stop(self):
+        if self.end_time is not None:
+            return
+        self.end_time = time.time()
+        if self.cprofile is not None:
+            self.cprofile.disable()
+            LOG.debug('Writing cProfile stats to ' + self.profile_output)
+            self.cprofile.dump_stats(self.profile_output)
+
+    def get_duration(self):
+        return (self.end_time or time.time()) - self.start_time
+
+    def get_phases(self):
+        """ Phases in display order: every phase is followed by its children """
+        with self.lock:
+            children = {}
+            for name in self.order:
+                children.setdefault(self.phases[name].parent, []).append(name)
+
+            ordered = []
+
+            def add(parent):
+                for name in children.get(parent, []):
+                    ordered.append(self.phases[name])
+                    add(name)
+            add(None)
+            return ordered
+
+    def get_summary(self):
+        """ The phase table printed at the end of the command, as lines """
+        duration = self.get_duration()
+        rows = [('phase', 'calls', 'total (s)', 'max (s)', '% of run')]
+        for stats in self.get_phases():
+            rows.append(('  ' * stats.depth + stats.name,
+                         str(stats.calls),
+                         '{0:.3f}'.format(stats.total),
+                         '{0:.3f}'.format(stats.longest),
+                         '{0:.1f}'.format(100 * stats.total / duration
+                                          if duration else 0)))
+        rows.append(('command', '1', '{0:.3f}'.format(duration),
+                     '{0:.3f}'.format(duration), '100.0'))
+
+        widths = [max(len(row[i]) for row in rows) for i in range(len(rows[0]))]
+        return ['  '.join([row[0].ljust(widths[0])] +
+                          [value.rjust(width)
+                           for value, width in zip(row[1:], widths[1:])])
+                for row in rows]
+
+    def _get_stack(self):
+        if not hasattr(self.local, 'stack'):
+            self.local.stack = []
+        return self.local.stack
@@ -0,0 +1,231 @@
+# Copyright 2017 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"). You
+# may not use this file except in compliance with the License. A copy of
+# the License is located at
+#
+# http://aws.amazon.com/apache2.0/
+#
+# or in the "license" file accompanying this file. This file is
+# distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF
+# ANY KIND, either express or implied. See the License for the specific
+# language governing permissions and limitations under the License.
+
+"""
+Client side rate limiting of API calls.
+
+Every (service, region) pair gets a token bucket that all threads share.
+The bucket rate adapts with AIMD: every successful call raises the rate
+by ADDITIVE_INCREASE requests per second, up to the configured maximum,
+and every throttling response multiplies it by MULTIPLICATIVE_DECREASE.
+
+When `shared` is enabled, the bucket state lives in a file under
+~/.elasticbeanstalk/ratelimit and is guarded by a file lock, so that
+several eb processes running against the same account back off together.
+"""
+
+import json
+import os
+import threading
+import time
+
+from cement.utils.misc import minimal_logger
+
+from ..core import fileoperations
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+LOG = minimal_logger(__name__)
+
+DEFAULT_MAX_RATE = 20.0
+MIN_RATE = 0.5
+ADDITIVE_INCREASE = 0.5
+MULTIPLICATIVE_DECREASE = 0.5
+RATE_LIMIT_FOLDER_NAME = 'ratelimit'
+
+_max_rates = {}
+_shared = False
+_buckets = {}
+_buckets_lock = threading.Lock()
+
+
+def configure(max_rates=None, shared=False):
+    """
+    :param max_rates: dict of service name to maximum requests per second
+    :param shared: share the buckets with other eb processes through a lock file
+    """
+    global _max_rates, _shared
+    with _buckets_lock:
+        _max_rates = dict((k, float(v)) for k, v in (max_rates or {}).items())
+        if shared and fcntl is None:
+            LOG.debug('File locking is not available, rate limits '
+                      'will not be shared between processes')
+            shared = False
+        _shared = shared
+        _buckets.clear()
+
+
+def acquire(service_name, region):
+    """ Blocks until a call may be made, returns the seconds spent waiting """
+    return _get_bucket(service_name, region).acquire()
+
+
+def on_success(service_name, region):
+    _get_bucket(service_name, region).on_success()
+
+
+def on_throttle(service_name, region):
+    _get_bucket(service_name, region).on_throttle()
+
+
+def _get_bucket(service_name, region):
+    key = (service_name, region)
+    with _buckets_lock:
+        bucket = _buckets.get(key)
+        if bucket is None:
+            max_rate = _max_rates.get(service_name, DEFAULT_MAX_RATE)
+            if _shared:
+                bucket = SharedTokenBucket(max_rate, service_name, region)
+            else:
+                bucket = TokenBucket(max_rate)
+            _buckets[key] = bucket
+        return bucket
+
+
+def _refill(state, now):
+    elapsed = max(0, now - state['last'])
+    capacity = max(1.0, state['rate'])
+    state['tokens'] = min(capacity, state['tokens'] + elapsed * state['rate'])
+    state['last'] = now
+
+
+def _take(state):
+    """ Takes a token from `state`, returns how long to wait if there is none """
+    _refill(state, time.time())
+    if state['tokens'] >= 1:
+        state['tokens'] -= 1
+        return 0
+    return (1 - state['tokens']) / state['rate']
+
+
+def _increase(state, max_rate):
+    state['rate'] = min(max_rate, state['rate'] + ADDITIVE_INCREASE)
+
+
+def _decrease(state):
+    _refill(state, time.time())
+    state['rate'] = max(MIN_RATE, state['rate'] * MULTIPLICATIVE_DECREASE)
+    # Drop any burst so the lower rate applies right away
+    state['tokens'] = min(state['tokens'], 0)
+    LOG.debug('Throttled, lowering request rate to {0:.2f}/s'
+              .format(state['rate']))
+
+
+def _new_state(max_rate):
+    return {'rate': max_rate, 'tokens': max(1.0, max_rate), 'last': time.time()}
+
+
+class TokenBucket(object):
+    def __init__(self, max_rate):
+        self.max_rate = max_rate
+        self.state = _new_state(max_rate)
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        waited = 0
+        while True:
+            with self.lock:
+                wait = _take(self.state)
+            if not wait:
+                return waited
+            time.sleep(wait)
+            waited += wait
+
+    def on_success(self):
+        with self.lock:
+            _increase(self.state, self.max_rate)
+
+    def on_throttle(self):
+        with self.lock:
+            _decrease(self.state)
+
+
+class SharedTokenBucket(TokenBucket):
+    """ A TokenBucket whose state is kept in a file shared by all eb processes """
+
+    def __init__(self, max_rate, service_name, region):
+        super(SharedTokenBucket, self).__init__(max_rate)
+        folder = os.path.join(fileoperations.get_user_eb_folder(),
+                              RATE_LIMIT_FOLDER_NAME)
+        if not os.path.isdir(folder):
+            os.makedirs(folder)
+        self.filename = os.path.join(
+            folder, '{0}-{1}.json'.format(service_name, region))
+
+    def acquire(self):
+        waited = 0
+        while True:
+            with self._locked_state() as state:
+                wait = _take(state)
+            if not wait:
+                return waited
+            time.sleep(wait)
+            waited += wait
+
+    def on_success(self):
+        with self._locked_state() as state:
+            _increase(state, self.max_rate)
+
+    def on_throttle(self):
+        with self._locked_state() as state:
+            _decrease(state)
+
+    def _locked_state(self):
+        return _LockedState(self)
+
+
+class _LockedState(object):
+    """ Reads, locks and writes back the state of a SharedTokenBucket """
+
+    def __init__(self, bucket):
+        self.bucket = bucket
+        self.f = None
+        self.state = None
+
+    def __enter__(self):
+        self.bucket.lock.acquire()
+        try:
+            self.f = open(self.bucket.filename, 'a+')
+            fcntl.flock(self.f, fcntl.LOCK_EX)
+            self.f.seek(0)
+            try:
+                self.state = json.loads(self.f.read())
+            except ValueError:
+                # New or corrupt file
+                self.state = _new_state(self.bucket.max_rate)
+            # The configured maximum of this process wins
+            self.state['rate'] = min(self.state['rate'], self.bucket.max_rate)
+        except:
+            self._release()
+            raise
+        return self.state
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        try:
+            self.f.seek(0)
+            self.f.truncate()
+            self.f.write(json.dumps(self.state))
+            self.f.flush()
+        finally:
+            self._release()
+
+    def _release(self):
+        try:
+            if self.f is not None:
+                fcntl.flock(self.f, fcntl.LOCK_UN)
+                self.f.close()
+        finally:
+            self.bucket.lock.release()
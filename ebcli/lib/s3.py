@@ -12,22 +12,35 @@
 # language governing permissions and limitations under the License.
 
 from __future__ import division
+import hashlib
+import json
 import os
 from io import BytesIO
 import math
 import threading
+import time
 
 from cement.utils.misc import minimal_logger
 
-from . import aws
-from ..objects.exceptions import NotFoundError, FileTooLargeError, UploadError
+from . import aws, profiling
+from ..objects.exceptions import NotFoundError, FileTooLargeError, \
+    UploadError, DownloadError, EBCLIException
 from ..core import io
 from .utils import static_var
 
 
 LOG = minimal_logger(__name__)
 CHUNK_SIZE = 5252880  # Minimum chunk size allowed by S3
-THREAD_COUNT = 8  # Number of threads to use for multithreaded mode
+THREAD_COUNT = 8  # Number of parts to upload at once in multithreaded mode
+DELETE_BATCH_SIZE = 1000  # Most keys S3 deletes in one request
+DELETE_ATTEMPTS = 5
+RETRYABLE_DELETE_ERRORS = ('InternalError', 'OperationAborted',
+                           'RequestTimeout', 'ServiceUnavailable', 'SlowDown')
+DOWNLOAD_CHUNK_SIZE = 8388608  # Size of the ranges of a parallel download
+DOWNLOAD_READ_SIZE = 65536
+DOWNLOAD_ATTEMPTS = 5
+PARTIAL_DOWNLOAD_EXTENSION = '.part'
+DOWNLOAD_STATE_EXTENSION = '.json'
 
 
 def _make_api_call(operation_name, **operation_options):
@@ -69,14 +82,259 @@ def get_object(bucket, key):
     return result['Body'].read()
 
 
+@profiling.phase('s3 download')
+def download_object(bucket, key, location):
+    """
+    Download an object to a file without holding it in memory.
+    Objects larger than DOWNLOAD_CHUNK_SIZE are fetched in byte ranges on the
+    shared API executor and written into place in a preallocated file. The
+    file is checked against the ETag of the object before it is moved to
+    `location`, and an interrupted download of the same object resumes
+    with the ranges that were not written yet.
+    :param bucket: S3 bucket name
+    :param key: keyname of the object
+    :param location: full path of the file to write
+    :return: head_object response of the object
+    """
+    head = _make_api_call('head_object',
+                          Bucket=bucket,
+                          Key=key)
+    size = head['ContentLength']
+    etag = head['ETag']
+    partial_location = location + PARTIAL_DOWNLOAD_EXTENSION
+    state = _load_download_state(partial_location, etag, size)
+    ranges = _get_download_ranges(size)
+    pending = [r for r in ranges if r[0] not in state['done']]
+    LOG.debug('Downloading {0} bytes in {1} ranges, {2} already downloaded'
+              .format(size, len(ranges), len(ranges) - len(pending)))
+
+    if not state['done']:
+        with open(partial_location, 'wb') as f:
+            f.truncate(size)
+
+    show_progress = len(ranges) > 1
+    lock = threading.Lock()
+
+    def on_range_done(start):
+        with lock:
+            state['done'].append(start)
+            _save_download_state(partial_location, state)
+            if show_progress:
+                io.update_upload_progress(len(state['done']) / len(ranges))
+
+    if show_progress:
+        io.update_upload_progress(len(state['done']) / len(ranges))
+    jobs = [aws.submit_api_work(_download_range, bucket, key, etag,
+                                partial_location, start, end,
+                                len(ranges) > 1, on_range_done)
+            for start, end in pending]
+    aws.wait_for_futures(jobs)
+
+    _verify_download(bucket, key, partial_location, head)
+    if os.path.exists(location):
+        # os.rename does not replace files on Windows
+        os.remove(location)
+    os.rename(partial_location, location)
+    _delete_download_state(partial_location)
+    return head
+
+
+def _get_download_ranges(size):
+    """ Inclusive byte ranges of an object, a single one for small objects """
+    if size <= DOWNLOAD_CHUNK_SIZE:
+        return [(0, size - 1)]
+    return [(start, min(start + DOWNLOAD_CHUNK_SIZE, size) - 1)
+            for start in range(0, size, DOWNLOAD_CHUNK_SIZE)]
+
+
+def _download_range(bucket, key, etag, file_path, start, end, ranged,
+                    on_done):
+    options = dict(Bucket=bucket, Key=key, IfMatch=etag)
+    if ranged:
+        options['Range'] = 'bytes={0}-{1}'.format(start, end)
+
+    for attempt in range(1, DOWNLOAD_ATTEMPTS + 1):
+        try:
+            result = _make_api_call('get_object', **options)
+            written = _write_body(result['Body'], file_path, start)
+            break
+        except EBCLIException:
+            # API errors were already retried, and the object changing
+            # fails the IfMatch condition
+            raise
+        except Exception as e:
+            # Connections reset while the body is read
+            LOG.debug('Downloading bytes {0}-{1} failed (attempt {2}): {3}'
+                      .format(start, end, attempt, e))
+            if attempt == DOWNLOAD_ATTEMPTS:
+                raise DownloadError('Could not download {0}: {1}'
+                                    .format(key, e))
+
+    if written != end - start + 1:
+        raise DownloadError('Downloaded {0} bytes of {1} at offset {2}, '
+                            'expected {3}.'.format(written, key, start,
+                                                   end - start + 1))
+    on_done(start)
+
+
+def _write_body(body, file_path, offset):
+    written = 0
+    with open(file_path, 'r+b') as f:
+        f.seek(offset)
+        while True:
+            data = body.read(DOWNLOAD_READ_SIZE)
+            if not data:
+                break
+            f.write(data)
+            written += len(data)
+    return written
+
+
+def _load_download_state(partial_location, etag, size):
+    """
+    The ranges of `partial_location` written by a previous attempt, if it
+    was downloading the same version of the object with the same ranges
+    """
+    state_location = partial_location + DOWNLOAD_STATE_EXTENSION
+    try:
+        with open(state_location) as f:
+            state = json.load(f)
+        if state['etag'] == etag and state['size'] == size \
+                and state['chunk_size'] == DOWNLOAD_CHUNK_SIZE \
+                and os.path.getsize(partial_location) == size:
+            LOG.debug('Resuming download in ' + partial_location)
+            return state
+    except (IOError, OSError, ValueError, KeyError, TypeError):
+        pass
+    return {'etag': etag, 'size': size, 'chunk_size': DOWNLOAD_CHUNK_SIZE,
+            'done': []}
+
+
+def _save_download_state(partial_location, state):
+    try:
+        with open(partial_location + DOWNLOAD_STATE_EXTENSION, 'w') as f:
+            json.dump(state, f)
+    except (IOError, OSError) as e:
+        LOG.debug('Unable to save download state: {0}'.format(e))
+
+
+def _delete_download_state(partial_location):
+    try:
+        os.remove(partial_location + DOWNLOAD_STATE_EXTENSION)
+    except OSError:
+        pass
+
+
+def _verify_download(bucket, key, file_path, head):
+    """
+    Compares a downloaded file with the ETag of its object. The ETag is the
+    MD5 of the object, or for multipart uploads the MD5 of the MD5s of its
+    parts followed by the number of parts. ETags of objects encrypted with
+    KMS or customer keys are not MD5s and are not checked.
+    """
+    if head.get('ServerSideEncryption') == 'aws:kms' \
+            or head.get('SSECustomerAlgorithm'):
+        LOG.debug('Not verifying ETag of encrypted object ' + key)
+        return
+
+    etag = head['ETag'].strip('"')
+    if '-' in etag:
+        part_count = int(etag.split('-')[1])
+        part_size = head['ContentLength']
+        if part_count > 1:
+            part_size = _make_api_call('head_object',
+                                       Bucket=bucket,
+                                       Key=key,
+                                       PartNumber=1)['ContentLength']
+        digests = _get_part_digests(file_path, part_size)
+        actual = '{0}-{1}'.format(
+            hashlib.md5(b''.join(digests)).hexdigest(), len(digests))
+    else:
+        actual = _get_file_md5(file_path)
+
+    if actual != etag:
+        os.remove(file_path)
+        _delete_download_state(file_path)
+        raise DownloadError('Downloaded {0} does not match its ETag {1}.'
+                            .format(key, etag))
+
+
+def _get_part_digests(file_path, part_size):
+    """ MD5 digests of the consecutive `part_size` byte parts of a file """
+    digests = []
+    with open(file_path, 'rb') as f:
+        while True:
+            md5 = hashlib.md5()
+            remaining = part_size
+            while remaining > 0:
+                data = f.read(min(DOWNLOAD_READ_SIZE, remaining))
+                if not data:
+                    break
+                md5.update(data)
+                remaining -= len(data)
+            if remaining == part_size:
+                return digests
+            digests.append(md5.digest())
+
+
+def _get_file_md5(file_path):
+    md5 = hashlib.md5()
+    with open(file_path, 'rb') as f:
+        for data in iter(lambda: f.read(DOWNLOAD_READ_SIZE), b''):
+            md5.update(data)
+    return md5.hexdigest()
+
+
 def delete_objects(bucket, keys):
-    objects = [dict(Key=k) for k in keys]
-    result = _make_api_call('delete_objects',
-                            Bucket=bucket,
-                            Delete={'Objects': objects})
+    """
+    Delete keys from a bucket in batches of DELETE_BATCH_SIZE keys, sent
+    concurrently on the shared API executor. Keys that S3 could not delete
+    because of a transient error are retried in new batches.
+    :return: dict with the 'Deleted' keys and the 'Errors' left of all the
+        batches, and the 'Elapsed' seconds the deletion took
+    """
+    start_time = time.time()
+    result = {'Deleted': [], 'Errors': []}
+    pending = list(keys)
+    for attempt in range(1, DELETE_ATTEMPTS + 1):
+        if attempt > 1:
+            LOG.debug('Retrying deletion of {0} keys'.format(len(pending)))
+            time.sleep(0.5 * 2 ** (attempt - 2))
+        jobs = [aws.submit_api_work(_delete_batch, bucket,
+                                    pending[i:i + DELETE_BATCH_SIZE])
+                for i in range(0, len(pending), DELETE_BATCH_SIZE)]
+        batches = aws.wait_for_futures(jobs)
+        pending = []
+        for deleted, errors in batches:
+            result['Deleted'].extend(deleted)
+            for error in errors:
+                if error.get('Code') in RETRYABLE_DELETE_ERRORS \
+                        and attempt < DELETE_ATTEMPTS:
+                    pending.append(error['Key'])
+                else:
+                    result['Errors'].append(error)
+        if not pending:
+            break
+
+    result['Elapsed'] = time.time() - start_time
+    LOG.debug('Deleted {0} keys from {1} in {2:.2f} seconds, {3} errors'
+              .format(len(result['Deleted']), bucket, result['Elapsed'],
+                      len(result['Errors'])))
     return result
 
 
+def _delete_batch(bucket, keys):
+    # Quiet responses only list the keys that could not be deleted
+    response = _make_api_call('delete_objects',
+                              Bucket=bucket,
+                              Delete={'Objects': [dict(Key=k) for k in keys],
+                                      'Quiet': True})
+    errors = response.get('Errors', [])
+    failed = set(e['Key'] for e in errors)
+    return [k for k in keys if k not in failed], errors
+
+
+@profiling.phase('s3 upload')
 def upload_workspace_version(bucket, key, file_path, workspace_type='Application'):
     try:
         size = os.path.getsize(file_path)
@@ -135,20 +393,13 @@ def multithreaded_upload(bucket, key, file_path):
     try:
         etaglist = []  # list for part id's (etags)
         with open(file_path, 'rb') as f:
-            # Create threads to handle parts of upload
+            # Upload parts on the shared API executor
             lock = threading.Lock()
-            jobs = []
-            for i in range(THREAD_COUNT):
-                p = threading.Thread(
-                    target=_upload_chunk,
-                    args=(f, lock, etaglist, total_parts,
-                          bucket, key, upload_id),
-                    )
-                p.daemon = True
-                jobs.append(p)
-                p.start()
-
-            _wait_for_threads(jobs)
+            jobs = [aws.submit_api_work(_upload_chunk, f, lock, etaglist,
+                                        total_parts, bucket, key, upload_id)
+                    for i in range(THREAD_COUNT)]
+
+            aws.wait_for_futures(jobs)
 
         # S3 requires the etag list to be sorted
         etaglist = sorted(etaglist, key=lambda k: k['PartNumber'])
@@ -173,27 +424,6 @@ def multithreaded_upload(bucket, key, file_path):
         raise
 
 
-def _wait_for_threads(jobs):
-    alive = True
-    while alive:
-        alive = False
-        for j in jobs:
-            """
-            We want to wait forever for the thread to finish.
-            j.join() however is a halting call. We need to pass in a
-            time to j.join() so it is non halting. This way a user can use
-            CTRL+C to terminate the command. 2**31 is the largest number we
-            can pass into j.join()
-            """
-            try:
-                timeout = threading.TIMEOUT_MAX
-            except AttributeError:  # Python 2
-                timeout = 2**16  # 18 hours should be sufficient.
-            j.join(timeout)
-            if j.isAlive():
-                alive = True
-
-
 def _upload_chunk(f, lock, etaglist, total_parts, bucket, key, upload_id):
     LOG.debug('Creating child thread')
     while True:
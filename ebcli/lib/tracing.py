@@ -0,0 +1,167 @@
+# Copyright 2017 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"). You
+# may not use this file except in compliance with the License. A copy of
+# the License is located at
+#
+# http://aws.amazon.com/apache2.0/
+#
+# or in the "license" file accompanying this file. This file is
+# distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF
+# ANY KIND, either express or implied. See the License for the specific
+# language governing permissions and limitations under the License.
+
+"""
+Structured tracing of API calls made through aws.make_api_call.
+
+Tracing is off unless `start` is called (eb --trace FILE). While it is off,
+make_api_call only pays for a single `is_enabled` check per call.
+"""
+
+import json
+import os
+import threading
+import time
+
+from cement.utils.misc import minimal_logger
+
+LOG = minimal_logger(__name__)
+
+FORMAT_CHROME = 'chrome'
+FORMAT_JSON = 'json'
+FORMATS = [FORMAT_CHROME, FORMAT_JSON]
+
+_tracer = None
+
+
+def start(filename, trace_format=FORMAT_CHROME):
+    global _tracer
+    _tracer = Tracer(filename, trace_format)
+
+
+def is_enabled():
+    return _tracer is not None
+
+
+def start_call(service_name, operation_name, operation_options):
+    return ApiCall(_tracer, service_name, operation_name, operation_options)
+
+
+def write():
+    """ Writes the trace file if tracing was started, returns its name """
+    if _tracer is None:
+        return None
+    _tracer.write()
+    return _tracer.filename
+
+
+class Tracer(object):
+    def __init__(self, filename, trace_format):
+        self.filename = filename
+        self.trace_format = trace_format
+        self.start_time = time.time()
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def add(self, call):
+        with self.lock:
+            self.calls.append(call)
+
+    def write(self):
+        with self.lock:
+            calls = list(self.calls)
+
+        if self.trace_format == FORMAT_JSON:
+            data = {
+                'start': self.start_time,
+                'duration': time.time() - self.start_time,
+                'calls': [c.to_dict() for c in calls],
+            }
+        else:
+            data = {
+                'displayTimeUnit': 'ms',
+                'traceEvents': [c.to_chrome_event(self.start_time)
+                                for c in calls],
+            }
+
+        LOG.debug('Writing trace of {0} API calls to {1}'
+                  .format(len(calls), self.filename))
+        with open(self.filename, 'w') as f:
+            json.dump(data, f, indent=1, sort_keys=True)
+
+
+class ApiCall(object):
+    def __init__(self, tracer, service_name, operation_name, operation_options):
+        self.tracer = tracer
+        self.service_name = service_name
+        self.operation_name = operation_name
+        self.request_bytes = _get_size(operation_options)
+        self.thread_name = threading.current_thread().name
+        self.thread_id = threading.current_thread().ident
+        self.attempts = 0
+        self.retry_delay = 0
+        self.throttle_wait = 0
+        self.errors = []
+        self.status = None
+        self.response_bytes = None
+        self.start = time.time()
+        self.end = None
+
+    def add_attempt(self, retry_delay, throttle_wait):
+        self.attempts += 1
+        self.retry_delay += retry_delay
+        self.throttle_wait += throttle_wait
+
+    def add_error(self, error):
+        self.errors.append(error)
+
+    def finish(self, response_data=None):
+        self.end = time.time()
+        if response_data:
+            metadata = response_data.get('ResponseMetadata', {})
+            self.status = metadata.get('HTTPStatusCode')
+            length = metadata.get('HTTPHeaders', {}).get('content-length')
+            if length is not None:
+                self.response_bytes = int(length)
+            else:
+                self.response_bytes = _get_size(response_data)
+        self.tracer.add(self)
+
+    def to_dict(self):
+        return {
+            'service': self.service_name,
+            'operation': self.operation_name,
+            'thread': self.thread_name,
+            'start': self.start,
+            'duration': self.end - self.start,
+            'attempts': self.attempts,
+            'retries': max(0, self.attempts - 1),
+            'retry_delay': self.retry_delay,
+            'throttle_wait': self.throttle_wait,
+            'request_bytes': self.request_bytes,
+            'response_bytes': self.response_bytes,
+            'status': self.status,
+            'errors': self.errors,
+        }
+
+    def to_chrome_event(self, start_time):
+        args = self.to_dict()
+        for key in ['service', 'operation', 'thread', 'start', 'duration']:
+            del args[key]
+        return {
+            'name': '{0}.{1}'.format(self.service_name, self.operation_name),
+            'cat': self.service_name,
+            'ph': 'X',
+            'ts': int((self.start - start_time) * 1e6),
+            'dur': int((self.end - self.start) * 1e6),
+            'pid': os.getpid(),
+            'tid': self.thread_id,
+            'args': args,
+        }
+
+
+def _get_size(data):
+    try:
+        return len(json.dumps(data, default=str))
+    except (TypeError, ValueError):
+        return None
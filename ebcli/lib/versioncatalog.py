@@ -0,0 +1,315 @@
+# Copyright 2017 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"). You
+# may not use this file except in compliance with the License. A copy of
+# the License is located at
+#
+# http://aws.amazon.com/apache2.0/
+#
+# or in the "license" file accompanying this file. This file is
+# distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF
+# ANY KIND, either express or implied. See the License for the specific
+# language governing permissions and limitations under the License.
+
+"""
+Local catalog of the application versions of an application.
+
+Applications can have thousands of versions, and describe_application_versions
+returns them a page at a time, so listing them for every label lookup is
+slow. A VersionCatalog keeps the versions of one application newest first,
+indexed by label and by status, and saves them as JSON under
+~/.elasticbeanstalk/versions for every profile, region and application.
+
+Syncing reads describe_application_versions pages newest first and stops at
+the first version the catalog already knows, then refreshes the versions
+that were still being processed. A catalog syncs at most once per command,
+and labels it does not know are looked up with the service. Versions deleted
+by something other than this eb are only dropped by a full sync, which
+happens when the last one is older than FULL_SYNC_INTERVAL. The
+'version-catalog' global setting set to false stops saving catalogs, so every
+command starts with a full sync.
+"""
+
+import calendar
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+
+from cement.utils.misc import minimal_logger
+from dateutil import parser
+
+from . import aws, elasticbeanstalk
+from ..core import fileoperations
+
+LOG = minimal_logger(__name__)
+
+CATALOG_FOLDER_NAME = 'versions'
+CATALOG_VERSION = 1
+FULL_SYNC_INTERVAL = 86400  # seconds
+SYNC_PAGE_SIZE = 100
+REFRESH_BATCH_SIZE = 100
+PENDING_STATUSES = ('BUILDING', 'PROCESSING')
+DATE_FIELDS = ('DateCreated', 'DateUpdated')
+
+_catalogs = {}
+_lock = threading.Lock()
+
+
+def get_catalog(app_name):
+    """ The catalog of `app_name` for the current profile and region """
+    key = (aws.get_profile(), aws.get_region_name(), app_name)
+    with _lock:
+        catalog = _catalogs.get(key)
+        if catalog is None:
+            catalog = VersionCatalog(app_name)
+            if fileoperations.get_config_setting(
+                    'global', 'version-catalog', default=True) is not False:
+                catalog.use_file(_get_catalog_file(*key))
+            _catalogs[key] = catalog
+        return catalog
+
+
+def _get_catalog_file(profile, region, app_name):
+    folder = os.path.join(fileoperations.get_user_eb_folder(),
+                          CATALOG_FOLDER_NAME)
+    if not os.path.isdir(folder):
+        os.makedirs(folder)
+    name = hashlib.sha1('\n'.join(str(p) for p in (profile, region, app_name))
+                        .encode('utf-8')).hexdigest()
+    return os.path.join(folder, name + '.json')
+
+
+class VersionCatalog(object):
+    def __init__(self, app_name):
+        self.app_name = app_name
+        self.catalog_file = None
+        self.versions = []
+        self.full_sync_time = None
+        self.synced = False
+        self.by_label = {}
+        self.by_status = {}
+        self.lock = threading.RLock()
+
+    def use_file(self, catalog_file):
+        """ Starts from, and saves to, the catalog in `catalog_file` """
+        self.catalog_file = catalog_file
+        try:
+            with open(catalog_file) as f:
+                data = json.load(f)
+            if data.get('version') != CATALOG_VERSION \
+                    or data.get('app') != self.app_name:
+                return
+            versions = [_decode(v) for v in data['versions']]
+            full_sync_time = data['full_sync_time']
+        except (IOError, OSError, ValueError, KeyError, TypeError) as e:
+            LOG.debug('Not using version catalog {0}: {1}'
+                      .format(catalog_file, e))
+            return
+        with self.lock:
+            self.versions = versions
+            self.full_sync_time = full_sync_time
+            self._index()
+
+    def save(self):
+        if not self.catalog_file:
+            return
+        with self.lock:
+            data = {'version': CATALOG_VERSION,
+                    'app': self.app_name,
+                    'full_sync_time': self.full_sync_time,
+                    'versions': [_encode(v) for v in self.versions]}
+        folder = os.path.dirname(self.catalog_file)
+        try:
+            fd, temp_name = tempfile.mkstemp(dir=folder, suffix='.tmp')
+            with os.fdopen(fd, 'w') as f:
+                json.dump(data, f, default=str)
+            if os.path.exists(self.catalog_file):
+                # os.rename does not replace files on Windows
+                os.remove(self.catalog_file)
+            os.rename(temp_name, self.catalog_file)
+        except (IOError, OSError) as e:
+            LOG.debug('Unable to save version catalog: {0}'.format(e))
+
+    def delete(self):
+        """ Forgets every version, after the application is deleted """
+        with self.lock:
+            self.versions = []
+            self.full_sync_time = None
+            self._index()
+        if self.catalog_file:
+            fileoperations.delete_file(self.catalog_file)
+
+    def sync(self, full=False):
+        """
+        Brings the catalog up to date, once per command unless `full` asks
+        for a complete listing.
+        """
+        with self.lock:
+            if self.synced and not full:
+                return
+            if full or self.full_sync_time is None or \
+                    time.time() - self.full_sync_time > FULL_SYNC_INTERVAL:
+                self._full_sync()
+            else:
+                self._incremental_sync()
+            self.synced = True
+            self.save()
+
+    def refresh(self, version_labels):
+        """
+        Reads `version_labels` from the service again, for instance to poll
+        their status, and drops the ones that no longer exist.
+        :return: the refreshed versions that exist
+        """
+        labels = list(version_labels)
+        refreshed = []
+        for i in range(0, len(labels), REFRESH_BATCH_SIZE):
+            batch = labels[i:i + REFRESH_BATCH_SIZE]
+            refreshed.extend(elasticbeanstalk.get_application_versions(
+                self.app_name, version_labels=batch)['ApplicationVersions'])
+
+        requested = set(labels)
+        with self.lock:
+            found = dict((v['VersionLabel'], v) for v in refreshed)
+            changed = False
+            versions = []
+            for version in self.versions:
+                label = version['VersionLabel']
+                if label in found:
+                    new_version = found.pop(label)
+                    changed = changed or new_version != version
+                    versions.append(new_version)
+                elif label not in requested:
+                    versions.append(version)
+                else:
+                    changed = True
+            # Versions created since the last sync
+            changed = changed or bool(found)
+            self.versions = _newest_first(list(found.values()) + versions)
+            self._index()
+        if changed:
+            # Polling refreshes the same labels again and again
+            self.save()
+        return [dict(v) for v in refreshed]
+
+    def forget(self, version_labels):
+        """ Drops versions that were deleted """
+        labels = set(version_labels)
+        with self.lock:
+            self.versions = [v for v in self.versions
+                             if v['VersionLabel'] not in labels]
+            self._index()
+        self.save()
+
+    def get_versions(self, status=None):
+        """ Copies of the versions, newest first, optionally with a status """
+        self.sync()
+        with self.lock:
+            if status is None:
+                return [dict(v) for v in self.versions]
+            return [dict(self.versions[i])
+                    for i in self.by_status.get(status, [])]
+
+    def get_labels(self):
+        self.sync()
+        with self.lock:
+            return [v['VersionLabel'] for v in self.versions]
+
+    def get_version(self, version_label):
+        """ A copy of a version, or None if it does not exist """
+        self.sync()
+        with self.lock:
+            index = self.by_label.get(version_label)
+            if index is not None:
+                return dict(self.versions[index])
+        versions = self.refresh([version_label])
+        return versions[0] if versions else None
+
+    def get_deploy_number(self, version_label):
+        """ The position of a version from the oldest, which is 1, or 0 """
+        self.sync()
+        with self.lock:
+            index = self.by_label.get(version_label)
+            if index is None:
+                return 0
+            return len(self.versions) - index
+
+    def _full_sync(self):
+        LOG.debug('Listing all versions of ' + self.app_name)
+        versions = list(
+            elasticbeanstalk.get_all_application_versions(self.app_name))
+        self.versions = _newest_first(versions)
+        self.full_sync_time = time.time()
+        self._index()
+
+    def _incremental_sync(self):
+        new_versions = []
+        next_token = None
+        reached_known = False
+        while not reached_known:
+            result = elasticbeanstalk.get_application_versions(
+                self.app_name, max_records=SYNC_PAGE_SIZE,
+                next_token=next_token)
+            for version in result['ApplicationVersions']:
+                if version['VersionLabel'] in self.by_label:
+                    reached_known = True
+                    break
+                new_versions.append(version)
+            next_token = result.get('NextToken')
+            if not next_token:
+                break
+        LOG.debug('Found {0} new versions of {1}'
+                  .format(len(new_versions), self.app_name))
+
+        if reached_known:
+            new_labels = set(v['VersionLabel'] for v in new_versions)
+            versions = new_versions + [v for v in self.versions
+                                       if v['VersionLabel'] not in new_labels]
+        else:
+            # Every version was listed, none of the known ones are left
+            versions = new_versions
+        self.versions = _newest_first(versions)
+        self._index()
+
+        pending = [self.versions[i]['VersionLabel']
+                   for status in PENDING_STATUSES
+                   for i in self.by_status.get(status, [])]
+        if pending:
+            self.refresh(pending)
+
+    def _index(self):
+        self.by_label = {}
+        self.by_status = {}
+        for i, version in enumerate(self.versions):
+            self.by_label[version['VersionLabel']] = i
+            self.by_status.setdefault(version.get('Status'), []).append(i)
+
+
+def _newest_first(versions):
+    return sorted(versions, key=lambda v: _get_timestamp(v.get('DateCreated')),
+                  reverse=True)
+
+
+def _get_timestamp(date):
+    try:
+        return calendar.timegm(date.utctimetuple())
+    except (AttributeError, OverflowError, ValueError):
+        return 0
+
+
+def _encode(version):
+    version = dict(version)
+    for field in DATE_FIELDS:
+        if hasattr(version.get(field), 'isoformat'):
+            version[field] = version[field].isoformat()
+    return version
+
+
+def _decode(version):
+    for field in DATE_FIELDS:
+        if version.get(field):
+            version[field] = parser.parse(version[field])
+    return version
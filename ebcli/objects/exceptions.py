@@ -186,5 +186,9 @@ class UploadError(EBCLIException):
     """ An error occured while uploading app version
     """
 
+
+class DownloadError(EBCLIException):
+    """ A downloaded file is incomplete or does not match its checksum """
+
 class WorkerQueueNotFound(EBCLIException):
     """ A worker queue could not be found for a worker environment """
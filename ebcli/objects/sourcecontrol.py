@@ -16,11 +16,13 @@ import datetime
 import fileinput
 import os
 import sys
+import threading
 
 from cement.utils.misc import minimal_logger
 from cement.utils.shell import exec_cmd
+from concurrent.futures import ThreadPoolExecutor
 
-from ebcli.lib import codecommit, utils
+from ebcli.lib import bundlecache, codecommit, profiling, utils
 from ebcli.core import fileoperations, io
 from ebcli.objects.exceptions import NoSourceControlError, CommandError, \
     NotInitializedError
@@ -28,6 +30,15 @@ from ebcli.resources.strings import git_ignore, strings
 
 LOG = minimal_logger(__name__)
 
+# git archive processes run at once for submodules
+SUBMODULE_ARCHIVE_WORKERS = 4
+
+# Output of git commands that only read the repository, by folder and
+# command. Kept for the whole command, and dropped when any other command
+# runs since it may change what they return.
+_git_results = {}
+_git_results_lock = threading.Lock()
+
 
 class SourceControl():
     name = 'base'
@@ -155,11 +166,10 @@ class Git(SourceControl):
     def get_current_repository(self):
         # it's possible 'origin' isn't the name of their remote so attempt to get their current remote
         current_branch = self.get_current_branch()
-        stdout, stderr, exitcode = self._run_cmd(
-            ['git', 'config', '--get', 'branch.{0}.remote'.format(current_branch)], handle_exitcode=False)
+        stdout = self._get_config_value('branch.{0}.remote'.format(current_branch))
 
         current_remote = stdout
-        if exitcode != 0:
+        if stdout is None:
             LOG.debug("No remote found for the current working directory.")
             current_remote = "origin"
         else:
@@ -177,13 +187,10 @@ class Git(SourceControl):
                 current_remote = "origin"
 
         # We want the name of the repository not the remote it is saved as locally
-        stdout, stderr, exitcode = self._run_cmd(
-            ['git', 'config', '--get', 'remote.{0}.url'.format(current_remote)], handle_exitcode=False)
-        if exitcode != 0:
+        stdout = self._get_config_value('remote.{0}.url'.format(current_remote))
+        if stdout is None:
             LOG.debug('No remote repository found')
             return
-        else:
-            self._handle_exitcode(exitcode, stderr)
 
         LOG.debug('git config --get remote.origin.url: ' + stdout)
         # Need to parse branch from ref manually because "--short" is
@@ -197,13 +204,15 @@ class Git(SourceControl):
         except:
             raise CommandError('Error getting "git --version".')
 
-        stdout, stderr, exitcode = self._run_cmd(
-            ['git', 'symbolic-ref', 'HEAD'], handle_exitcode=False)
+        head = _read_head(_find_git_dir())
+        if head is not None:
+            stdout, exitcode = head, 0 if head.startswith('refs/') else 1
+        else:
+            stdout, stderr, exitcode = self._run_cmd(
+                ['git', 'symbolic-ref', 'HEAD'], handle_exitcode=False)
         if exitcode != 0:
             io.log_warning('Git is in a detached head state. Using branch "default".')
             return 'default'
-        else:
-            self._handle_exitcode(exitcode, stderr)
 
         LOG.debug('git symbolic-ref result: ' + stdout)
         # Need to parse branch from ref manually because "--short" is
@@ -211,6 +220,11 @@ class Git(SourceControl):
         return stdout.split('/')[-1]
 
     def get_current_commit(self):
+        commit = _read_head_commit(_find_git_dir())
+        if commit is not None:
+            LOG.debug('HEAD read from the git directory: ' + commit)
+            return commit
+
         stdout, stderr, exitcode = self._run_cmd(
             ['git', 'rev-parse', '--verify', 'HEAD'], handle_exitcode=False)
         if exitcode != 0:
@@ -222,24 +236,48 @@ class Git(SourceControl):
         LOG.debug('git rev-parse --verify HEAD result: ' + stdout)
         return stdout
 
-    def do_zip_submodule(self, main_location, sub_location, staged=False, submodule_dir=None):
+    def _archive_submodule(self, sub_location, staged=False, submodule_dir=None, cwd=None):
         if staged:
-            commit_id, stderr, exitcode = self._run_cmd(['git', 'write-tree'])
+            commit_id, stderr, exitcode = self._run_cmd(['git', 'write-tree'], cwd=cwd)
 
         else:
             commit_id = 'HEAD'
 
         io.log_info('creating zip using git submodule archive {0}'.format(commit_id))
 
-        # individually zip submodules if there are any
         stdout, stderr, exitcode = self._run_cmd(['git', 'archive', '-v', '--format=zip',
                                                   '--prefix', os.path.join(submodule_dir, ''),
-                                                  '-o', sub_location, commit_id])
+                                                  '-o', sub_location, commit_id], cwd=cwd)
         io.log_info('git archive output: {0}'.format(stderr))
 
-        # append and remove the submodule archive
-        fileoperations.zip_append_archive(main_location, sub_location)
-        fileoperations.delete_file(sub_location)
+    def _zip_submodules(self, location, project_root, staged=False):
+        """
+        Archives all submodules at once, then appends the archives to the
+        one at `location` in submodule order.
+        """
+        stdout, stderr, exitcode = self._run_cmd(['git', 'submodule', 'foreach', '--recursive'])
+        submodule_dirs = [line.split(' ')[1].strip('\'')
+                          for line in stdout.splitlines()]
+        if not submodule_dirs:
+            return
+
+        sub_locations = ['{0}_{1}'.format(location, index)
+                         for index in range(len(submodule_dirs))]
+        executor = ThreadPoolExecutor(
+            max_workers=min(SUBMODULE_ARCHIVE_WORKERS, len(submodule_dirs)))
+        try:
+            futures = [executor.submit(self._archive_submodule, sub_location,
+                                       staged=staged, submodule_dir=submodule_dir,
+                                       cwd=os.path.join(project_root, submodule_dir))
+                       for submodule_dir, sub_location in zip(submodule_dirs, sub_locations)]
+            for future, sub_location in zip(futures, sub_locations):
+                future.result()
+                fileoperations.zip_append_archive(location, sub_location)
+                fileoperations.delete_file(sub_location)
+        finally:
+            executor.shutdown(wait=True)
+            for sub_location in sub_locations:
+                fileoperations.delete_file(sub_location)
 
     def do_zip(self, location, staged=False):
         cwd = os.getcwd()
@@ -252,6 +290,16 @@ class Git(SourceControl):
             else:
                 commit_id = 'HEAD'
 
+            must_zip_submodules = fileoperations.get_config_setting('global', 'include_git_submodules')
+
+            cache = bundlecache.get_cache()
+            bundle_key = None
+            if cache is not None:
+                bundle_key = self._get_bundle_key(commit_id, staged, must_zip_submodules)
+                if bundle_key is not None and cache.fetch(bundle_key, location):
+                    io.log_info('Reusing the cached git archive of this tree')
+                    return
+
             io.log_info('creating zip using git archive {0}'.format(commit_id))
             stdout, stderr, exitcode = self._run_cmd(
                 ['git', 'archive', '-v', '--format=zip',
@@ -260,20 +308,52 @@ class Git(SourceControl):
 
             project_root = os.getcwd()
 
-            must_zip_submodules = fileoperations.get_config_setting('global', 'include_git_submodules')
-
             if must_zip_submodules:
                 # individually zip submodules if there are any
-                stdout, stderr, exitcode = self._run_cmd(['git', 'submodule', 'foreach', '--recursive'])
+                self._zip_submodules(location, project_root, staged=staged)
 
-                for index, line in enumerate(stdout.splitlines()):
-                    submodule_dir = line.split(' ')[1].strip('\'')
-                    os.chdir(os.path.join(project_root, submodule_dir))
-                    self.do_zip_submodule(location, "{0}_{1}".format(location, str(index)), staged=staged, submodule_dir=submodule_dir)
+            if bundle_key is not None:
+                cache.store(bundle_key, location)
 
         finally:
             os.chdir(cwd)
 
+    def _get_bundle_key(self, commit_id, staged, include_submodules):
+        """
+        Key of the bundle git archive makes of `commit_id`, from the project
+        root: its tree hash and, when included, the commits of the submodules
+        (their trees when staged). export-subst attributes put commit details
+        in the archive, so those bundles are keyed by commit instead.
+        :return: the key, or None if the bundle should not be cached
+        """
+        stdout, stderr, exitcode = self._run_cmd(
+            ['git', 'rev-parse', '--verify', '{0}^{{tree}}'.format(commit_id)],
+            handle_exitcode=False)
+        if exitcode != 0:
+            LOG.debug('Not caching bundle, no tree for {0}: {1}'.format(commit_id, stderr))
+            return None
+        parts = ['tree', stdout]
+
+        if not staged and _uses_export_subst():
+            parts += ['commit', self.get_current_commit()]
+
+        if include_submodules:
+            if staged:
+                command = ['git', 'submodule', 'foreach', '--recursive', 'git', 'write-tree']
+            else:
+                command = ['git', 'submodule', 'status', '--recursive']
+            stdout, stderr, exitcode = self._run_cmd(command, handle_exitcode=False)
+            if exitcode != 0:
+                LOG.debug('Not caching bundle, unable to list submodules: ' + stderr)
+                return None
+            if not staged:
+                # Keep the commit and path of each line, not the branch names
+                stdout = '\n'.join(' '.join(line[1:].split()[:2])
+                                   for line in stdout.splitlines())
+            parts += ['submodules', stdout]
+
+        return bundlecache.make_key(*parts)
+
     def get_message(self):
         stdout, stderr, exitcode = self._run_cmd(
             ['git', 'log', '--oneline', '-1'])
@@ -302,6 +382,7 @@ class Git(SourceControl):
             f.write(os.linesep)
             for line in git_ignore:
                 f.write(line + os.linesep)
+        _invalidate_git_results()
 
     def clean_up_ignore_file(self):
         cwd = os.getcwd()
@@ -319,6 +400,7 @@ class Git(SourceControl):
                     print(line, end='')
 
         finally:
+            _invalidate_git_results()
             os.chdir(cwd)
 
     def push_codecommit_code(self):
@@ -451,20 +533,59 @@ class Git(SourceControl):
         self._run_cmd(
             ['git', 'config', '--local', '--replace-all', 'credential.helper', '!aws codecommit credential-helper $@'])
 
-    def _run_cmd(self, cmd, handle_exitcode=True):
-        stdout, stderr, exitcode = exec_cmd(cmd)
-
-        stdout = utils.decode_bytes(stdout).strip()
-        stderr = utils.decode_bytes(stderr).strip()
+    def _run_cmd(self, cmd, handle_exitcode=True, cwd=None):
+        key = None
+        result = None
+        if _is_read_only(cmd):
+            key = (os.path.realpath(cwd or os.getcwd()), tuple(cmd))
+            with _git_results_lock:
+                result = _git_results.get(key)
+
+        if result is None:
+            with profiling.phase('git commands'):
+                stdout, stderr, exitcode = exec_cmd(cmd, cwd=cwd)
+
+            stdout = utils.decode_bytes(stdout).strip()
+            stderr = utils.decode_bytes(stderr).strip()
+            result = stdout, stderr, exitcode
+            if key is not None:
+                with _git_results_lock:
+                    _git_results[key] = result
+            else:
+                _invalidate_git_results()
+        else:
+            LOG.debug('Reusing output of ' + ' '.join(cmd))
 
+        stdout, stderr, exitcode = result
         if handle_exitcode:
             self._handle_exitcode(exitcode, stderr)
         return stdout, stderr, exitcode
 
-    def get_url_from_remote_repo(self, remote):
-        stdout, stderr, exitcode = self._run_cmd(['git', 'config', '--get', "remote.{0}.url".format(remote)], handle_exitcode=False)
+    def _get_config_value(self, key):
+        """
+        Like `git config --get key`, from a single `git config --list` per
+        command.
+        :return: the value, or None if it is not set
+        """
+        stdout, stderr, exitcode = self._run_cmd(['git', 'config', '--list', '-z'],
+                                                 handle_exitcode=False)
         if exitcode != 0:
-            LOG.debug('git remote error: ' + stderr)
+            LOG.debug('git config --list error: ' + stderr)
+            return None
+
+        value = None
+        key = _normalize_config_key(key)
+        for entry in stdout.split('\0'):
+            name, _, entry_value = entry.partition('\n')
+            if _normalize_config_key(name.strip()) == key:
+                # The last value wins, as with --get
+                value = entry_value
+        return value
+
+    def get_url_from_remote_repo(self, remote):
+        stdout = self._get_config_value("remote.{0}.url".format(remote))
+        if stdout is None:
+            LOG.debug('git remote error: no url for remote ' + remote)
             return
 
         LOG.debug('git remote result: ' + stdout)
@@ -473,4 +594,121 @@ class Git(SourceControl):
     def get_codecommit_presigned_remote_url(self):
         remote_url = self.get_url_from_remote_repo(self.codecommit_remote_name)
         signed_url = codecommit.create_signed_url(remote_url)
-        return signed_url
\ No newline at end of file
+        return signed_url
+
+
+def _uses_export_subst():
+    try:
+        with open('.gitattributes') as f:
+            return 'export-subst' in f.read()
+    except IOError:
+        return False
+
+
+def _invalidate_git_results():
+    with _git_results_lock:
+        _git_results.clear()
+
+
+def _is_read_only(cmd):
+    if len(cmd) < 2 or cmd[0] != 'git':
+        return False
+    command = cmd[1]
+    if command in ('--version', 'describe', 'diff', 'log', 'rev-parse', 'write-tree'):
+        return True
+    if command == 'config':
+        return '--get' in cmd or '--list' in cmd
+    if command == 'symbolic-ref':
+        return len(cmd) == 3
+    if command == 'submodule':
+        return cmd[2:] in (['status', '--recursive'], ['foreach', '--recursive'])
+    return False
+
+
+def _normalize_config_key(key):
+    # Section and variable names are case-insensitive, subsections are not
+    section, _, rest = key.partition('.')
+    subsection, _, variable = rest.rpartition('.')
+    if subsection:
+        return '{0}.{1}.{2}'.format(section.lower(), subsection, variable.lower())
+    return key.lower()
+
+
+def _find_git_dir():
+    """ The .git directory of the repository around the current folder """
+    folder = os.getcwd()
+    while True:
+        candidate = os.path.join(folder, '.git')
+        if os.path.isdir(candidate):
+            return candidate
+        if os.path.isfile(candidate):
+            # Submodules and worktrees point to their git directory
+            try:
+                with open(candidate) as f:
+                    content = f.read().strip()
+            except IOError:
+                return None
+            if not content.startswith('gitdir:'):
+                return None
+            return os.path.join(folder, content[len('gitdir:'):].strip())
+        parent = os.path.dirname(folder)
+        if parent == folder:
+            return None
+        folder = parent
+
+
+def _read_head(git_dir):
+    """
+    Reads HEAD without running git.
+    :return: the ref HEAD points to, the commit if it is detached, or None
+        if git should be asked instead
+    """
+    if git_dir is None:
+        return None
+    try:
+        with open(os.path.join(git_dir, 'HEAD')) as f:
+            head = f.read().strip()
+    except IOError:
+        return None
+    if head.startswith('ref:'):
+        ref = head[len('ref:'):].strip()
+        # Repositories using reftable only keep a placeholder here
+        if ref.startswith('refs/') and ref != 'refs/heads/.invalid':
+            return ref
+        return None
+    if len(head) == 40:
+        return head
+    return None
+
+
+def _read_head_commit(git_dir):
+    """ The commit of HEAD read from loose or packed refs, or None """
+    head = _read_head(git_dir)
+    if head is None or not head.startswith('refs/'):
+        return head
+
+    common_dir = git_dir
+    try:
+        with open(os.path.join(git_dir, 'commondir')) as f:
+            common_dir = os.path.join(git_dir, f.read().strip())
+    except IOError:
+        pass
+
+    for folder in (git_dir, common_dir):
+        try:
+            with open(os.path.join(folder, *head.split('/'))) as f:
+                commit = f.read().strip()
+            if len(commit) == 40:
+                return commit
+        except IOError:
+            continue
+
+    try:
+        with open(os.path.join(common_dir, 'packed-refs')) as f:
+            for line in f:
+                parts = line.strip().split(' ')
+                if len(parts) == 2 and parts[1] == head and len(parts[0]) == 40:
+                    return parts[0]
+    except IOError:
+        pass
+    return None
@@ -16,7 +16,7 @@ from ebcli.core import io
 from ebcli.display.appversion import term, VersionScreen, VersionDataPoller
 from ebcli.display.table import Table, Column
 from ebcli.display.help import HelpTable, ViewlessHelpTable
-from ebcli.lib import elasticbeanstalk as elasticbeanstalk
+from ebcli.lib import elasticbeanstalk as elasticbeanstalk, versioncatalog
 from ebcli.objects.exceptions import ValidationError, NotFoundError
 from ebcli.operations import commonops
 from ebcli.resources.strings import prompts, strings
@@ -28,9 +28,9 @@ def delete_app_version_label(app_name, version_label):
 
     if version_label:
         # check if version_label exists under app_name
-        app_versions = elasticbeanstalk.get_application_versions(app_name)['ApplicationVersions']
+        catalog = versioncatalog.get_catalog(app_name)
         #  if the given version label does not exist at all!
-        if not any(version_label == app_version['VersionLabel'] for app_version in app_versions):
+        if catalog.get_version(version_label) is None:
             raise ValidationError(strings['appversion.delete.notfound'].format(app_name, version_label))
 
         envs = elasticbeanstalk.get_app_environments(app_name)
@@ -46,6 +46,7 @@ def delete_app_version_label(app_name, version_label):
         try:
             io.validate_action(prompts['appversion.delete.validate'].format(version_label), "y")
             elasticbeanstalk.delete_application_version(app_name, version_label)
+            catalog.forget([version_label])
             io.echo('Application Version deleted successfully.')
             delete_successful = True
         except ValidationError:
@@ -89,6 +89,7 @@ def wait_for_app_version_attribute(app_name, version_labels, attribute, timeout=
             io.log_error(strings['appversion.attribute.failed'].replace('{app_version}', version_labels))
             return False
         io.LOG.debug('Retrieving app versions.')
+        elasticbeanstalk.invalidate_cache()
         app_versions = elasticbeanstalk.get_application_versions(app_name, versions_to_check)['ApplicationVersions']
         for version in app_versions:
             if attribute in version:
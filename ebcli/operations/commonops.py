@@ -28,7 +28,8 @@ from ebcli.operations import buildspecops
 from ebcli.core.ebglobals import Constants
 from ..core import fileoperations, io
 from ..containers import dockerrun
-from ..lib import aws, ec2, elasticbeanstalk, heuristics, iam, s3, utils, codecommit
+from ..lib import aws, ec2, elasticbeanstalk, heuristics, iam, profiling, s3, utils, codecommit, \
+    versioncatalog
 from ebcli.objects.platform import PlatformVersion
 from ..lib.aws import InvalidParameterValueError
 from ..objects.exceptions import *
@@ -40,6 +41,7 @@ from ..resources.statics import iam_documents, iam_attributes
 LOG = minimal_logger(__name__)
 
 
+@profiling.phase('wait for events')
 def wait_for_success_events(request_id, timeout_in_minutes=None,
                             sleep_time=5, stream_events=True, can_abort=False,
                             streamer=None, app_name=None, env_name=None, version_label=None,
@@ -379,22 +381,18 @@ def get_env_names(app_name):
 
 
 def get_app_version_labels(app_name):
-    app_versions = elasticbeanstalk.get_application_versions(app_name)['ApplicationVersions']
-    return [v['VersionLabel'] for v in app_versions]
+    return versioncatalog.get_catalog(app_name).get_labels()
 
 
 def get_app_version_s3_location(app_name, version_label):
     # Check if the application version already exists. If so get the S3 key to fetch.
     s3_key = None
     s3_bucket = None
-    app_versions = elasticbeanstalk.get_application_versions(app_name, tuple(version_label,))['ApplicationVersions']
-    app_version = {}
-    for v in app_versions:
-        if v['VersionLabel'] == version_label:
-            app_version = v
-            break
-
-    if app_version:
+    # Ask the service, a stale catalog must not skip the upload
+    app_versions = versioncatalog.get_catalog(app_name).refresh([version_label])
+
+    if app_versions:
+        app_version = app_versions[0]
         s3_bucket = app_version['SourceBundle']['S3Bucket']
         s3_key = app_version['SourceBundle']['S3Key']
         io.log_info("Application Version '{0}' exists. Source from S3: {1}/{2}.".format(version_label, s3_bucket, s3_key))
@@ -817,6 +815,7 @@ def create_dummy_app_version(app_name):
                                        None, None, warning=False)
 
 
+@profiling.phase('create app version')
 def create_app_version(app_name, process=False, label=None, message=None, staged=False, build_config=None):
     cwd = os.getcwd()
     fileoperations._traverse_to_project_root()
@@ -861,7 +860,8 @@ def create_app_version(app_name, process=False, label=None, message=None, staged
         s3_bucket = None
     else:
         # Check if the app version already exists
-        s3_bucket, s3_key = get_app_version_s3_location(app_name, version_label)
+        with profiling.phase('find existing version'):
+            s3_bucket, s3_key = get_app_version_s3_location(app_name, version_label)
 
         # Create zip file if the application version doesn't exist
         if s3_bucket is None and s3_key is None:
@@ -1003,6 +1003,7 @@ def create_app_version_from_source(app_name, source, process=False, label=None,
                                        build_config=build_config)
 
 
+@profiling.phase('register app version')
 def _create_application_version(app_name, version_label, description,
                                 bucket, key, process=False, warning=True,
                                 repository=None, commit_id=None,
@@ -1048,12 +1049,14 @@ def _zip_up_project(version_label, source_control, staged=False):
         # If it doesn't already exist, create it
         io.echo(strings['appversion.create'].replace('{version}',
                                                      version_label))
-        ignore_files = fileoperations.get_ebignore_list()
-        if ignore_files is None:
-            source_control.do_zip(file_path, staged)
+        with profiling.phase('read .ebignore'):
+            ebignore = fileoperations.get_ebignore()
+        if ebignore is None:
+            with profiling.phase('source control zip'):
+                source_control.do_zip(file_path, staged)
         else:
             io.log_info('Found .ebignore, using system zip.')
-            fileoperations.zip_up_project(file_path, ignore_list=ignore_files)
+            fileoperations.zip_up_project(file_path, ignore_list=ebignore)
     return file_name, file_path
 
 
@@ -1265,6 +1268,7 @@ def _get_public_ssh_key(keypair_name):
         CommandError(strings['ssh.notpresent'])
 
 
+@profiling.phase('version processing')
 def wait_for_processed_app_versions(app_name, version_labels, timeout=5):
     versions_to_check = list(version_labels)
     processed = {}
@@ -1279,7 +1283,8 @@ def wait_for_processed_app_versions(app_name, version_labels, timeout=5):
             io.log_error(strings['appversion.processtimeout'])
             return False
         io.LOG.debug('Retrieving app versions.')
-        app_versions = elasticbeanstalk.get_application_versions(app_name, versions_to_check)["ApplicationVersions"]
+        elasticbeanstalk.invalidate_cache()
+        app_versions = versioncatalog.get_catalog(app_name).refresh(versions_to_check)
 
         for v in app_versions:
             if v['Status'] == 'PROCESSED':
@@ -0,0 +1,94 @@
+# Copyright 2017 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"). You
+# may not use this file except in compliance with the License. A copy of
+# the License is located at
+#
+# http://aws.amazon.com/apache2.0/
+#
+# or in the "license" file accompanying this file. This file is
+# distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF
+# ANY KIND, either express or implied. See the License for the specific
+# language governing permissions and limitations under the License.
+
+from cement.utils.misc import minimal_logger
+
+from ..core import io
+from ..lib import aws
+from ..objects import region
+from ..objects.exceptions import EBCLIException
+
+LOG = minimal_logger(__name__)
+
+
+def get_targets(profiles=None, regions=None):
+    """
+    Expands the --profiles and --regions options into a list of
+    (profile, region) pairs. A None profile or region means the one the
+    command would use anyway.
+    """
+    profile_list = _split(profiles) or [None]
+    if regions and regions.strip().lower() == 'all':
+        # China regions need separate credentials, never include them in 'all'
+        region_list = [r.name for r in region.get_all_regions()
+                       if not r.name.startswith('cn-')]
+    else:
+        region_list = _split(regions) or [None]
+
+    return [(p, r) for p in profile_list for r in region_list]
+
+
+def is_fanout(profiles=None, regions=None):
+    return bool(profiles or regions)
+
+
+def run_for_each_target(targets, function, *args, **kwargs):
+    """
+    Runs `function` once per (profile, region) target, all concurrently.
+    Each target's output is captured and printed as one block, in target
+    order, as soon as that target and all targets before it are done.
+    Errors are reported per target and do not stop the other targets.
+    """
+    failures = 0
+    futures = [(target, aws.submit_api_work(_run_for_target, target,
+                                            function, args, kwargs))
+               for target in targets]
+
+    for (profile, region_name), future in futures:
+        output, error = future.result()
+        io.echo(io.bold(_get_target_header(profile, region_name)))
+        io.echo(output, end='')
+        if error is not None:
+            failures += 1
+            io.log_error(error)
+        io.echo()
+
+    return failures
+
+
+def _run_for_target(target, function, args, kwargs):
+    profile, region_name = target
+    with aws.client_context(profile, region_name), \
+            io.capture_output() as buffer:
+        try:
+            function(*args, **kwargs)
+            error = None
+        except EBCLIException as e:
+            LOG.debug('{0} failed for {1}: {2}'.format(function.__name__,
+                                                        target, e))
+            error = e
+    return buffer.getvalue(), error
+
+
+def _get_target_header(profile, region_name):
+    parts = []
+    if profile:
+        parts.append('profile: ' + profile)
+    parts.append('region: ' + (region_name or aws.get_region_name() or 'default'))
+    return '==> ' + ', '.join(parts)
+
+
+def _split(value):
+    if not value:
+        return []
+    return [v.strip() for v in value.split(',') if v.strip()]
@@ -13,8 +13,11 @@
 
 from cement.utils.misc import minimal_logger
 
-from ..lib import elasticbeanstalk
+from ..lib import aws, elasticbeanstalk
 from ..display.data_poller import DataPoller
+from ..display.recorder import HealthRecorder, HealthRecording, \
+    ReplayDataPoller, ReplayScreen, TraditionalReplayScreen
+from ..display.fleet import FleetHealthDataPoller, FleetHealthScreen, FleetHelpTable
 from ..display.screen import Screen
 from ..display.traditional import TraditionalHealthScreen, TraditionalHealthDataPoller
 from ..display.help import HelpTable, ViewlessHelpTable
@@ -22,46 +25,146 @@ from ..display import term
 from ..display.table import Column, Table
 from ..display.specialtables import RequestTable, StatusTable
 from ebcli.objects.platform import PlatformVersion
-from ..objects.exceptions import NotSupportedError
+from ..objects.exceptions import NotSupportedError, NotFoundError
 from ..objects.solutionstack import SolutionStack
 from ..resources.statics import namespaces, option_names
+from ..resources.strings import strings
 
 LOG = minimal_logger(__name__)
 
 
 def display_interactive_health(app_name, env_name, refresh,
-                               mono, default_view):
+                               mono, default_view, record_file=None):
     env = elasticbeanstalk.describe_configuration_settings(app_name, env_name)
-    option_settings = env.get('OptionSettings')
-    health_type = elasticbeanstalk.get_option_setting(
-        option_settings,
+    health_type = _get_health_type(env)
+    poller = _get_health_poller_class(env)
+    screen = _create_health_screen(poller, env)
+
+    # Start getting health data
+    poller = poller(app_name, env_name)
+    if record_file:
+        poller.recorder = HealthRecorder(record_file, env,
+                                         health_type or 'basic')
+    poller.start_background_polling()
+
+    # Start
+    try:
+        screen.start_screen(poller, env, refresh,
+                            mono=mono, default_table=default_view)
+    finally:
+        term.return_cursor_to_normal()
+
+
+def _get_health_type(env):
+    return elasticbeanstalk.get_option_setting(
+        env.get('OptionSettings'),
         namespaces.HEALTH_SYSTEM,
         option_names.SYSTEM_TYPE)
 
-    if health_type == 'enhanced':
-        poller = DataPoller
+
+def _get_health_poller_class(env):
+    if _get_health_type(env) == 'enhanced':
+        return DataPoller
+    elif env['Tier']['Name'] == 'WebServer':
+        return TraditionalHealthDataPoller
+    else:
+        raise NotSupportedError(strings['health.notsupported'])
+
+
+def _create_health_screen(poller_class, env):
+    if poller_class is DataPoller:
         # Create dynamic screen
         screen = Screen()
         create_health_tables(screen, env)
-    elif env['Tier']['Name'] == 'WebServer':
-        poller = TraditionalHealthDataPoller
+    else:
         screen = TraditionalHealthScreen()
         create_traditional_health_tables(screen)
+    return screen
+
+
+def replay_health(replay_file, mono, default_view, speed=1.0):
+    recording = HealthRecording.load(replay_file)
+    env = recording.header
+
+    if env.get('HealthType') == 'enhanced':
+        screen = ReplayScreen()
+        create_health_tables(screen, env)
     else:
-        raise NotSupportedError('The health dashboard is currently not supported for this environment.')
+        screen = TraditionalReplayScreen()
+        create_traditional_health_tables(screen)
 
-    # Start getting health data
-    poller = poller(app_name, env_name)
-    poller.start_background_polling()
+    poller = ReplayDataPoller(recording, speed=speed)
 
-    # Start
     try:
-        screen.start_screen(poller, env, refresh,
+        screen.start_screen(poller, env, True,
                             mono=mono, default_table=default_view)
     finally:
         term.return_cursor_to_normal()
 
 
+def display_interactive_fleet_health(app_name, env_names, refresh, mono):
+    if not env_names:
+        env_names = [e.name for e in elasticbeanstalk.get_app_environments(app_name)]
+    if not env_names:
+        raise NotFoundError(strings['health.noenvironments'].replace('{app-name}', app_name))
+
+    # Every environment is polled the way its own dashboard would
+    configurations = [
+        (env_name, aws.submit_api_work(
+            elasticbeanstalk.describe_configuration_settings,
+            app_name, env_name))
+        for env_name in env_names]
+    poller_classes = {}
+    unsupported = {}
+    for env_name, future in configurations:
+        try:
+            poller_classes[env_name] = _get_health_poller_class(future.result())
+        except NotSupportedError as e:
+            unsupported[env_name] = e.message
+
+    # A single scheduler polls every environment
+    poller = FleetHealthDataPoller(app_name, env_names,
+                                   poller_classes=poller_classes,
+                                   unsupported=unsupported)
+
+    def detail_view(env_name):
+        _display_fleet_environment_health(poller, app_name, env_name, mono)
+
+    screen = FleetHealthScreen(detail_view=detail_view)
+    create_fleet_health_tables(screen)
+    poller.start_background_polling()
+
+    try:
+        screen.start_screen(poller, None, refresh, mono=mono)
+    finally:
+        poller.stop_background_polling()
+        term.return_cursor_to_normal()
+
+
+def _display_fleet_environment_health(poller, app_name, env_name, mono):
+    env = elasticbeanstalk.describe_configuration_settings(app_name, env_name)
+    screen = _create_health_screen(_get_health_poller_class(env), env)
+    screen.start_screen(poller.get_environment_poller(env_name), env, True,
+                        mono=mono)
+
+
+def create_fleet_health_tables(screen):
+    screen.add_table(StatusTable('environments', columns=[
+        Column('environment', None, 'InstanceId', 'left'),
+        Column('status', 10, 'HealthStatus', 'left', 'status_sort'),
+        Column('total', 6, 'Total', 'right'),
+        Column('ok', 6, 'Ok', 'right'),
+        Column('warning', 8, 'Warning', 'right'),
+        Column('degraded', 9, 'Degraded', 'right'),
+        Column('severe', 7, 'Severe', 'right'),
+        Column('r/sec', 6, 'requests', 'left'),
+        Column('%5xx', 6, 'Status5xx', 'right'),
+        Column('p99 ', 9, 'P99', 'right', 'P99_sort'),
+        Column('cause', None, 'Cause', 'none'),
+    ]))
+    screen.add_help_table(FleetHelpTable())
+
+
 def create_health_tables(screen, env):
     screen.add_table(StatusTable('health', columns=[
         Column('instance-id', None, 'InstanceId', 'left'),
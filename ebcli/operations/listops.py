@@ -11,7 +11,11 @@
 # ANY KIND, either express or implied. See the License for the specific
 # language governing permissions and limitations under the License.
 
-from ..lib import aws, utils
+from collections import OrderedDict
+
+from botocore.compat import six
+
+from ..lib import aws, elasticbeanstalk, utils
 from ..core import io
 from . import commonops
 
@@ -23,34 +27,65 @@ def list_env_names(app_name, verbose, all_apps):
         io.echo('Region:', region)
 
     if all_apps:
-        for app_name in commonops.get_application_names():
-            list_env_names_for_app(app_name, verbose)
+        # A single describe_environments sweep covers every application
+        env_names_by_app = OrderedDict(
+            (name, []) for name in commonops.get_application_names())
+        for env in elasticbeanstalk.get_all_environments():
+            env_names_by_app.setdefault(env.app_name, []).append(env.name)
+    else:
+        env_names_by_app = {app_name: commonops.get_env_names(app_name)}
+
+    if verbose:
+        _list_env_instances(env_names_by_app)
     else:
-        list_env_names_for_app(app_name, verbose)
+        for name, env_names in six.iteritems(env_names_by_app):
+            _list_env_names(env_names)
 
 
 def list_env_names_for_app(app_name, verbose):
+    env_names_by_app = {app_name: commonops.get_env_names(app_name)}
+    if verbose:
+        _list_env_instances(env_names_by_app)
+    else:
+        _list_env_names(env_names_by_app[app_name])
+
+
+def _list_env_names(env_names):
     current_env = commonops.get_current_branch_environment()
-    env_names = commonops.get_env_names(app_name)
-    env_names.sort()
+    env_names = sorted(env_names)
 
-    if verbose:
-        io.echo('Application:', app_name)
-        io.echo('    Environments:', len(env_names))
+    for i in range(0, len(env_names)):
+        if env_names[i] == current_env:
+            env_names[i] = '* ' + env_names[i]
+
+    if len(env_names) <= 10:
         for e in env_names:
-            instances = commonops.get_instance_ids(app_name, e)
+            io.echo(e)
+    else:
+        utils.print_list_in_columns(env_names)
+
+
+def _list_env_instances(env_names_by_app):
+    """
+    Fetches the instances of every environment on the shared API executor.
+    Output keeps the usual order and each line is printed as soon as its
+    own lookup is done. Throttling is retried by aws.make_api_call.
+    """
+    current_env = commonops.get_current_branch_environment()
+
+    futures = OrderedDict()
+    for app_name, env_names in six.iteritems(env_names_by_app):
+        futures[app_name] = [
+            (e, aws.submit_api_work(commonops.get_instance_ids, app_name, e))
+            for e in sorted(env_names)
+        ]
+
+    for app_name, env_futures in six.iteritems(futures):
+        io.echo('Application:', app_name)
+        io.echo('    Environments:', len(env_futures))
+        for e, future in env_futures:
+            instances = future.result()
             if e == current_env:
                 e = '* ' + e
 
             io.echo('       ', e, ':', instances)
-
-    else:
-        for i in range(0, len(env_names)):
-            if env_names[i] == current_env:
-                env_names[i] = '* ' + env_names[i]
-
-        if len(env_names) <= 10:
-            for e in env_names:
-                io.echo(e)
-        else:
-            utils.print_list_in_columns(env_names)
\ No newline at end of file
@@ -14,7 +14,6 @@
 from datetime import datetime
 import os
 import sys
-import threading
 import time
 
 from cement.utils.misc import minimal_logger
@@ -22,7 +21,7 @@ from cement.core.exc import CaughtSignal
 from six import iteritems
 
 from ebcli.core import fileoperations, io
-from ebcli.lib import elasticbeanstalk, utils, cloudwatch
+from ebcli.lib import aws, elasticbeanstalk, utils, cloudwatch
 from ebcli.lib.aws import MaxRetriesError
 from ebcli.resources.strings import strings, prompts
 from ebcli.resources.statics import namespaces, option_names
@@ -72,13 +71,12 @@ def get_logs(env_name, info_type, do_zip=False, instance_id=None):
         # save file, unzip, place in logs directory
         logs_folder_name = datetime.now().strftime("%y%m%d_%H%M%S")
         logs_location = fileoperations.get_logs_location(logs_folder_name)
-        #get logs for each instance
-        for i_id, url in iteritems(log_list):
-            zip_location = utils.save_file_from_url(url, logs_location,
-                                                    i_id + '.zip')
-            instance_folder = os.path.join(logs_location, i_id)
-            fileoperations.unzip_folder(zip_location, instance_folder)
-            fileoperations.delete_file(zip_location)
+        if not os.path.isdir(logs_location):
+            os.makedirs(logs_location)
+        #get logs for each instance, all at once
+        jobs = [aws.submit_api_work(_save_instance_logs, i_id, url, logs_location)
+                for i_id, url in iteritems(log_list)]
+        aws.wait_for_futures(jobs)
 
         fileoperations.set_user_only_permissions(logs_location)
         if do_zip:
@@ -110,13 +108,23 @@ def get_logs(env_name, info_type, do_zip=False, instance_id=None):
     else:
         # print logs
         data = []
-        for i_id, url in iteritems(log_list):
+        instance_ids = list(log_list)
+        jobs = [aws.submit_api_work(utils.get_data_from_url, log_list[i_id])
+                for i_id in instance_ids]
+        for i_id, result in zip(instance_ids, aws.wait_for_futures(jobs)):
             data.append('============= ' + str(i_id) + ' ==============')
-            log_result = utils.get_data_from_url(url)
-            data.append(utils.decode_bytes(log_result))
+            data.append(utils.decode_bytes(result))
         io.echo_with_pager(os.linesep.join(data))
 
 
+def _save_instance_logs(instance_id, url, logs_location):
+    zip_location = utils.save_file_from_url(url, logs_location,
+                                            instance_id + '.zip')
+    instance_folder = os.path.join(logs_location, instance_id)
+    fileoperations.unzip_folder(zip_location, instance_folder)
+    fileoperations.delete_file(zip_location)
+
+
 def stream_cloudwatch_logs(env_name, sleep_time=2, log_group=None, instance_id=None):
     """
         This function will stream logs to the terminal for the log group given, if multiple streams are found we will
@@ -146,12 +154,10 @@ def stream_cloudwatch_logs(env_name, sleep_time=2, log_group=None, instance_id=N
             if name not in stream_names:
                 stream_names.append(name)
 
-                p = threading.Thread(
-                    target=stream_single_stream,
-                    args=(log_group, name, streamer, sleep_time))
-                p.daemon = True
+                p = aws.start_background_thread(
+                    stream_single_stream,
+                    log_group, name, streamer, sleep_time)
                 jobs.append(p)
-                p.start()
             time.sleep(0.2)  # offset threads
 
         time.sleep(10)
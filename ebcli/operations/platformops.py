@@ -18,13 +18,12 @@ from shutil import copyfile, move
 
 from termcolor import colored
 
-import threading
 import yaml
 
 from ebcli.core.ebglobals import Constants
 from ebcli.operations import logsops
 from ebcli.core import io, fileoperations
-from ebcli.lib import elasticbeanstalk, heuristics, s3, utils
+from ebcli.lib import aws, elasticbeanstalk, heuristics, s3, utils
 from ebcli.objects.exceptions import NotFoundError, InvalidPlatformVersionError, PlatformWorkspaceEmptyError, TimeoutError, ValidationError
 from ebcli.objects.platform import PlatformVersion
 from ebcli.objects.sourcecontrol import SourceControl, NoSC
@@ -375,14 +374,11 @@ def create_platform_version(
     # Share streamer for platform events and builder events
     streamer = io.get_event_streamer()
 
-    builder_events = threading.Thread(
-        target=logsops.stream_platform_logs,
-        args=(platform_name, version, streamer, 5, None, PackerStreamFormatter(show_timestamp=False)))
-    builder_events.daemon = True
-
     try:
         # Watch events from builder logs
-        builder_events.start()
+        aws.start_background_thread(
+            logsops.stream_platform_logs,
+            platform_name, version, streamer, 5, None, PackerStreamFormatter(show_timestamp=False))
         commonops.wait_for_success_events(request_id, timeout_in_minutes=timeout, platform_arn=arn, streamer=streamer)
     except TimeoutError:
         io.log_error(strings['timeout.error'])
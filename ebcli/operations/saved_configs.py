@@ -57,10 +57,13 @@ def update_environment_with_config_data(env_name, data,
 
 def download_config_from_s3(app_name, cfg_name):
     bucket = elasticbeanstalk.get_storage_location()
-    body = s3.get_object(bucket,
-                         _get_s3_keyname_for_template(app_name, cfg_name))
+    fileoperations.make_eb_dir(SAVED_CONFIG_FOLDER_NAME)
+    location = fileoperations.get_eb_file_full_location(
+        _get_local_config_file(cfg_name))
+    s3.download_object(bucket,
+                       _get_s3_keyname_for_template(app_name, cfg_name),
+                       location)
 
-    location = write_to_local_config(cfg_name, body)
     fileoperations.set_user_only_permissions(location)
     io.echo()
     io.echo('Configuration saved at: ' + location)
@@ -163,11 +166,15 @@ def resolve_config_name(app_name, cfg_name):
 def write_to_local_config(cfg_name, data):
     fileoperations.make_eb_dir(SAVED_CONFIG_FOLDER_NAME)
 
-    file_location = SAVED_CONFIG_FOLDER_NAME + cfg_name + '.cfg.yml'
+    file_location = _get_local_config_file(cfg_name)
     fileoperations.write_to_eb_data_file(file_location, data)
     return fileoperations.get_eb_file_full_location(file_location)
 
 
+def _get_local_config_file(cfg_name):
+    return SAVED_CONFIG_FOLDER_NAME + cfg_name + '.cfg.yml'
+
+
 def get_configurations(app_name):
     app = elasticbeanstalk.describe_application(app_name)
     return app['ConfigurationTemplates']
@@ -11,7 +11,7 @@
 # ANY KIND, either express or implied. See the License for the specific
 # language governing permissions and limitations under the License.
 
-from ..lib import elasticbeanstalk, elb, elbv2
+from ..lib import aws, elasticbeanstalk, elb, elbv2
 from ..core import io
 from ..resources.strings import alerts
 from ..resources.statics import elb_names
@@ -20,69 +20,26 @@ from . import commonops, gitops
 
 
 SPACER = ' ' * 5
+
+
 def status(app_name, env_name, verbose):
-    env = elasticbeanstalk.get_environment(app_name, env_name)
+    # Independent lookups are started right away so output can be printed
+    # as soon as the part it depends on has arrived.
+    env_future = aws.submit_api_work(elasticbeanstalk.get_environment,
+                                     app_name, env_name)
+    if verbose:
+        resources_future = aws.submit_api_work(
+            elasticbeanstalk.get_environment_resources, env_name)
+
+    env = env_future.result()
+    latest_future = aws.submit_api_work(commonops.get_latest_solution_stack,
+                                        env.platform.version)
     commonops.print_env_details(env, health=True)
 
     if verbose:
-        # Print number of running instances
-        env_dict = elasticbeanstalk.get_environment_resources(env_name)
-        instances = [i['Id'] for i in
-                     env_dict['EnvironmentResources']['Instances']]
-        io.echo('  Running instances:', len(instances))
-        #Get elb health
-        try:
-            load_balancer_name = [i['Name'] for i in
-                                  env_dict['EnvironmentResources']['LoadBalancers']][0]
-            if elb.version(load_balancer_name) == elb_names.APPLICATION_VERSION:
-                target_groups = [x['PhysicalResourceId'] for x in env_dict['EnvironmentResources']['Resources']
-                                 if elb_names.V2_RESOURCE_TYPE == x['Type'] ]
-                io.echo('  Running processes:', len(target_groups))
-                target_group_states = elbv2.get_target_group_healths(target_groups)
-
-                for k in target_group_states: #k is tg arn
-                    process_name = [x['LogicalResourceId'] for x in env_dict['EnvironmentResources']['Resources']
-                                 if k == x['PhysicalResourceId'] ][0]
-                    if elb_names.DEFAULT_PROCESS_LOGICAL_ID == process_name:
-                        process_name = 'default'
-                    io.echo(SPACER, process_name + ':')
-                    current_target_group_instances = []
-                    for target_group_description in target_group_states[k]['TargetHealthDescriptions']:
-                        current_target_group_instances.append(target_group_description['Target']['Id'])
-                        target_health = target_group_description['TargetHealth']
-
-                        io.echo(SPACER * 2, target_group_description['Target']['Id'] + ': ' + target_health['State'])
-
-                        if 'Description' in target_health and len(target_health['Description']) > 0:
-                            io.echo(SPACER * 3,
-                                    'Description: ' + target_health['Description'])
-                        if 'Reason' in target_health and len(target_health['Reason']) > 0:
-                            io.echo(SPACER * 3,
-                                    'Reason: ' + target_health['Reason'])
-
-                    for i in instances:
-                        if i not in current_target_group_instances:
-                            io.echo(SPACER * 2, i + ':', 'N/A (Not registered '
-                                                    'with Target Group)')
-            else:
-                instance_states = elb.get_health_of_instances(load_balancer_name)
-                for i in instance_states:
-                    instance_id = i['InstanceId']
-                    state = i['State']
-                    descrip = i['Description']
-                    if state == 'Unknown':
-                        state += '(' + descrip + ')'
-                    io.echo(SPACER, instance_id + ':', state)
-                for i in instances:
-                    if i not in [x['InstanceId'] for x in instance_states]:
-                        io.echo(SPACER, i + ':', 'N/A (Not registered '
-                                                'with Load Balancer)')
-
-        except (IndexError, KeyError, NotFoundError) as e:
-            #No load balancer. Dont show instance status
-            pass
-
-    latest = commonops.get_latest_solution_stack(env.platform.version)
+        _print_instance_healths(resources_future.result())
+
+    latest = latest_future.result()
 
     if env.platform != latest:
         io.log_alert(alerts['platform.old'])
@@ -94,4 +51,78 @@ def status(app_name, env_name, verbose):
     if codecommit_setup:
         io.echo("Current CodeCommit settings:")
         io.echo("  Repository: " + str(default_repo))
-        io.echo("  Branch: " + str(default_branch))
\ No newline at end of file
+        io.echo("  Branch: " + str(default_branch))
+
+
+def _print_instance_healths(env_dict):
+    resources = env_dict['EnvironmentResources']
+    # Print number of running instances
+    instances = [i['Id'] for i in resources['Instances']]
+    io.echo('  Running instances:', len(instances))
+    #Get elb health
+    try:
+        load_balancer_name = [i['Name'] for i in resources['LoadBalancers']][0]
+        if elb.version(load_balancer_name) == elb_names.APPLICATION_VERSION:
+            _print_target_group_healths(resources, instances)
+        else:
+            _print_load_balancer_healths(load_balancer_name, instances)
+    except (IndexError, KeyError, NotFoundError) as e:
+        #No load balancer. Dont show instance status
+        pass
+
+
+def _print_target_group_healths(resources, instances):
+    process_names = {}
+    target_groups = []
+    for resource in resources['Resources']:
+        if elb_names.V2_RESOURCE_TYPE == resource['Type']:
+            target_groups.append(resource['PhysicalResourceId'])
+        process_names[resource['PhysicalResourceId']] = resource['LogicalResourceId']
+
+    io.echo('  Running processes:', len(target_groups))
+    futures = [(arn, aws.submit_api_work(elbv2.get_target_health, arn))
+               for arn in target_groups]
+
+    # Printed in order, each as soon as its own result is in
+    for arn, future in futures:
+        target_group_state = future.result()
+        process_name = process_names[arn]
+        if elb_names.DEFAULT_PROCESS_LOGICAL_ID == process_name:
+            process_name = 'default'
+        io.echo(SPACER, process_name + ':')
+
+        registered_instances = set()
+        for target_group_description in target_group_state['TargetHealthDescriptions']:
+            registered_instances.add(target_group_description['Target']['Id'])
+            target_health = target_group_description['TargetHealth']
+
+            io.echo(SPACER * 2, target_group_description['Target']['Id'] + ': ' + target_health['State'])
+
+            if 'Description' in target_health and len(target_health['Description']) > 0:
+                io.echo(SPACER * 3,
+                        'Description: ' + target_health['Description'])
+            if 'Reason' in target_health and len(target_health['Reason']) > 0:
+                io.echo(SPACER * 3,
+                        'Reason: ' + target_health['Reason'])
+
+        for i in instances:
+            if i not in registered_instances:
+                io.echo(SPACER * 2, i + ':', 'N/A (Not registered '
+                                        'with Target Group)')
+
+
+def _print_load_balancer_healths(load_balancer_name, instances):
+    instance_states = elb.get_health_of_instances(load_balancer_name)
+    registered_instances = set()
+    for i in instance_states:
+        instance_id = i['InstanceId']
+        registered_instances.add(instance_id)
+        state = i['State']
+        descrip = i['Description']
+        if state == 'Unknown':
+            state += '(' + descrip + ')'
+        io.echo(SPACER, instance_id + ':', state)
+    for i in instances:
+        if i not in registered_instances:
+            io.echo(SPACER, i + ':', 'N/A (Not registered '
+                                    'with Load Balancer)')
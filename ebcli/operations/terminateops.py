@@ -11,11 +11,12 @@
 # ANY KIND, either express or implied. See the License for the specific
 # language governing permissions and limitations under the License.
 
+from __future__ import division
 from collections import defaultdict
 
 from botocore.compat import six
 
-from ..lib import elasticbeanstalk, s3
+from ..lib import elasticbeanstalk, s3, versioncatalog
 from ..resources.strings import prompts
 from ..core import io, fileoperations
 from ..objects.sourcecontrol import SourceControl
@@ -61,6 +62,7 @@ def delete_app(app_name, force, nohang=False, cleanup=True,
     cleanup_application_versions(app_name)
 
     request_id = elasticbeanstalk.delete_application_and_envs(app_name)
+    versioncatalog.get_catalog(app_name).delete()
 
     if cleanup:
         cleanup_ignore_file()
@@ -73,22 +75,42 @@ def delete_app(app_name, force, nohang=False, cleanup=True,
 def cleanup_application_versions(app_name):
     # Clean up app versions from s3
     io.echo('Removing application versions from s3.')
-    versions = elasticbeanstalk.get_application_versions(app_name)['ApplicationVersions']
-    buckets = defaultdict(list)
-    for version in versions:
+    # Every version is deleted, so the catalog must not miss any
+    catalog = versioncatalog.get_catalog(app_name)
+    catalog.sync(full=True)
+    buckets = defaultdict(set)
+    for version in catalog.get_versions():
         bundle = version.get('SourceBundle', {})
         bucket = bundle.get('S3Bucket', None)
         key = bundle.get('S3Key', None)
         if bucket and key:
-            buckets[bucket].append(key)
+            buckets[bucket].add(key)
 
-    # Delete all keys in batches per bucket
+    delete_source_bundles(buckets)
+
+
+def delete_source_bundles(buckets):
+    """
+    Deletes source bundles in bulk and reports how fast they went.
+    :param buckets: dict of bucket name to the keys to delete from it
+    """
     for bucket, keys in six.iteritems(buckets):
         try:
-            s3.delete_objects(bucket, keys)
+            result = s3.delete_objects(bucket, sorted(keys))
         except NotAuthorizedError:
             io.log_warning('Error deleting application '
                            'versions from bucket "{0}"'.format(bucket))
+            continue
+
+        for error in result['Errors']:
+            io.log_warning('Error deleting {0} from bucket "{1}". Error: {2}'
+                           .format(error['Key'], bucket, error.get('Message')))
+        deleted = len(result['Deleted'])
+        elapsed = result['Elapsed']
+        io.echo('Deleted {0} objects from bucket "{1}" in {2:.1f} seconds '
+                '({3:.0f} objects/second).'
+                .format(deleted, bucket, elapsed,
+                        deleted / elapsed if elapsed else deleted))
 
 
 def cleanup_ignore_file():
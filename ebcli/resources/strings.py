@@ -52,6 +52,8 @@ strings = {
     'abort.info': 'Cancels an environment update or deployment.',
     'use.info': 'Sets default environment.',
     'health.info': 'Shows detailed environment health.',
+    'health.notsupported': 'The health dashboard is currently not supported for this environment.',
+    'health.noenvironments': 'Application {app-name} has no environments to show health for.',
     'deploy.info': 'Deploys your source code to the environment.',
     'platforminit.info': 'Prepares your workspace to build and manage custom platforms.',
     'platformcleanup.info': 'Terminates your platform builder environment.',
@@ -449,6 +451,10 @@ flag_text = {
     'base.region': 'use a specific region',
     'general.timeout': 'timeout period in minutes',
     'base.noverify': 'do not verify AWS SSL certificates',
+    'base.trace': 'write a trace of every API call made to FILE',
+    'base.traceformat': 'format of the --trace file: chrome (chrome://tracing) or json',
+    'base.profilerun': 'print how long each phase of the command took',
+    'base.profileoutput': 'with --profile-run, also write cProfile stats to FILE',
 
     # Clone
     'clone.env': 'name of environment to clone',
@@ -506,6 +512,17 @@ flag_text = {
     'platformevents.version': 'version to retrieve events for',
     'events.follow': 'wait and continue to print events as they come',
 
+    # Fan-out
+    'fanout.regions': 'a comma-separated list of regions to run the command in, or "all"',
+    'fanout.profiles': 'a comma-separated list of profiles to run the command with',
+
+    # Health
+    'health.all': 'show health of all environments in the application',
+    'health.envs': 'a comma-separated list of environments to show health for',
+    'health.record': 'append every health snapshot to a compressed recording file',
+    'health.replay': 'replay a health recording file without making any API calls',
+    'health.speed': 'replay speed multiplier',
+
     # Init
     'init.name': 'application name',
     'init.platform': 'default Platform',
@@ -650,6 +667,7 @@ responses = {
     'git.norepository': 'Error: Not a git repository '
                         '(or any of the parent directories): .git',
     'health.nodescribehealth': 'DescribeEnvironmentHealth is not supported.',
+    'env.notfound': 'No Environment found for EnvironmentName = \'[^\']+\'.',
     'env.updatesuccess': 'Environment update completed successfully.',
     'env.configsuccess': 'Successfully deployed new configuration to environment.',
     'env.cnamenotavailable': 'DNS name \([^ ]+\) is not available.',
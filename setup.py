@@ -29,6 +29,10 @@ testing_requires = ['pytest>=3.03',
 if not sys.platform.startswith('win'):
     requires.append('blessed>=1.9.5')
 
+if sys.version_info[0] == 2:
+    # Backport of concurrent.futures
+    requires.append('futures>=3.0.5')
+
 try:
     with open('/etc/bash_completion.d/eb_completion.extra', 'w') as eo:
         eo.write('')
@@ -49,7 +53,7 @@ setup_options = dict(
     author='AWS Elastic Beanstalk',
     author_email='aws-eb-cli@amazon.com',
     url='http://aws.amazon.com/elasticbeanstalk/',
-    packages=find_packages('.', exclude=['tests*', 'docs*', 'sampleApps*', 'scripts*']),
+    packages=find_packages('.', exclude=['tests*', 'docs*', 'sampleApps*', 'scripts*', 'benchmarks*']),
     package_dir={'ebcli': 'ebcli'},
     package_data={
         'ebcli.lib': ['botocoredata/*/*/*.json'],
@@ -71,7 +75,7 @@ setup_options = dict(
     ),
     entry_points={
         'console_scripts': [
-            'eb=ebcli.core.ebcore:main',
+            'eb=ebcli.core.daemon:main',
             'ebp=ebcli.core.ebpcore:main'
         ]
     },